@@ -1,30 +1,9 @@
-# Add at the VERY TOP of app.py
-import os
 import streamlit as st
-
-# FORCE CREATE data folder and database
-os.makedirs("data", exist_ok=True)
-os.makedirs("models", exist_ok=True)
-
-# Create empty database file if it doesn't exist
-if not os.path.exists("data/production.db"):
-    import sqlite3
-    conn = sqlite3.connect("data/production.db")
-    conn.close()
-    print("✅ Created database file")
-
-import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from datetime import datetime, timedelta
+import random
 import time
-import json
-from database import db
+from datetime import datetime, timedelta, timezone
 from auth import login_required, get_current_user, logout, require_role
 from config import Config
-from utils.quality_models import predictor
 
 # Page configuration
 st.set_page_config(
@@ -66,15 +45,59 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def show_paginated_grid(key, paginator, filters=None):
+    """Render one page of a keyset-paginated table with Previous/Next controls"""
+    pages_key = f"{key}_pages"
+    signature = repr(sorted((filters or {}).items()))
+    
+    # Start over from the newest rows whenever the filters change
+    if st.session_state.get(f"{key}_filters") != signature:
+        st.session_state[f"{key}_filters"] = signature
+        st.session_state[pages_key] = [None]
+    
+    cursors = st.session_state[pages_key]
+    result = paginator.fetch_page(filters, cursors[-1])
+    st.dataframe(result.rows, use_container_width=True)
+    
+    col1, col2, col3 = st.columns([1, 4, 1])
+    with col1:
+        if st.button("◀ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    with col3:
+        if st.button("Next ▶", key=f"{key}_next", disabled=not result.has_next):
+            cursors.append(result.next_cursor)
+            st.rerun()
+    
+    return result
+
 # Check authentication
 if not login_required():
     st.stop()
 
+# Heavy modules load only after login; page-specific ones are imported in their page branch
+import pandas as pd
+import numpy as np
+from database import db, DataScope
+from utils.instrumentation import registry
+from utils.resources import resources
+from utils.shift_calendar import shift_calendar
+
+render_started = time.perf_counter()
+
+# Periodic jobs run in the background of every worker; the lease in scheduler_jobs keeps each run to one
+if Config.SCHEDULER_ENABLED:
+    from utils.jobs import scheduler
+    scheduler.start()
+
 # Get current user
 user = get_current_user()
 is_admin = user['role'] == 'admin'
 is_supervisor = user['role'] in ['admin', 'supervisor']
 is_operator = user['role'] in ['admin', 'supervisor', 'operator']
+scope = DataScope.for_user(user)
 
 # Sidebar
 with st.sidebar:
@@ -95,6 +118,16 @@ with st.sidebar:
         shift = Config.SHIFTS.get(user['shift_id'], {}).get('name', 'Unknown')
         st.markdown(f"**Shift:** {shift}")
     
+    if not scope.plant_wide:
+        st.caption(f"Showing data for: {scope.describe()}")
+    
+    # Dashboard lines: every line merged, or one of them (other pages work on the default line)
+    dashboard_lines = None
+    if len(Config.LINES) > 1:
+        dashboard_line = st.selectbox("Production Line", [None] + list(Config.LINES),
+                                      format_func=lambda l: "All lines" if l is None else Config.LINES[l]['name'])
+        dashboard_lines = None if dashboard_line is None else [dashboard_line]
+    
     st.markdown("---")
     
     # Navigation
@@ -107,11 +140,12 @@ with st.sidebar:
          "📊 Quality Control",
          "🔮 Predictive Maintenance",
          "📈 Analytics & Reports",
+         "📤 Report Export",
          "⚙️ Administration"] if is_admin else
         ["🏭 Production Dashboard", 
          "📦 Unit Tracking", 
          "🔧 Station View",
-         "📊 Quality Control"]
+         "📊 Quality Control"] + (["📤 Report Export"] if is_supervisor else [])
     )
     
     st.markdown("---")
@@ -123,7 +157,7 @@ with st.sidebar:
     *Airbus H-125 Final Assembly Line*
     
     **Today:** {datetime.now().strftime('%d %B %Y')}  
-    **Shift:** {Config.SHIFTS[pd.Timestamp.now().hour // 8 + 1]['name'] if pd.Timestamp.now().hour < 22 else 'Night'}
+    **Shift:** {shift_calendar.current()[1]}
     """)
     
     if st.button("🚪 Logout", use_container_width=True):
@@ -133,11 +167,13 @@ with st.sidebar:
 # PRODUCTION DASHBOARD
 # ============================================================================
 if "Production Dashboard" in page:
+    from utils.charts import build_production_timeline
+    
     st.markdown('<div class="main-header"><h1>🚁 AeroTwin H-125 - Production Dashboard</h1><p>Real-time assembly line intelligence for Vemagal facility</p></div>', 
                 unsafe_allow_html=True)
     
-    # Get dashboard data
-    dashboard_data = db.get_production_dashboard_data()
+    # Get dashboard data (lines are queried in parallel and merged)
+    dashboard_data = db.get_plant_dashboard_data(scope, dashboard_lines)
     
     # Top KPI row
     col1, col2, col3, col4, col5 = st.columns(5)
@@ -161,8 +197,9 @@ if "Production Dashboard" in page:
         )
     
     with col3:
-        if not dashboard_data['quality_stats'].empty:
-            pass_rate = dashboard_data['quality_stats']['pass_rate'].iloc[0]
+        pass_rate = dashboard_data['quality_stats']['pass_rate'].iloc[0] if not dashboard_data['quality_stats'].empty else None
+        # No checks in scope for the last 7 days leaves AVG() NULL
+        if pass_rate is not None and not pd.isna(pass_rate):
             st.metric(
                 "Quality Pass Rate (7d)",
                 f"{pass_rate:.1f}%",
@@ -193,56 +230,7 @@ if "Production Dashboard" in page:
     
     # Create Gantt chart for active units
     if not dashboard_data['active_units'].empty:
-        fig = go.Figure()
-        
-        colors = px.colors.qualitative.Set3
-        
-        for idx, unit in dashboard_data['active_units'].iterrows():
-            # Get station progress for this unit
-            with db.get_connection() as conn:
-                progress = pd.read_sql_query('''
-                    SELECT s.name as station, 
-                           at.start_time,
-                           at.end_time,
-                           s.target_cycle_time
-                    FROM assembly_tracking at
-                    JOIN stations s ON at.station_id = s.id
-                    WHERE at.unit_id = ?
-                    ORDER BY at.start_time
-                ''', conn, params=[unit['id']])
-            
-            if not progress.empty:
-                for i, row in progress.iterrows():
-                    start = pd.to_datetime(row['start_time'])
-                    if pd.isna(row['end_time']):
-                        end = datetime.now()
-                        opacity = 0.6
-                    else:
-                        end = pd.to_datetime(row['end_time'])
-                        opacity = 0.3
-                    
-                    fig.add_trace(go.Bar(
-                        name=f"{unit['tail_number']} - {row['station']}",
-                        x=[(end - start).total_seconds() / 3600],
-                        y=[row['station']],
-                        base=[start.strftime('%Y-%m-%d %H:%M')],
-                        orientation='h',
-                        marker=dict(color=colors[idx % len(colors)], opacity=opacity),
-                        text=f"{unit['tail_number']}<br>{row['station']}",
-                        textposition='inside',
-                        hoverinfo='text'
-                    ))
-        
-        fig.update_layout(
-            title="Active Production Timeline",
-            xaxis_title="Time",
-            yaxis_title="Station",
-            barmode='overlay',
-            height=500,
-            showlegend=False,
-            hovermode='y unified'
-        )
-        
+        fig = build_production_timeline(dashboard_data['active_units'], dashboard_data['active_unit_progress'])
         st.plotly_chart(fig, use_container_width=True)
     else:
         st.info("No active production units")
@@ -251,7 +239,7 @@ if "Production Dashboard" in page:
     st.subheader("🔧 Station Status")
     
     cols = st.columns(4)
-    for idx, station in enumerate(Config.STATIONS):
+    for idx, station in enumerate(s for s in Config.STATIONS if scope.includes_station(s['id'])):
         with cols[idx % 4]:
             # Get station status from database
             station_status = dashboard_data['station_status']
@@ -288,6 +276,9 @@ if "Production Dashboard" in page:
 # UNIT TRACKING
 # ============================================================================
 elif "Unit Tracking" in page:
+    import plotly.graph_objects as go
+    from utils.pagination import quality_check_paginator
+    
     st.header("📦 Helicopter Unit Tracking")
     
     # Unit selection
@@ -296,6 +287,72 @@ elif "Unit Tracking" in page:
             SELECT * FROM helicopter_units ORDER BY start_date DESC
         ''', conn)
     
+    with st.expander("🔎 Search Notes & Logs"):
+        from utils.note_search import search_notes
+        
+        search_text = st.text_input("Search", placeholder='e.g. "seal leak" hydraulic', key="note_search_text")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            search_unit = st.selectbox("Unit", [None] + units['id'].tolist(), key="note_search_unit",
+                                       format_func=lambda u: "All" if u is None else
+                                       units.loc[units['id'] == u, 'tail_number'].iloc[0])
+        with col2:
+            search_station = st.selectbox("Station", [None] + [s['id'] for s in Config.STATIONS],
+                                          key="note_search_station",
+                                          format_func=lambda s: "All" if s is None else Config.STATIONS[s - 1]['name'])
+        with col3:
+            search_range = st.date_input("Date Range", [], key="note_search_range")
+        
+        if search_text.strip():
+            db.flush_events()  # include notes still queued by the write-behind logger
+            matches = search_notes(
+                db, search_text, unit_id=search_unit, station_id=search_station,
+                start=search_range[0].isoformat() if len(search_range) == 2 else None,
+                end=(search_range[1] + timedelta(days=1)).isoformat() if len(search_range) == 2 else None
+            )
+            st.caption(f"{len(matches)} best matches")
+            for match in matches.itertuples():
+                source = "Job note" if match.source == 'job' else match.kind
+                station = f"Station {int(match.station_id)}" if pd.notna(match.station_id) else "-"
+                st.markdown(f"`{match.time}` · **{match.tail_number or '-'}** · {station} · {source}  \n{match.snippet}")
+    
+    with st.expander("🧭 Traceability"):
+        trace_tab1, trace_tab2 = st.tabs(["Unit History", "Units Touched"])
+        
+        with trace_tab1:
+            trace_tail = st.text_input("Tail Number", key="trace_tail").strip()
+            if trace_tail:
+                history = db.get_unit_history(trace_tail)
+                if history.empty:
+                    st.info(f"No history recorded for {trace_tail}")
+                else:
+                    st.caption(f"{len(history)} events")
+                    st.dataframe(history.drop(columns=['station_id', 'operator_id']), use_container_width=True)
+        
+        with trace_tab2:
+            with db.get_connection() as conn:
+                operators = pd.read_sql_query("SELECT id, full_name FROM users ORDER BY full_name", conn)
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                trace_station = st.selectbox("Station", [None] + [s['id'] for s in Config.STATIONS], key="trace_station",
+                                             format_func=lambda s: "Any" if s is None else Config.STATIONS[s - 1]['name'])
+            with col2:
+                trace_operator = st.selectbox("Operator", [None] + operators['id'].tolist(), key="trace_operator",
+                                              format_func=lambda o: "Any" if o is None else
+                                              operators.loc[operators['id'] == o, 'full_name'].iloc[0])
+            with col3:
+                trace_range = st.date_input("Window", [datetime.now().date() - timedelta(days=7), datetime.now().date()],
+                                            key="trace_range")
+            
+            if trace_station is None and trace_operator is None:
+                st.info("Choose a station and/or an operator")
+            elif len(trace_range) == 2:
+                touched = db.get_units_touched(trace_range[0].isoformat(),
+                                               (trace_range[1] + timedelta(days=1)).isoformat(),
+                                               station_id=trace_station, operator_id=trace_operator)
+                st.caption(f"{len(touched)} units")
+                st.dataframe(touched, use_container_width=True)
+    
     if not units.empty:
         selected_unit = st.selectbox(
             "Select Helicopter Unit",
@@ -390,16 +447,13 @@ elif "Unit Tracking" in page:
             st.plotly_chart(fig, use_container_width=True)
             
             # Quality checks for this unit
-            quality_checks = pd.read_sql_query('''
-                SELECT * FROM quality_measurements 
-                WHERE unit_id = ?
-                ORDER BY measurement_time DESC
-                LIMIT 20
-            ''', conn, params=[unit_id])
-            
-            if not quality_checks.empty:
-                st.subheader("Recent Quality Checks")
-                st.dataframe(quality_checks, use_container_width=True)
+            st.subheader("Quality Checks")
+            status_filter = st.selectbox("Status", ["All", "PASS", "FAIL"], key="unit_quality_status")
+            show_paginated_grid(
+                f"unit_quality_{unit_id}",
+                quality_check_paginator(db),
+                {'unit_id': int(unit_id), 'status': None if status_filter == "All" else status_filter}
+            )
         
         # Add production note
         if is_operator:
@@ -407,6 +461,7 @@ elif "Unit Tracking" in page:
                 note = st.text_area("Add Production Note")
                 if st.form_submit_button("Add Note"):
                     db.log_event('NOTE', note, unit_id=unit_id, user_id=user['id'])
+                    db.flush_events()
                     st.success("Note added")
                     st.rerun()
     
@@ -417,6 +472,14 @@ elif "Unit Tracking" in page:
 # QUALITY CONTROL
 # ============================================================================
 elif "Quality Control" in page:
+    import plotly.graph_objects as go
+    import plotly.express as px
+    from utils.quality_models import predictor
+    from utils.feature_store import feature_store
+    from utils.prediction_cache import prediction_cache
+    
+    resources.track_session(st.session_state, 'predictor')
+    
     st.header("📊 Quality Control & Predictive Analytics")
     
     # Quality overview
@@ -425,28 +488,15 @@ elif "Quality Control" in page:
     with col1:
         st.subheader("Real-time Quality Prediction")
         
-        # Get current conditions
-        current_conditions = {
-            'hour_of_day': datetime.now().hour,
-            'day_of_week': datetime.now().weekday(),
-            'shift_id': (datetime.now().hour // 8) + 1,
-            'operator_experience_months': np.random.randint(6, 60),
-            'operator_certification_level': np.random.randint(1, 5),
-            'temperature_c': np.random.normal(23, 2),
-            'humidity_pct': np.random.normal(45, 5),
-            'vibration_level': np.random.exponential(0.3),
-            'station_id': 4,  # Current station
-            'station_critical': 1,
-            'days_since_maintenance': np.random.randint(1, 20),
-            'component_age_days': np.random.randint(10, 150),
-            'previous_defects': np.random.poisson(0.1),
-            'cycle_time_deviation': np.random.normal(0, 1),
-            'torque_value': np.random.normal(100, 5),
-            'pressure_value': np.random.normal(50, 3)
-        }
+        # Get current conditions from the sensor feature store
+        station_names = {s['name']: s['id'] for s in Config.STATIONS}
+        default_station = next((s['name'] for s in Config.STATIONS if s['id'] == (user.get('station_id') or 4)), None)
+        selected_station = st.selectbox("Station", list(station_names), 
+                                        index=list(station_names).index(default_station))
+        current_conditions = feature_store.get_features(station_names[selected_station])
         
-        # Get prediction
-        prediction = predictor.predict_quality(current_conditions)
+        # Get prediction (reused across reruns while conditions stay within the cache buckets)
+        prediction = prediction_cache.predict(predictor, current_conditions)
         
         # Gauge chart
         fig = go.Figure(go.Indicator(
@@ -482,21 +532,58 @@ elif "Quality Control" in page:
             <p>Defect Probability: {prediction['defect_probability']:.1%}</p>
         </div>
         """, unsafe_allow_html=True)
+        
+        cache_stats = prediction_cache.stats()
+        if cache_stats['hit_rate'] is not None:
+            st.caption(f"Prediction cache hit rate: {cache_stats['hit_rate']:.0%} "
+                       f"({cache_stats['hits']} of {cache_stats['hits'] + cache_stats['misses']} lookups)")
+        
+        # Per-prediction attributions: which inputs pushed the defect risk up or down
+        with st.expander("Why this prediction?", expanded=prediction['risk_level'] != "LOW"):
+            explanation = predictor.explain(current_conditions)
+            drivers = pd.DataFrame({
+                'feature': list(explanation['defect_contributions']),
+                'defect_logodds': list(explanation['defect_contributions'].values()),
+                'quality_points': [explanation['quality_contributions'][f] for f in explanation['defect_contributions']],
+                'value': [current_conditions.get(f, 0) for f in explanation['defect_contributions']]
+            })
+            drivers = drivers.reindex(drivers['defect_logodds'].abs().sort_values(ascending=False).index).head(8)
+            
+            fig = go.Figure(go.Bar(
+                x=drivers['defect_logodds'][::-1],
+                y=drivers['feature'][::-1],
+                orientation='h',
+                marker_color=['#d62728' if v > 0 else '#2ca02c' for v in drivers['defect_logodds'][::-1]],
+                customdata=drivers[['value', 'quality_points']][::-1],
+                hovertemplate="%{y} = %{customdata[0]:.2f}<br>defect log-odds %{x:+.3f}<br>"
+                              "quality score %{customdata[1]:+.2f}<extra></extra>"
+            ))
+            fig.update_layout(title="Top drivers of defect risk (red raises risk)",
+                              xaxis_title="Contribution to defect log-odds", height=320,
+                              margin=dict(l=10, r=10, t=40, b=10))
+            st.plotly_chart(fig, use_container_width=True)
+            quality_total = explanation['quality_bias'] + sum(explanation['quality_contributions'].values())
+            st.caption(f"Quality score: baseline {explanation['quality_bias']:.1f} + feature contributions "
+                       f"= {quality_total:.1f} for the current readings")
+        
+        # Rolling sensor windows behind the prediction
+        with st.expander("Live Sensor Windows"):
+            rolling = feature_store.get_rolling_stats(station_names[selected_station])
+            rows = [
+                {'sensor': sensor, 'window': window, **stats}
+                for sensor, windows in rolling.items()
+                for window, stats in windows.items() if stats
+            ]
+            if rows:
+                st.dataframe(pd.DataFrame(rows), use_container_width=True)
+            else:
+                st.info("No sensor readings for this station yet - using baseline conditions")
     
     with col2:
         st.subheader("Recent Quality Metrics")
         
         # Get recent quality data
-        with db.get_connection() as conn:
-            quality_trend = pd.read_sql_query('''
-                SELECT DATE(measurement_time) as date,
-                       AVG(CASE WHEN status = 'PASS' THEN 1 ELSE 0 END) * 100 as pass_rate,
-                       COUNT(*) as checks
-                FROM quality_measurements
-                WHERE measurement_time >= DATE('now', '-30 days')
-                GROUP BY DATE(measurement_time)
-                ORDER BY date
-            ''', conn)
+        quality_trend = db.get_quality_trend(30, scope)
         
         if not quality_trend.empty:
             fig = px.line(quality_trend, x='date', y='pass_rate',
@@ -600,25 +687,242 @@ elif "Predictive Maintenance" in page and is_supervisor:
         styled_schedule = schedule.style.applymap(color_days, subset=['days_until'])
         st.dataframe(styled_schedule, use_container_width=True)
 
+# ============================================================================
+# ANALYTICS & REPORTS
+# ============================================================================
+elif "Analytics & Reports" in page and is_admin:
+    import plotly.graph_objects as go
+    import plotly.express as px
+    from utils.report_cubes import report_cubes, timed_report
+    from utils.parquet_store import ParquetExporter
+    from utils.analytics import analytics
+    from utils.line_simulator import simulate_line
+    from utils.scenarios import build_scenarios, run_sweep
+    from utils.line_analytics import line_flow
+    
+    st.header("📈 Analytics & Reports")
+    
+    # Report period
+    col1, col2 = st.columns(2)
+    with col1:
+        start_day = st.date_input("From", datetime.now().date() - timedelta(days=180))
+    with col2:
+        end_day = st.date_input("To", datetime.now().date())
+    
+    cube, refreshed_days, elapsed_ms = timed_report(report_cubes, start_day.isoformat(), end_day.isoformat())
+    st.caption(f"Report cube: {len(cube)} cells, {len(refreshed_days)} day(s) rebuilt, loaded in {elapsed_ms:.0f} ms")
+    
+    if cube.empty:
+        st.info("No production data in the selected period")
+    else:
+        monthly = report_cubes.monthly_production(cube)
+        stations = report_cubes.station_cycle_times(cube)
+        units = report_cubes.unit_cycle_times(cube)
+        shifts = report_cubes.shift_summary(cube)
+        
+        # Period KPIs
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            this_month = datetime.now().strftime('%Y-%m')
+            produced = int(monthly.loc[monthly['month'] == this_month, 'units_completed'].sum())
+            st.metric("Produced This Month", produced,
+                      delta=f"{produced - Config.TARGET_MONTHLY_PRODUCTION} vs target")
+        
+        with col2:
+            avg_unit_hours = units['cycle_time_sum'].mean()
+            st.metric("Avg Unit Cycle Time", f"{avg_unit_hours:.0f}h",
+                      delta=f"{avg_unit_hours - Config.TARGET_CYCLE_TIME:.0f}h vs target",
+                      delta_color="inverse")
+        
+        with col3:
+            checks = cube['checks'].sum()
+            pass_rate = cube['passes'].sum() / checks * 100 if checks else 0
+            st.metric("Quality Pass Rate", f"{pass_rate:.1f}%",
+                      delta=f"{pass_rate - Config.TARGET_QUALITY_SCORE:.1f}% vs target")
+        
+        with col4:
+            st.metric("Defects / Rework", f"{int(cube['defects'].sum())}",
+                      delta=f"{cube['rework_hours'].sum():.0f}h rework", delta_color="off")
+        
+        # Monthly production vs target
+        st.subheader("Monthly Production vs Target")
+        if not monthly.empty:
+            fig = px.bar(monthly, x='month', y='units_completed',
+                         labels={'units_completed': 'Helicopters Completed', 'month': 'Month'})
+            fig.add_hline(y=Config.TARGET_MONTHLY_PRODUCTION, line_dash="dash", line_color="red",
+                          annotation_text="Target")
+            fig.update_layout(height=350)
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No helicopters have completed final testing in this period")
+        
+        # Cycle time vs target
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("Station Cycle Time vs Target")
+            fig = go.Figure()
+            fig.add_trace(go.Bar(name="Actual", x=stations['station'], y=stations['avg_cycle_time']))
+            fig.add_trace(go.Bar(name="Target", x=stations['station'], y=stations['target_cycle_time']))
+            fig.update_layout(barmode='group', height=350, yaxis_title="Hours")
+            st.plotly_chart(fig, use_container_width=True)
+        
+        with col2:
+            st.subheader("Unit Cycle Time vs Target")
+            fig = px.bar(units, x='unit_id', y='cycle_time_sum',
+                         color='over_target', labels={'cycle_time_sum': 'Hours', 'unit_id': 'Unit'})
+            fig.add_hline(y=Config.TARGET_CYCLE_TIME, line_dash="dash", line_color="red")
+            fig.update_layout(height=350, showlegend=False)
+            st.plotly_chart(fig, use_container_width=True)
+        
+        # Shift breakdown
+        st.subheader("Shift Performance")
+        st.dataframe(shifts[['shift', 'operations', 'defects', 'rework_hours', 'checks', 'pass_rate']],
+                     use_container_width=True)
+        with st.expander("By shift worked"):
+            st.dataframe(report_cubes.shift_instances(cube), use_container_width=True, hide_index=True)
+    
+    # Line flow replayed from assembly_tracking (closed days are cached)
+    st.subheader("Line Flow & Bottlenecks")
+    flow = line_flow.summary(start_day, end_day)
+    
+    if flow['stations'].empty:
+        st.info("No assembly jobs in the selected period")
+    else:
+        col1, col2 = st.columns(2)
+        col1.metric("Average WIP", f"{flow['avg_wip']:.1f} units")
+        col2.metric("Most Frequent Bottleneck", flow['bottleneck'] or "-")
+        
+        st.dataframe(flow['stations'][['station', 'utilisation', 'avg_active_jobs', 'avg_queue_hours',
+                                       'jobs_started', 'bottleneck_share']], use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = px.line(flow['daily_wip'], x='day', y='wip', title="WIP Over Time")
+            fig.update_layout(height=300)
+            st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            fig = px.scatter(flow['daily_bottleneck'], x='day', y='station', title="Shifting Bottleneck")
+            fig.update_layout(height=300)
+            st.plotly_chart(fig, use_container_width=True)
+    
+    # Digital twin what-if simulation
+    with st.expander("Line Simulation (What-if)"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sim_shifts = st.multiselect("Active Shifts", list(Config.SHIFTS), default=list(Config.SHIFTS),
+                                        format_func=lambda s: Config.SHIFTS[s]['name'])
+            sim_days = st.slider("Simulated Days", 90, 730, 365, step=30)
+        with col2:
+            sim_overrides = {}
+            for station in Config.STATIONS:
+                if station['critical']:
+                    bays = st.number_input(f"{station['name']} bays", 1, 4, 1, key=f"sim_bays_{station['id']}")
+                    if bays > 1:
+                        sim_overrides[station['id']] = {'capacity': int(bays)}
+        with col3:
+            sim_seed = st.number_input("Random Seed", 0, 10000, 42)
+            sim_max_wip = st.number_input("Max WIP", 1, 30, Config.SIMULATION['max_wip'])
+        
+        if st.button("Run Simulation") and sim_shifts:
+            result = simulate_line(sim_days, shifts=sim_shifts, station_overrides=sim_overrides,
+                                   params={'max_wip': int(sim_max_wip)}, seed=int(sim_seed))
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Helicopters / Month", f"{result['avg_monthly_throughput']:.2f}",
+                        delta=f"{result['avg_monthly_throughput'] - Config.TARGET_MONTHLY_PRODUCTION:.2f} vs target")
+            col2.metric("Avg Flow Time", f"{result['avg_flow_time_hours'] or 0:.0f}h")
+            col3.metric("Bottleneck", result['bottleneck'])
+            st.dataframe(result['stations'], use_container_width=True)
+    
+    # Scenario sweep across a process pool
+    with st.expander("Scenario Sweep"):
+        st.caption("Compare line configurations against the monthly target; replications run in parallel across all cores.")
+        sweep_grid = {}
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.checkbox("Compare adding the Night shift", value=True):
+                sweep_grid['shifts'] = [[1, 2], [1, 2, 3]]
+            if st.checkbox("Compare a second Engine Integration bay", value=True):
+                sweep_grid['station.5.capacity'] = [1, 2]
+            if st.checkbox("Compare shorter Quality Testing (60h)"):
+                sweep_grid['station.8.cycle_time'] = [72, 60]
+        with col2:
+            sweep_replications = st.slider("Replications per Scenario", 2, 50, 10)
+            sweep_days = st.slider("Days per Replication", 90, 730, 365, step=30, key="sweep_days")
+        
+        if st.button("Run Sweep"):
+            scenarios = build_scenarios(sweep_grid)
+            with st.spinner(f"Running {len(scenarios) * sweep_replications} replications..."):
+                summary = run_sweep(scenarios, replications=sweep_replications, days=sweep_days)
+            st.dataframe(summary, use_container_width=True)
+            st.caption(f"Replication results saved to {summary.attrs['output_path']}")
+    
+    # Long-range history from the Parquet store
+    with st.expander("Long-range History (Parquet)"):
+        if st.button("Export New History to Parquet"):
+            written = ParquetExporter(db).export_all()
+            st.success(f"Exported rows: {written}")
+        
+        history = analytics.station_cycle_times()
+        if history is not None and not history.empty:
+            fig = px.line(history, x='month', y='avg_cycle_time', color='station_id',
+                          title="Monthly Average Cycle Time by Station")
+            st.plotly_chart(fig, use_container_width=True)
+        else:
+            st.info("No Parquet history exported yet")
+
+# ============================================================================
+# REPORT EXPORT
+# ============================================================================
+elif "Report Export" in page and is_supervisor:
+    from utils.exports import EXPORT_QUERIES, export_to_file
+    
+    st.header("📤 Report Export")
+    st.caption("Rows are read from the database in chunks; the finished file is held in memory while it is downloaded.")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    
+    with col1:
+        report = st.selectbox("Report", list(EXPORT_QUERIES),
+                              format_func=lambda r: r.replace('_', ' ').title())
+    with col2:
+        export_start = st.date_input("From", datetime.now().date() - timedelta(days=90), key="export_start")
+    with col3:
+        export_end = st.date_input("To", datetime.now().date(), key="export_end")
+    with col4:
+        export_format = st.radio("Format", ["csv", "xlsx"], horizontal=True)
+    
+    mime = "text/csv" if export_format == "csv" else \
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    
+    # Deferred: the export only runs when the button is clicked
+    st.download_button(
+        "⬇️ Download",
+        data=lambda: export_to_file(db, report, export_start, export_end, export_format),
+        file_name=f"{report}_{export_start}_{export_end}.{export_format}",
+        mime=mime,
+        on_click="ignore",
+        use_container_width=True
+    )
+
 # ============================================================================
 # ADMINISTRATION
 # ============================================================================
 elif "Administration" in page and is_admin:
+    from utils.pagination import production_log_paginator, user_paginator
+    
     st.header("⚙️ System Administration")
     
-    tab1, tab2, tab3 = st.tabs(["Users", "System Logs", "Database"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Users", "System Logs", "Database", "Performance", "Models", "Jobs"])
     
     with tab1:
         st.subheader("User Management")
         
         # List users
-        with db.get_connection() as conn:
-            users = pd.read_sql_query('''
-                SELECT id, username, full_name, role, station_id, shift_id, is_active, last_login
-                FROM users
-            ''', conn)
-        
-        st.dataframe(users, use_container_width=True)
+        role_filter = st.selectbox("Role", ["All", 'admin', 'supervisor', 'operator', 'viewer'], key="users_role")
+        show_paginated_grid("users", user_paginator(db),
+                            {'role': None if role_filter == "All" else role_filter})
         
         # Add user form
         with st.expander("Add New User"):
@@ -648,16 +952,31 @@ elif "Administration" in page and is_admin:
     
     with tab2:
         st.subheader("System Logs")
+        db.flush_events()  # include events still queued by the write-behind logger
         
-        with db.get_connection() as conn:
-            logs = pd.read_sql_query('''
-                SELECT timestamp, event_type, description, user_id
-                FROM production_logs
-                ORDER BY timestamp DESC
-                LIMIT 100
-            ''', conn)
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            event_type = st.text_input("Event Type", key="logs_event_type").strip().upper()
+        with col2:
+            log_unit = st.number_input("Unit ID", min_value=0, step=1, key="logs_unit")
+        with col3:
+            log_station = st.selectbox("Station", [None] + [s['id'] for s in Config.STATIONS], key="logs_station",
+                                       format_func=lambda s: "All" if s is None else f"{s}")
+        with col4:
+            log_range = st.date_input("Date Range", [], key="logs_range")
         
-        st.dataframe(logs, use_container_width=True)
+        log_filters = {
+            'event_type': event_type or None,
+            'unit_id': int(log_unit) or None,
+            'station_id': log_station
+        }
+        if len(log_range) == 2:
+            # Log timestamps are UTC (CURRENT_TIMESTAMP): bound them by the local midnights in UTC
+            log_filters['start'], log_filters['end'] = (
+                datetime.combine(day, datetime.min.time()).astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                for day in (log_range[0], log_range[1] + timedelta(days=1)))
+        
+        show_paginated_grid("logs", production_log_paginator(db), log_filters)
     
     with tab3:
         st.subheader("Database Management")
@@ -666,12 +985,10 @@ elif "Administration" in page and is_admin:
         
         with col1:
             if st.button("Export Database", use_container_width=True):
-                # Create backup
-                import shutil
-                from datetime import datetime
-                backup_name = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
-                shutil.copyfile(Config.DATABASE_PATH, f"data/{backup_name}")
-                st.success(f"Database backed up as {backup_name}")
+                # Online backup: consistent even while other sessions are writing
+                from utils.jobs import backup_database
+                backup_paths = backup_database(keep=None)
+                st.success(f"Database backed up as {', '.join(backup_paths)}")
         
         with col2:
             if st.button("Generate Test Data", use_container_width=True):
@@ -705,6 +1022,176 @@ elif "Administration" in page and is_admin:
                 
                 st.success("Test data generated")
 
+    with tab4:
+        st.subheader("Performance")
+        snapshot = registry.snapshot()
+        st.caption(f"Recording since {snapshot['started_at']} (this server process)")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.download_button("Download JSON", registry.dump_json(),
+                               file_name=f"performance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                               mime="application/json", use_container_width=True)
+        with col2:
+            if st.button("Reset Counters", use_container_width=True):
+                registry.reset()
+                st.rerun()
+        with col3:
+            registry.enabled = st.toggle("Recording", value=registry.enabled)
+        
+        st.markdown("**Page Renders**")
+        st.dataframe(pd.DataFrame(snapshot['pages']).drop(columns='histogram', errors='ignore'),
+                     use_container_width=True)
+        
+        st.markdown("**Queries** (by total time)")
+        queries = pd.DataFrame(snapshot['queries'])
+        if not queries.empty:
+            queries['call_sites'] = queries['call_sites'].apply(lambda sites: ', '.join(sites))
+            st.dataframe(queries.drop(columns='histogram'), use_container_width=True)
+            
+            slowest = snapshot['queries'][0]
+            st.markdown(f"Latency histogram of the most expensive query: `{slowest['fingerprint'][:120]}`")
+            st.bar_chart(pd.Series(slowest['histogram'], name="executions"))
+        
+        st.markdown("**Model Calls**")
+        st.dataframe(pd.DataFrame(snapshot['calls']).drop(columns='histogram', errors='ignore'),
+                     use_container_width=True)
+        
+        st.markdown(f"**Shared Resources** (predictor backend: {Config.PREDICTOR_BACKEND})")
+        st.dataframe(pd.DataFrame(resources.stats()), use_container_width=True)
+        
+        from utils.prediction_cache import prediction_cache
+        
+        st.markdown("**Prediction Cache**")
+        cache_stats = prediction_cache.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Hit Rate", f"{cache_stats['hit_rate']:.1%}" if cache_stats['hit_rate'] is not None else "-")
+        col2.metric("Entries", f"{cache_stats['size']} / {cache_stats['max_size']}")
+        col3.metric("Evictions", cache_stats['evictions'])
+        col4.metric("Invalidations", cache_stats['invalidations'])
+        if st.button("Clear Prediction Cache"):
+            prediction_cache.clear()
+            prediction_cache.reset_stats()
+            st.rerun()
+        
+        if Config.EVENT_WRITE_BEHIND:
+            st.markdown("**Event Log Writer**")
+            event_stats = db.event_logger.stats()
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Queued", event_stats['queued'])
+            col2.metric("Written", event_stats['written'])
+            col3.metric("Avg Batch", f"{event_stats['written'] / event_stats['flushes']:.1f}" if event_stats['flushes'] else "-")
+            col4.metric("Replayed at Startup", event_stats['replayed'])
+            if event_stats['failures']:
+                st.warning(f"{event_stats['failures']} flushes failed and were retried")
+        
+        if Config.PREDICTOR_BACKEND == 'remote':
+            from utils.quality_models import predictor
+            
+            st.markdown(f"**Inference Server** (`{Config.INFERENCE_ADDRESS}`)")
+            health = predictor.health()
+            if health.get('status') != 'ok':
+                st.error(f"Inference server unreachable: {health.get('error')}")
+            else:
+                metrics = predictor.metrics()
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Predictions", metrics['predictions'])
+                col2.metric("Avg Batch Size", metrics['avg_batch_size'] or "-")
+                col3.metric("p95 Latency", f"{metrics['request_latency_ms']['p95_ms'] or 0} ms")
+                col4.metric("Uptime", f"{health['uptime_seconds'] / 3600:.1f} h")
+                st.bar_chart(pd.Series(metrics['batch_sizes'], name="batches"))
+
+    with tab5:
+        from utils.quality_models import predictor
+        
+        st.subheader("Quality Models")
+        psi, evaluation = predictor.drift_report()
+        
+        if evaluation:
+            st.markdown(f"**Holdout Evaluation** (most recent {evaluation['rows']} rows, unseen in training)")
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Quality MAE", f"{evaluation['quality']['mae']:.2f}")
+            col2.metric("Within ±5", f"{evaluation['quality']['within_5']:.1%}")
+            col3.metric("Defect ROC AUC", f"{evaluation['defect']['roc_auc']:.3f}" if evaluation['defect']['roc_auc'] else "-")
+            col4.metric("Defect Brier", f"{evaluation['defect']['brier']:.3f}")
+        else:
+            st.info("No holdout metrics saved with the current models - retrain to record them")
+        
+        st.markdown("**Input Drift** (PSI of live prediction inputs, cache hits included, vs training data)")
+        psi = pd.DataFrame(psi)
+        if not psi.empty and psi['observed'].max() > 0:
+            significant = psi[psi['status'] == 'significant']
+            if not significant.empty:
+                st.warning(f"Significant drift in: {', '.join(significant['feature'])}")
+            st.dataframe(psi, use_container_width=True)
+        else:
+            st.info("No live predictions observed since the models were loaded")
+        
+        if Config.PREDICTOR_BACKEND != 'remote':
+            col1, col2 = st.columns(2)
+            with col1:
+                with st.form("cross_validation"):
+                    st.markdown("**Cross-validation** (forward-chaining folds, parallel)")
+                    cv_samples = st.number_input("Rows", 2000, 100000, 10000, step=2000)
+                    cv_folds = st.slider("Folds", 3, 10, Config.MODEL_CV_FOLDS)
+                    if st.form_submit_button("Run Cross-validation"):
+                        from utils.model_evaluation import cross_validate_models
+                        with st.spinner("Cross-validating..."):
+                            data = predictor.generate_training_data(int(cv_samples))
+                            st.session_state['cv_results'] = cross_validate_models(data, n_splits=cv_folds)
+            with col2:
+                with st.form("hyperparameter_search"):
+                    st.markdown("**Hyperparameter Search** (successive halving)")
+                    search_model = st.selectbox("Model", ["regressor", "classifier"])
+                    search_samples = st.number_input("Rows ", 2000, 100000, 10000, step=2000)
+                    if st.form_submit_button("Run Search"):
+                        from utils.model_evaluation import search_hyperparameters
+                        with st.spinner("Searching..."):
+                            data = predictor.generate_training_data(int(search_samples))
+                            st.session_state['search_results'] = search_hyperparameters(data, search_model)
+            
+            if 'cv_results' in st.session_state:
+                st.markdown("**Cross-validation Results**")
+                st.dataframe(st.session_state['cv_results'].round(4), use_container_width=True)
+            
+            if 'search_results' in st.session_state:
+                result = st.session_state['search_results']
+                st.markdown(f"**Search Results** ({result['model']}, {result['scoring']})")
+                st.write(f"Best score {result['best_score']:.4f} with `{result['best_params']}` "
+                         f"({result['candidates']} candidates, {result['iterations']} halving rounds)")
+                st.dataframe(result['final_round'].astype({'params': str}), use_container_width=True)
+                if st.button("Retrain with Best Parameters"):
+                    with st.spinner("Training..."):
+                        params = {f"{'reg' if result['model'] == 'regressor' else 'clf'}_params": result['best_params']}
+                        predictor.train(**params)
+                    st.success("Models retrained and saved")
+                    st.rerun()
+
+    with tab6:
+        from utils.jobs import scheduler
+        
+        st.subheader("Background Jobs")
+        if not Config.SCHEDULER_ENABLED:
+            st.info("The scheduler is disabled in this worker (SCHEDULER_ENABLED=0); jobs only run on request here")
+        
+        jobs = pd.DataFrame(scheduler.status())
+        st.dataframe(jobs.drop(columns='job').set_index('description'), use_container_width=True)
+        
+        failed = jobs[jobs['last_status'] == 'failed']
+        for _, job in failed.iterrows():
+            st.error(f"{job['description']} failed at {job['last_run_at']}: {job['last_error']}")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            run_job = st.selectbox("Job", list(scheduler.jobs), format_func=lambda name: scheduler.jobs[name].description)
+        with col2:
+            st.write("")
+            if st.button("Run Now", use_container_width=True):
+                if scheduler.run_now(run_job):
+                    st.success("Job started - refresh to see its result")
+                else:
+                    st.warning("That job is already running")
+
 # Footer
 st.markdown("---")
 st.markdown(f"""
@@ -713,3 +1200,6 @@ st.markdown(f"""
     © 2026 Tata Advanced Systems Limited. All rights reserved.
 </div>
 """, unsafe_allow_html=True)
+
+# Page render timing (skipped when a page stops early)
+registry.record_page(page, (time.perf_counter() - render_started) * 1000)
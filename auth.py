@@ -1,63 +1,161 @@
-import streamlit as st
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
+import streamlit as st
+from config import Config
+from utils.passwords import hash_password, needs_rehash, verify_password
+
+USER_COLUMNS = ['id', 'username', 'full_name', 'role', 'station_id', 'shift_id', 'is_active']
+
+class SessionCache:
+    """
+    Verified logins by session token, so reruns cost a dict lookup instead of a
+    password hash. Every session lives Config.SESSION_TIMEOUT from login; with one
+    fixed lifetime, insertion order is expiry order and purging pops from the front.
+    """
+    
+    def __init__(self, timeout=Config.SESSION_TIMEOUT):
+        self.timeout = timeout.total_seconds()
+        self._lock = threading.Lock()
+        self._sessions = OrderedDict()  # token -> (user, expires_at)
+    
+    def create(self, user):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self.purge()
+            self._sessions[token] = (user, time.monotonic() + self.timeout)
+        return token
+    
+    def get(self, token):
+        with self._lock:
+            entry = self._sessions.get(token)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._sessions[token]
+                return None
+            return user
+    
+    def revoke(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+    
+    def purge(self):
+        now = time.monotonic()
+        while self._sessions:
+            token, (_, expires_at) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            self._sessions.popitem(last=False)
+    
+    def __len__(self):
+        return len(self._sessions)
+
+class LoginThrottle:
+    """
+    Failed-login counts per username: after Config.MAX_LOGIN_ATTEMPTS failures within
+    Config.LOGIN_LOCKOUT the name is locked until that window ends. Each entry is a
+    (failures, window_start) pair, and the table is capped so guessing many names
+    cannot grow it without bound.
+    """
+    
+    def __init__(self, max_attempts=Config.MAX_LOGIN_ATTEMPTS, lockout=Config.LOGIN_LOCKOUT, max_entries=10000):
+        self.max_attempts = max_attempts
+        self.lockout = lockout.total_seconds()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._failures = OrderedDict()  # username -> (failures, window_start)
+    
+    def locked_for(self, username):
+        """Seconds until username may try again (0 when not locked)"""
+        with self._lock:
+            entry = self._failures.get(username)
+            if entry is None:
+                return 0
+            failures, window_start = entry
+            remaining = window_start + self.lockout - time.monotonic()
+            if remaining <= 0:
+                del self._failures[username]
+                return 0
+            return remaining if failures >= self.max_attempts else 0
+    
+    def record_failure(self, username):
+        now = time.monotonic()
+        with self._lock:
+            failures, window_start = self._failures.pop(username, (0, now))
+            if window_start + self.lockout <= now:
+                failures, window_start = 0, now
+            self._failures[username] = (failures + 1, window_start)
+            while len(self._failures) > self.max_entries:
+                self._failures.popitem(last=False)
+    
+    def reset(self, username):
+        with self._lock:
+            self._failures.pop(username, None)
 
-# Simple users dictionary - no bcrypt needed
-USERS = {
-    "admin": {
-        "id": 1,
-        "username": "admin",
-        "password": "admin123",  # Plain text for demo
-        "full_name": "System Administrator",
-        "role": "admin",
-        "station_id": None,
-        "shift_id": None,
-        "is_active": True
-    },
-    "supervisor": {
-        "id": 2,
-        "username": "supervisor",
-        "password": "super123",
-        "full_name": "Shift Supervisor",
-        "role": "supervisor",
-        "station_id": None,
-        "shift_id": 1,
-        "is_active": True
-    },
-    "operator": {
-        "id": 3,
-        "username": "operator",
-        "password": "op123",
-        "full_name": "Assembly Operator",
-        "role": "operator",
-        "station_id": 3,
-        "shift_id": 1,
-        "is_active": True
-    },
-    "demo": {
-        "id": 999,
-        "username": "demo",
-        "password": "demo123",
-        "full_name": "Demo User",
-        "role": "viewer",
-        "station_id": None,
-        "shift_id": None,
-        "is_active": True
-    }
-}
+# Process-wide; Streamlit sessions keep only their token
+sessions = SessionCache()
+throttle = LoginThrottle()
+_dummy_hash = None
 
 def authenticate_user(username, password):
-    """Simple authentication - no bcrypt needed"""
-    if username in USERS and USERS[username]["password"] == password:
-        return USERS[username]
-    return None
+    """The active user with this username and password, or None; raises PermissionError while locked out"""
+    global _dummy_hash
+    from database import db
+    
+    username = username.strip()
+    if throttle.locked_for(username):
+        raise PermissionError(username)
+    
+    with db.get_connection() as conn:
+        row = conn.execute(f'''
+            SELECT {', '.join(USER_COLUMNS)}, password_hash FROM users WHERE username = ? AND is_active = 1
+        ''', (username,)).fetchone()
+    
+    if row is None:
+        # Spend the same time as a real check so response times don't reveal which names exist
+        _dummy_hash = _dummy_hash or hash_password(secrets.token_hex(8))
+        verify_password(password, _dummy_hash)
+        throttle.record_failure(username)
+        return None
+    if not verify_password(password, row['password_hash']):
+        throttle.record_failure(username)
+        return None
+    
+    throttle.reset(username)
+    with db.get_connection() as conn:
+        # Upgrade hashes made with an older cost setting while the password is at hand
+        if needs_rehash(row['password_hash']):
+            conn.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_password(password), row['id']))
+        conn.execute("UPDATE users SET last_login = ? WHERE id = ?", (datetime.now(), row['id']))
+        conn.commit()
+    return {column: row[column] for column in USER_COLUMNS}
+
+def load_user(username):
+    """Active user record without a password check (demo access)"""
+    from database import db
+    
+    with db.get_connection() as conn:
+        row = conn.execute(f"SELECT {', '.join(USER_COLUMNS)} FROM users WHERE username = ? AND is_active = 1",
+                           (username,)).fetchone()
+    return {column: row[column] for column in USER_COLUMNS} if row else None
+
+def start_session(user):
+    st.session_state.auth_token = sessions.create(user)
+    st.session_state.user = user
 
 def login_required():
     """Check if user is logged in, if not show login form"""
-    if 'user' not in st.session_state:
-        st.session_state.user = None
+    user = sessions.get(st.session_state.get('auth_token'))
+    st.session_state.user = user
     
     if st.session_state.user is None:
         st.title("🔐 AeroTwin H-125 - Production Access")
+        if st.session_state.pop('auth_token', None):
+            st.info("Your session has expired, please log in again")
         
         with st.form("login_form"):
             username = st.text_input("Username")
@@ -69,16 +167,24 @@ def login_required():
             
             with col2:
                 if st.form_submit_button("Demo Access", use_container_width=True):
-                    st.session_state.user = USERS["demo"]
-                    st.rerun()
+                    demo = load_user("demo")
+                    if demo:
+                        start_session(demo)
+                        st.rerun()
+                    st.error("Demo access is not available")
             
             if submitted:
-                user = authenticate_user(username, password)
-                if user:
-                    st.session_state.user = user
-                    st.rerun()
+                try:
+                    user = authenticate_user(username, password)
+                except PermissionError:
+                    minutes = max(1, round(throttle.locked_for(username.strip()) / 60))
+                    st.error(f"Too many failed attempts. Try again in {minutes} min.")
                 else:
-                    st.error("Invalid username or password")
+                    if user:
+                        start_session(user)
+                        st.rerun()
+                    else:
+                        st.error("Invalid username or password")
         
         st.markdown("---")
         st.markdown("""
@@ -94,6 +200,7 @@ def login_required():
 
 def logout():
     """Log out current user"""
+    sessions.revoke(st.session_state.pop('auth_token', None))
     st.session_state.user = None
     st.rerun()
 
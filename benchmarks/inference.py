@@ -0,0 +1,93 @@
+"""
+Load test for the local inference server: concurrent clients against a server on
+localhost, once per batch window, reporting throughput, latency and batch sizes.
+
+Usage (from the repository root; models are trained in --workdir on first use):
+    python benchmarks/inference.py --clients 16 --requests 200 --windows 0,2,5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import Config
+from utils.inference_client import RemotePredictor
+
+DEFAULT_WORKDIR = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'aerotwin-benchmarks')
+
+def run_clients(address, clients, requests):
+    """Per-request latencies (seconds) and wall time with clients threads in parallel"""
+    latencies = []
+    lock = threading.Lock()
+
+    def client(index):
+        predictor = RemotePredictor(address, autostart=False)
+        local = []
+        for i in range(requests):
+            features = dict(Config.FEATURE_DEFAULTS, station_id=index % 8 + 1, shift_id=1, hour_of_day=i % 24)
+            start = time.perf_counter()
+            predictor.predict_quality(features)
+            local.append(time.perf_counter() - start)
+        predictor.unload()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, time.perf_counter() - started
+
+def wait_until_ready(predictor, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        health = predictor.health()
+        if health.get('status') == 'ok' and health.get('loaded'):
+            return
+        time.sleep(0.2)
+    raise RuntimeError("Inference server did not become ready")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=100, help="requests per client")
+    parser.add_argument('--windows', default='0,5', help="comma-separated batch windows in ms")
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    address = f"127.0.0.1:{args.port}"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+
+    print(f"{args.clients} clients x {args.requests} requests")
+    for window in [float(w) for w in args.windows.split(',')]:
+        server = subprocess.Popen([sys.executable, '-m', 'utils.inference_server', '--address', address,
+                                   '--batch-window-ms', str(window)],
+                                  cwd=args.workdir, env=env, stdout=subprocess.DEVNULL)
+        try:
+            probe = RemotePredictor(address, autostart=False)
+            wait_until_ready(probe)
+            latencies, wall = run_clients(address, args.clients, args.requests)
+            metrics = probe.metrics()
+            probe.unload()
+        finally:
+            server.terminate()
+            server.wait()
+
+        latencies.sort()
+        print(f"  window {window:4.1f} ms: {len(latencies) / wall:8.1f} req/s   "
+              f"p50 {statistics.median(latencies) * 1000:6.2f} ms   "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:6.2f} ms   "
+              f"avg batch {metrics['avg_batch_size']}")
+
+if __name__ == '__main__':
+    main()
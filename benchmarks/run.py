@@ -0,0 +1,403 @@
+"""
+Benchmark suite for the database, model and dashboard hot paths.
+
+Each benchmark runs against a synthetic production database at one or more scales
+(total rows across production_logs, quality_measurements, sensor_data and
+assembly_tracking). The data is generated from a fixed seed and ends at midnight of
+the current day, so windows the app measures from now ("today", the last 7 days) hold
+the same rows on every run. The generated database is kept in --workdir as a template
+for the rest of the day, and each run works on a fresh copy, so rows added by the
+write benchmarks never carry over. Trained models are kept in --workdir as well.
+
+Usage (from the repository root):
+    python benchmarks/run.py                          # 1k and 100k rows
+    python benchmarks/run.py --scales 1k,100k,10m     # include the 10M-row scale
+    python benchmarks/run.py --save-baseline          # store results in benchmarks/baselines.json
+    python benchmarks/run.py --compare                # fail (exit 1) on regressions vs the baseline
+    python benchmarks/run.py --only dashboard_data,log_event
+
+Baselines are machine-specific; record them on the machine that runs --compare.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+import pandas as pd
+from config import Config
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines.json')
+DEFAULT_WORKDIR = os.path.join(os.environ.get('TMPDIR', '/tmp'), 'aerotwin-benchmarks')
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000, '1m': 1000000, '10m': 10000000}
+LOAD_CHUNK = 50000
+
+# Share of the total row count per table; units get 8 station jobs each
+ROWS_PER_UNIT = 200
+TABLE_SHARES = {'quality_measurements': 0.3, 'sensor_data': 0.3}
+ACTIVE_UNIT_SHARE = 0.1
+TRAINING_SAMPLES_CAP = 100000
+PLANT_LINES = 4  # lines merged by plant_dashboard (each reads the scale's database)
+
+LOG_COMPONENTS = ['main rotor hub', 'tail rotor gearbox', 'swashplate', 'hydraulic line', 'fuel pump',
+                  'landing skid', 'avionics bay', 'wiring harness', 'engine mount', 'cabin door',
+                  'tail boom', 'pitot tube', 'starter generator', 'oil cooler', 'servo actuator', 'windshield']
+LOG_FINDINGS = ['torque verified', 'seal leak', 'fastener loose', 'corrosion found', 'chafing observed',
+                'misalignment corrected', 'paint defect', 'vibration above limit', 'calibration done',
+                'part replaced', 'rework complete', 'awaiting spares']
+
+BENCHMARKS = {}
+
+def benchmark(name, number=1, repeat=5):
+    """Register fn(context) as a benchmark; number calls are timed per sample"""
+    def decorator(func):
+        BENCHMARKS[name] = {'func': func, 'number': number, 'repeat': repeat}
+        return func
+    return decorator
+
+# ============================================================================
+# SYNTHETIC DATA
+# ============================================================================
+
+def timestamps(rng, n, now, days=365):
+    """n random 'YYYY-MM-DD HH:MM:SS' strings within the last days"""
+    seconds = rng.integers(0, days * 86400, n)
+    return (pd.Timestamp(now) - pd.to_timedelta(seconds, unit='s')).strftime('%Y-%m-%d %H:%M:%S').tolist()
+
+def chunks(total):
+    for start in range(0, total, LOAD_CHUNK):
+        yield min(LOAD_CHUNK, total - start)
+
+def load_units(conn, rng, n_units, now):
+    """Helicopter units with one job per station; the newest units are still in production"""
+    n_active = max(1, int(n_units * ACTIVE_UNIT_SHARE))
+    spacing = timedelta(days=365) / n_units
+    units, jobs = [], []
+    for i in range(n_units):
+        start = now - timedelta(days=365) + i * spacing
+        active = i >= n_units - n_active
+        units.append((f"BN-{i + 1:06d}", 'H-125', f"Customer {i % 25}", start.date().isoformat(),
+                      start.date().isoformat(), (start + timedelta(days=30)).date().isoformat(),
+                      'In Production' if active else 'Completed', float(rng.normal(92, 4))))
+
+        # Active units are part way down the line with their current job open
+        n_jobs = int(rng.integers(1, len(Config.STATIONS) + 1)) if active else len(Config.STATIONS)
+        t = start
+        for j, station in enumerate(Config.STATIONS[:n_jobs]):
+            hours = float(station['cycle_time'] * rng.lognormal(0, 0.15))
+            end = t + timedelta(hours=hours)
+            is_open = active and j == n_jobs - 1
+            jobs.append((i + 1, station['id'], 1, t.strftime('%Y-%m-%d %H:%M:%S'),
+                         None if is_open else min(end, now).strftime('%Y-%m-%d %H:%M:%S'),
+                         None if is_open else hours, int(rng.poisson(0.2)), 0.0,
+                         None if is_open else 'PASS', f"Routine work at {station['name']}"))
+            t = end
+
+    conn.executemany('''
+        INSERT INTO helicopter_units (tail_number, model, customer, order_date, start_date,
+                                      target_completion, status, quality_score)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', units)
+    conn.executemany('''
+        INSERT INTO assembly_tracking (unit_id, station_id, operator_id, start_time, end_time,
+                                       cycle_time_hours, defects, rework_hours, quality_status, notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', jobs)
+    return len(jobs)
+
+def load_quality(conn, rng, total, n_units, now):
+    parameters = ['torque', 'alignment', 'clearance', 'pressure']
+    for n in chunks(total):
+        values = rng.normal(100, 6, n)
+        rows = zip(rng.integers(1, n_units + 1, n).tolist(), rng.integers(1, 9, n).tolist(),
+                   (f"CP-{k}" for k in rng.integers(1, 20, n)), timestamps(rng, n, now),
+                   (parameters[k] for k in rng.integers(0, len(parameters), n)), values.tolist(),
+                   ['PASS' if 90 <= v <= 110 else 'FAIL' for v in values])
+        conn.executemany('''
+            INSERT INTO quality_measurements (unit_id, station_id, checkpoint, measurement_time, parameter,
+                                              value, tolerance_min, tolerance_max, status)
+            VALUES (?, ?, ?, ?, ?, ?, 90, 110, ?)
+        ''', rows)
+
+def load_sensors(conn, rng, total, now):
+    sensor_types = list(Config.SENSOR_FEATURES)
+    for n in chunks(total):
+        rows = zip(rng.integers(1, 9, n).tolist(), (sensor_types[k] for k in rng.integers(0, len(sensor_types), n)),
+                   timestamps(rng, n, now), rng.normal(50, 10, n).tolist())
+        conn.executemany('''
+            INSERT INTO sensor_data (station_id, sensor_type, timestamp, value) VALUES (?, ?, ?, ?)
+        ''', rows)
+
+def load_logs(conn, rng, total, n_units, now):
+    """Events with free text drawn from a parts/findings vocabulary, so note search sees realistic term spread"""
+    event_types = ['STATION_START', 'STATION_COMPLETE', 'QUALITY_FAIL', 'MAINTENANCE', 'NEW_UNIT', 'NOTE']
+    utc_now = now.astimezone(timezone.utc).replace(tzinfo=None)  # log times are UTC, as CURRENT_TIMESTAMP
+    for n in chunks(total):
+        kinds = rng.integers(0, len(event_types), n)
+        components = rng.integers(0, len(LOG_COMPONENTS), n)
+        findings = rng.integers(0, len(LOG_FINDINGS), n)
+        frames = rng.integers(1, 400, n)
+        rows = zip(timestamps(rng, n, utc_now), (event_types[k] for k in kinds),
+                   rng.integers(1, n_units + 1, n).tolist(), rng.integers(1, 9, n).tolist(),
+                   (f"{event_types[k].replace('_', ' ').lower()}: {LOG_FINDINGS[f]} on {LOG_COMPONENTS[c]} at frame {fr}"
+                    for k, c, f, fr in zip(kinds, components, findings, frames)))
+        conn.executemany('''
+            INSERT INTO production_logs (timestamp, event_type, unit_id, station_id, user_id, description)
+            VALUES (?, ?, ?, ?, 1, ?)
+        ''', rows)
+
+def build_database(path, rows, now, seed=42):
+    """Create (unless it exists) a synthetic database with roughly rows rows in total, ending at now"""
+    from database import ProductionDatabase
+
+    if os.path.exists(path):
+        return
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    n_units = max(10, rows // ROWS_PER_UNIT)
+    building = path + '.building'
+    if os.path.exists(building):
+        os.remove(building)
+
+    build = ProductionDatabase(building)
+    build.init_database()
+    with build.connect() as conn:
+        conn.execute('PRAGMA journal_mode = OFF')
+        conn.execute('PRAGMA synchronous = OFF')
+        n_jobs = load_units(conn, rng, n_units, now)
+        load_quality(conn, rng, int(rows * TABLE_SHARES['quality_measurements']), n_units, now)
+        load_sensors(conn, rng, int(rows * TABLE_SHARES['sensor_data']), now)
+        load_logs(conn, rng, max(rows - n_jobs - int(rows * sum(TABLE_SHARES.values())), 0), n_units, now)
+        conn.commit()
+    os.replace(building, path)
+
+    print(f"  generated {path} ({rows:,} rows) in {time.perf_counter() - started:.1f}s")
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+@benchmark('dashboard_data')
+def bench_dashboard_data(ctx):
+    ctx['db'].get_production_dashboard_data()
+
+@benchmark('plant_dashboard')
+def bench_plant_dashboard(ctx):
+    ctx['plant'].get_plant_dashboard_data()
+
+@benchmark('timeline_figure')
+def bench_timeline_figure(ctx):
+    from utils.charts import build_production_timeline
+    build_production_timeline(ctx['active_units'], ctx['progress'])
+
+@benchmark('record_quality_check', number=50)
+def bench_record_quality_check(ctx):
+    value = ctx['rng'].normal(100, 6)
+    ctx['db'].record_quality_check(1, 1, 'CP-BENCH', 'torque', float(value), 90, 110)
+
+@benchmark('log_event', number=50)
+def bench_log_event(ctx):
+    ctx['db'].log_event('BENCHMARK', 'Benchmark event', unit_id=1, station_id=1, data={'source': 'benchmark'})
+
+@benchmark('note_search', number=10)
+def bench_note_search(ctx):
+    from utils.note_search import search_notes
+    search_notes(ctx['db'], '"seal leak" hydraulic')
+
+@benchmark('note_search_filtered', number=10)
+def bench_note_search_filtered(ctx):
+    from utils.note_search import search_notes
+    search_notes(ctx['db'], 'corrosion tail', unit_id=1, station_id=3)
+
+@benchmark('predict_quality', number=20)
+def bench_predict_quality(ctx):
+    ctx['predictor'].predict_quality(ctx['features'])
+
+@benchmark('model_training', repeat=1)
+def bench_model_training(ctx):
+    from utils.quality_models import QualityPredictor
+    QualityPredictor().train(n_samples=min(ctx['rows'], TRAINING_SAMPLES_CAP))
+
+def prepare(scale, rows, workdir):
+    """Per-scale context: database, dashboard inputs and a trained predictor"""
+    import contextlib
+    import io
+    from database import ProductionDatabase
+    from utils.quality_models import QualityPredictor
+
+    # Today's template, generated once; templates of earlier days are dropped
+    anchor = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    template = os.path.join(workdir, f"production_{scale}_{anchor:%Y%m%d}.db")
+    for stale in glob.glob(os.path.join(workdir, f"production_{scale}_*.db")):
+        if stale != template:
+            os.remove(stale)
+    build_database(template, rows, anchor)
+
+    # Fresh copy per run (and no journal left by the previous run's log_event samples)
+    path = os.path.join(workdir, f"production_{scale}.db")
+    shutil.copyfile(template, path)
+    shutil.rmtree(os.path.splitext(path)[0] + '_journal', ignore_errors=True)
+    database = ProductionDatabase(path)
+    lines = {f"line-{i + 1}": {'name': f"Line {i + 1}", 'database': database.db_path} for i in range(PLANT_LINES)}
+    dashboard = database.get_production_dashboard_data()
+
+    predictor = QualityPredictor()
+    if not predictor.load_models():
+        with contextlib.redirect_stdout(io.StringIO()):
+            predictor.train()
+
+    return {
+        'scale': scale,
+        'rows': rows,
+        'db': database,
+        'plant': ProductionDatabase(database.db_path, 'line-1', lines),
+        'active_units': dashboard['active_units'],
+        'progress': database.get_active_unit_progress(),
+        'predictor': predictor,
+        'features': dict(Config.FEATURE_DEFAULTS, station_id=3, shift_id=1, hour_of_day=10),
+        'rng': np.random.default_rng(0)
+    }
+
+def measure(spec, ctx, warmup=True):
+    """Per-call seconds for each repeat (after one untimed warmup sample)"""
+    import contextlib
+    import io
+
+    func, number = spec['func'], spec['number']
+    samples = []
+    # Training prints progress; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        if warmup and spec['repeat'] > 1:
+            func(ctx)
+        for _ in range(spec['repeat']):
+            start = time.perf_counter()
+            for _ in range(number):
+                func(ctx)
+            samples.append((time.perf_counter() - start) / number)
+    return samples
+
+# ============================================================================
+# BASELINES
+# ============================================================================
+
+def machine_info():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+def compare(results, baseline, threshold):
+    """Rows of (key, baseline_ms, current_ms, change, status) compared on the best (min) sample"""
+    rows, regressed = [], False
+    for key, result in results.items():
+        base = baseline.get('results', {}).get(key)
+        if base is None:
+            rows.append((key, None, result['min_ms'], None, 'new'))
+            continue
+        change = result['min_ms'] / base['min_ms'] - 1 if base['min_ms'] else 0.0
+        status = 'REGRESSION' if change > threshold else 'improved' if change < -threshold else 'ok'
+        regressed = regressed or status == 'REGRESSION'
+        rows.append((key, base['min_ms'], result['min_ms'], change, status))
+    return rows, regressed
+
+def parse_scales(text):
+    scales = {}
+    for item in text.split(','):
+        item = item.strip().lower()
+        if item in SCALES:
+            scales[item] = SCALES[item]
+        elif item.isdigit():
+            scales[item] = int(item)
+        else:
+            raise SystemExit(f"Unknown scale: {item} (use {', '.join(SCALES)} or a row count)")
+    return scales
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default='1k,100k', help="comma-separated scales (1k, 100k, 10m or row counts)")
+    parser.add_argument('--only', help="comma-separated benchmark names")
+    parser.add_argument('--workdir', default=DEFAULT_WORKDIR, help="where synthetic databases and models are kept")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="write these results as the new baseline")
+    parser.add_argument('--compare', action='store_true', help="compare against the baseline, exit 1 on regression")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    parser.add_argument('--instrumented', action='store_true', help="keep query instrumentation recording")
+    parser.add_argument('--json', action='store_true', help="print machine-readable results")
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+
+    # Models are saved relative to the working directory; keep them out of the repo
+    os.makedirs(args.workdir, exist_ok=True)
+    os.chdir(args.workdir)
+
+    from utils.instrumentation import registry
+    registry.enabled = args.instrumented
+
+    results = {}
+    for scale, rows in parse_scales(args.scales).items():
+        print(f"Scale {scale} ({rows:,} rows)")
+        ctx = prepare(scale, rows, args.workdir)
+        for name in names:
+            samples = measure(BENCHMARKS[name], ctx)
+            key = f"{scale}/{name}"
+            results[key] = {
+                'median_ms': round(statistics.median(samples) * 1000, 4),
+                'min_ms': round(min(samples) * 1000, 4),
+                'repeat': len(samples),
+                'number': BENCHMARKS[name]['number']
+            }
+            print(f"  {name:<22} median {results[key]['median_ms']:10.3f} ms   min {results[key]['min_ms']:10.3f} ms")
+
+    output = {'created_at': datetime.now().isoformat(), 'machine': machine_info(), 'results': results}
+
+    if args.json:
+        print(json.dumps(output, indent=2))
+
+    exit_code = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            raise SystemExit(f"No baseline at {args.baseline}; run with --save-baseline first")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('machine') != output['machine']:
+            print("\n⚠️ Baseline was recorded on a different machine; comparisons may be misleading")
+        rows, regressed = compare(results, baseline, args.threshold)
+        print(f"\nComparison with baseline from {baseline.get('created_at')} (threshold {args.threshold:.0%}):")
+        for key, base_ms, current_ms, change, status in rows:
+            base_text = f"{base_ms:10.3f}" if base_ms is not None else f"{'-':>10}"
+            change_text = f"{change:+7.1%}" if change is not None else f"{'-':>7}"
+            print(f"  {key:<32} {base_text} -> {current_ms:10.3f} ms  {change_text}  {status}")
+        exit_code = 1 if regressed else 0
+
+    if args.save_baseline:
+        # Merge so scales not run this time keep their previous baseline
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(created_at=output['created_at'], machine=output['machine'],
+                        results=dict(baseline.get('results', {}), **results))
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+
+    sys.exit(exit_code)
+
+if __name__ == '__main__':
+    main()
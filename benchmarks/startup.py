@@ -0,0 +1,91 @@
+"""
+Cold-start profile and time-to-first-login-render benchmark for the Streamlit app.
+
+Every measurement runs in a fresh interpreter so module caches are cold:
+  - import cost of the modules app.py may pull in (python -X importtime)
+  - time for the first script run to render the login screen (AppTest, no user)
+  - time for the first logged-in run of the Production Dashboard
+
+Usage (from the repository root):
+    python benchmarks/startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILED_MODULES = [
+    'config', 'auth', 'pandas', 'plotly.graph_objects', 'database',
+    'utils.quality_models', 'sklearn.ensemble', 'pyarrow.dataset'
+]
+
+RENDER_SCRIPT = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+user = json.loads(sys.argv[1])
+at = AppTest.from_file("app.py", default_timeout=120)
+if user:
+    at.session_state["user"] = user
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "heavy_loaded": [m for m in %r if m in sys.modules],
+                  "error": at.exception[0].value if at.exception else None}))
+''' % (PROFILED_MODULES,)
+
+ADMIN_USER = {"id": 1, "username": "admin", "full_name": "System Administrator", "role": "admin",
+              "station_id": None, "shift_id": None, "is_active": True}
+
+def import_time(module):
+    """Cumulative import time of one module in a fresh interpreter, in seconds"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    for line in reversed(result.stderr.splitlines()):
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1e6
+    return None
+
+def render_time(user=None):
+    result = subprocess.run([sys.executable, '-c', RENDER_SCRIPT, json.dumps(user)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr or result.stdout)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help="print machine-readable results")
+    args = parser.parse_args()
+
+    profile = {module: import_time(module) for module in PROFILED_MODULES}
+    login = [render_time() for _ in range(args.runs)]
+    dashboard = [render_time(ADMIN_USER) for _ in range(args.runs)]
+
+    results = {
+        'import_seconds': profile,
+        'login_render_seconds': statistics.median(r['seconds'] for r in login),
+        'login_modules_loaded': login[0]['heavy_loaded'],
+        'dashboard_render_seconds': statistics.median(r['seconds'] for r in dashboard)
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print("Import profile (fresh interpreter, cumulative):")
+    for module, seconds in sorted(profile.items(), key=lambda item: -(item[1] or 0)):
+        print(f"  {module:<24} {seconds * 1000 if seconds is not None else float('nan'):8.1f} ms")
+    print(f"\nTime to first login render:  {results['login_render_seconds'] * 1000:8.1f} ms (median of {args.runs})")
+    print(f"  modules loaded: {', '.join(results['login_modules_loaded'])}")
+    print(f"Time to first dashboard:     {results['dashboard_render_seconds'] * 1000:8.1f} ms")
+    if dashboard[0]['error']:
+        print(f"  (dashboard run raised: {dashboard[0]['error']})")
+
+if __name__ == '__main__':
+    main()
@@ -11,9 +11,112 @@ class Config:
     # Database
     DATABASE_PATH = "data/production.db"
     
+    # Production lines, one SQLite database each, so writes on one line never wait on another's
+    # lock. DEFAULT_LINE's database also holds plant-level tables (users, scheduler_jobs) and
+    # takes every write: only the dashboard and the scheduled jobs read other lines.
+    # Lines share the H-125 station sequence in STATIONS.
+    DEFAULT_LINE = "vemagal-1"
+    LINES = {
+        "vemagal-1": {
+            "name": "Vemagal Line 1",
+            "facility": FACILITY,
+            "database": DATABASE_PATH,
+            "parquet_path": "data/parquet"
+        }
+    }
+    LINE_FANOUT_WORKERS = 8  # threads querying line databases at once
+    
+    # Write-behind event logging: log_event returns after a local journal append and a
+    # background thread batches events into production_logs
+    EVENT_WRITE_BEHIND = os.getenv("EVENT_WRITE_BEHIND", "1") != "0"
+    EVENT_FLUSH_INTERVAL = 1.0  # seconds an event may wait before it is written
+    EVENT_FLUSH_BATCH = 500  # write early once this many events are queued
+    EVENT_JOURNAL_FSYNC = False  # fsync every append (survive power loss, not only process crashes)
+    EVENT_JOURNAL_MAX_BYTES = 1024 * 1024  # journal is restarted after a flush once it passes this
+    
+    # Record query/model/page timings for the admin Performance tab
+    INSTRUMENTATION_ENABLED = True
+    
+    # Columnar history (Parquet, partitioned by month/station) of the default line
+    PARQUET_PATH = LINES[DEFAULT_LINE]["parquet_path"]
+    PARQUET_EXPORT_CHUNK = 100000  # rows read from SQLite per write
+    
+    # Report exports (rows fetched from SQLite per chunk)
+    EXPORT_CHUNK_SIZE = 5000
+    
+    # Model serving: "local" loads the models in every process, "remote" shares one
+    # inference process between server workers (INFERENCE_ADDRESS: socket path or host:port)
+    PREDICTOR_BACKEND = os.getenv("PREDICTOR_BACKEND", "local")
+    INFERENCE_ADDRESS = os.getenv("INFERENCE_ADDRESS", "data/inference.sock")
+    INFERENCE_AUTOSTART = True  # first worker that needs the inference process starts it
+    INFERENCE_TIMEOUT = 30  # seconds
+    INFERENCE_BATCH_WINDOW_MS = 5  # how long the server waits to fill a micro-batch
+    INFERENCE_MAX_BATCH = 64
+    
+    # Prediction cache: inputs are rounded to these bucket widths before lookup, so
+    # readings that barely changed reuse the previous prediction (other features match exactly)
+    PREDICTION_CACHE_SIZE = 1024
+    PREDICTION_CACHE_TTL = 300  # seconds
+    PREDICTION_CACHE_BUCKETS = {
+        "temperature_c": 0.5,
+        "humidity_pct": 1.0,
+        "vibration_level": 0.05,
+        "torque_value": 1.0,
+        "pressure_value": 0.5,
+        "days_since_maintenance": 1.0,
+        "component_age_days": 1.0,
+        "cycle_time_deviation": 0.25
+    }
+    
+    # Model evaluation
+    MODEL_HOLDOUT_FRACTION = 0.2  # most recent share of rows held out from training
+    MODEL_CV_FOLDS = 5
+    MODEL_RELOAD_CHECK_SECONDS = 5  # how often loaded predictors look for a newer saved version
+    MODEL_SEARCH_SPACE = {
+        "regressor": {"n_estimators": [50, 100, 200], "max_depth": [10, 15, None], "min_samples_split": [2, 10, 20]},
+        "classifier": {"learning_rate": [0.05, 0.1, 0.2], "max_depth": [3, 5], "n_estimators": [100, 300]}
+    }
+    DRIFT_BINS = 10  # quantile bins per feature for PSI
+    DRIFT_MIN_SAMPLES = 100  # live rows needed before PSI is reported as a status
+    
+    # Background jobs (utils/jobs.py). Specs are cron "minute hour day month weekday" (or
+    # @hourly/@daily/@weekly/@monthly); None runs a job only on request. Every app worker
+    # runs a scheduler and a lease row in scheduler_jobs keeps each run to one worker.
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") != "0"
+    SCHEDULER_TICK_SECONDS = 15
+    SCHEDULER_LEASE_SECONDS = 120  # renewed every tick while a job runs
+    SCHEDULER_THREADS = 2
+    SCHEDULER_PROCESSES = 1  # for CPU-heavy jobs (model retraining, Parquet export)
+    SCHEDULES = {
+        "score_maintenance": "*/15 * * * *",
+        "refresh_kpis": "*/10 * * * *",
+        "export_parquet": "30 * * * *",
+        "backup_database": "0 2 * * *",
+        "retrain_models": "0 3 * * 0"
+    }
+    BACKUP_DIR = "data/backups"
+    BACKUP_KEEP = 7  # scheduled backups kept (oldest removed first)
+    
+    # Predictive maintenance scoring: logistic weights on each station's recent history
+    MAINTENANCE_RISK_WEIGHTS = {
+        "intercept": -4.0,
+        "maintenance_age": 3.0,  # per planned maintenance interval since the last service
+        "defect_rate": 1.5,  # per average defect per job
+        "rework_ratio": 4.0,  # rework hours as a share of the station's target cycle time
+        "sensor_alerts": 0.15,  # per alerting sensor reading
+        "vibration": 2.0,  # mean vibration above the training mean
+        "critical": 0.5
+    }
+    MAINTENANCE_LOOKBACK_DAYS = 30  # defects and rework
+    MAINTENANCE_SENSOR_HOURS = 24  # sensor alerts and vibration
+    MAINTENANCE_ALERT_PROBABILITY = 0.3  # stations at or above this get a prediction
+    
     # Security
     SESSION_TIMEOUT = timedelta(hours=8)
-    MAX_LOGIN_ATTEMPTS = 3
+    MAX_LOGIN_ATTEMPTS = 3  # failed logins within LOGIN_LOCKOUT before the account is locked
+    LOGIN_LOCKOUT = timedelta(minutes=15)
+    SCOPED_ROLES = ["operator", "supervisor"]  # see only their own station/shift (from the user record)
+    PASSWORD_HASH_ITERATIONS = int(os.getenv("PASSWORD_HASH_ITERATIONS", "600000"))  # PBKDF2-SHA256 cost
     
     # Production targets
     TARGET_MONTHLY_PRODUCTION = 4  # helicopters per month
@@ -39,6 +142,19 @@ class Config:
         {"id": 8, "name": "Quality Testing", "critical": True, "cycle_time": 72}
     ]
     
+    # Line simulation defaults (digital twin what-if model)
+    SIMULATION = {
+        "cycle_time_cv": 0.15,  # spread of stochastic cycle times
+        "rework_probability": 0.08,
+        "rework_fraction": 0.25,  # rework time as a fraction of cycle time
+        "mtbf_hours": 600,  # mean working hours between station breakdowns
+        "repair_hours": 8,
+        "planned_maintenance_days": 30,
+        "planned_maintenance_hours": 16,
+        "max_wip": 8  # units allowed on the line at once
+    }
+    SCENARIO_OUTPUT_DIR = "data/scenarios"
+    
     # Quality checkpoints
     QUALITY_CHECKPOINTS = [
         "Visual Inspection",
@@ -49,3 +165,30 @@ class Config:
         "Functional Test",
         "Flight Readiness Review"
     ]
+    
+    # Sensor feature store (maps sensor_data.sensor_type to model feature)
+    SENSOR_FEATURES = {
+        "temperature": "temperature_c",
+        "humidity": "humidity_pct",
+        "vibration": "vibration_level",
+        "torque": "torque_value",
+        "pressure": "pressure_value"
+    }
+    FEATURE_WINDOWS = {"5min": 300, "1h": 3600}  # seconds
+    FEATURE_BUFFER_SIZE = 3600  # max readings kept per sensor per window
+    FEATURE_REFRESH_SECONDS = 5
+    
+    # Fallback model inputs when no live data is available (training means)
+    FEATURE_DEFAULTS = {
+        "operator_experience_months": 60,
+        "operator_certification_level": 3,
+        "temperature_c": 23.0,
+        "humidity_pct": 45.0,
+        "vibration_level": 0.5,
+        "days_since_maintenance": 20.0,
+        "component_age_days": 100.0,
+        "previous_defects": 0,
+        "cycle_time_deviation": 0.0,
+        "torque_value": 100.0,
+        "pressure_value": 50.0
+    }
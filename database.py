@@ -1,201 +1,158 @@
 import sqlite3
 import os
+import threading
 import pandas as pd
-import numpy as np
 from datetime import datetime, timedelta
 import json
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from config import Config
+from migrations import migrate
+from utils.instrumentation import InstrumentedConnection
+from utils.resources import resources
+from utils.shift_calendar import shift_calendar
+
+# Database files whose schema has been initialised by this process
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+# Line databases opened by this process (by absolute path) and the pool that queries them in parallel
+_line_databases = {}
+_lines_lock = threading.Lock()
+_fan_out_pool = None
+
+class DataScope:
+    """The slice of plant data a user works in: one station and/or shift (None means all)"""
+    
+    def __init__(self, station_id=None, shift_id=None):
+        self.station_id = station_id
+        self.shift_id = shift_id
+    
+    @classmethod
+    def for_user(cls, user):
+        """Station/shift from the user record for Config.SCOPED_ROLES, plant-wide otherwise"""
+        if not user or user.get('role') not in Config.SCOPED_ROLES:
+            return cls()
+        return cls(user.get('station_id'), user.get('shift_id'))
+    
+    @property
+    def plant_wide(self):
+        return self.station_id is None and self.shift_id is None
+    
+    def includes_station(self, station_id):
+        return self.station_id is None or self.station_id == station_id
+    
+    def sql(self, station_column=None, time_column=None):
+        """(' AND ...', params) restricting a query's station and/or event-time column to this scope"""
+        clauses, params = [], []
+        if self.station_id is not None and station_column:
+            clauses.append(f"{station_column} = ?")
+            params.append(self.station_id)
+        if self.shift_id is not None and time_column:
+            clauses.append(f"{shift_calendar.sql(time_column)} = ?")
+            params.append(self.shift_id)
+        return ''.join(f" AND {clause}" for clause in clauses), params
+    
+    def describe(self):
+        parts = []
+        if self.station_id is not None:
+            parts.append(next((s['name'] for s in Config.STATIONS if s['id'] == self.station_id),
+                              f"Station {self.station_id}"))
+        if self.shift_id is not None:
+            parts.append(f"{shift_calendar.name(self.shift_id)} shift")
+        return ' · '.join(parts) or "Plant-wide"
+
+PLANT_WIDE = DataScope()
 
 class ProductionDatabase:
-    def __init__(self, db_path=Config.DATABASE_PATH):
+    def __init__(self, db_path=Config.DATABASE_PATH, line_id=Config.DEFAULT_LINE, lines=None):
         self.db_path = db_path
+        self.line_id = line_id
+        self.lines_config = Config.LINES if lines is None else lines
         # Ensure directory exists
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        self.init_database()
+        self._event_logger = None
+    
+    @property
+    def line_ids(self):
+        return list(self.lines_config)
+    
+    def line(self, line_id):
+        """Database of a production line (this instance for its own line); KeyError for unknown lines"""
+        if line_id == self.line_id:
+            return self
+        path = self.lines_config[line_id]['database']
+        with _lines_lock:
+            database = _line_databases.get(os.path.abspath(path))
+            if database is None:
+                database = ProductionDatabase(path, line_id, self.lines_config)
+                _line_databases[os.path.abspath(path)] = database
+            return database
+    
+    def fan_out(self, query, line_ids=None):
+        """
+        Run query(line_database) for each line (all by default) in parallel and return
+        {line_id: result} in line order. SQLite releases the GIL while a statement runs,
+        so lines are read concurrently; an error on any line is raised here.
+        """
+        global _fan_out_pool
+        line_ids = self.line_ids if line_ids is None else list(line_ids)
+        if len(line_ids) <= 1:
+            return {line_id: query(self.line(line_id)) for line_id in line_ids}
+        with _lines_lock:
+            if _fan_out_pool is None:
+                _fan_out_pool = ThreadPoolExecutor(Config.LINE_FANOUT_WORKERS, thread_name_prefix='line')
+        futures = {line_id: _fan_out_pool.submit(query, self.line(line_id)) for line_id in line_ids}
+        return {line_id: future.result() for line_id, future in futures.items()}
+    
+    def ensure_initialized(self):
+        """Run schema initialisation once per process, on first use rather than at import"""
+        path = os.path.abspath(self.db_path)
+        if path in _initialized_paths:
+            return
+        with _init_lock:
+            if path not in _initialized_paths:
+                self.init_database()
+                _initialized_paths.add(path)
     
     @contextmanager
-    def get_connection(self):
-        conn = sqlite3.connect(self.db_path, timeout=30)
+    def connect(self):
+        factory = InstrumentedConnection if Config.INSTRUMENTATION_ENABLED else sqlite3.Connection
+        conn = sqlite3.connect(self.db_path, timeout=30, factory=factory)
         conn.row_factory = sqlite3.Row
         try:
             yield conn
         finally:
             conn.close()
     
-    def init_database(self):
-        """Initialize all tables"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Users table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL,
-                    full_name TEXT NOT NULL,
-                    email TEXT UNIQUE,
-                    role TEXT NOT NULL,
-                    station_id INTEGER,
-                    shift_id INTEGER,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_login TIMESTAMP,
-                    is_active BOOLEAN DEFAULT 1
-                )
-            ''')
-            
-            # Helicopter units table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS helicopter_units (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    tail_number TEXT UNIQUE,
-                    model TEXT DEFAULT 'H-125',
-                    customer TEXT,
-                    order_date DATE,
-                    start_date DATE,
-                    target_completion DATE,
-                    actual_completion DATE,
-                    status TEXT DEFAULT 'In Production',
-                    quality_score FLOAT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Assembly tracking table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS assembly_tracking (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    unit_id INTEGER,
-                    station_id INTEGER,
-                    operator_id INTEGER,
-                    start_time TIMESTAMP,
-                    end_time TIMESTAMP,
-                    cycle_time_hours FLOAT,
-                    defects INTEGER DEFAULT 0,
-                    rework_hours FLOAT DEFAULT 0,
-                    quality_checkpoint TEXT,
-                    quality_status TEXT,
-                    notes TEXT,
-                    FOREIGN KEY (unit_id) REFERENCES helicopter_units (id),
-                    FOREIGN KEY (station_id) REFERENCES stations (id),
-                    FOREIGN KEY (operator_id) REFERENCES users (id)
-                )
-            ''')
-            
-            # Stations table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS stations (
-                    id INTEGER PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    critical BOOLEAN,
-                    target_cycle_time FLOAT,
-                    current_status TEXT DEFAULT 'Operational',
-                    last_maintenance DATE,
-                    next_maintenance DATE
-                )
-            ''')
-            
-            # Quality measurements table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS quality_measurements (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    unit_id INTEGER,
-                    station_id INTEGER,
-                    checkpoint TEXT,
-                    measurement_time TIMESTAMP,
-                    parameter TEXT,
-                    value FLOAT,
-                    tolerance_min FLOAT,
-                    tolerance_max FLOAT,
-                    status TEXT,
-                    operator_id INTEGER,
-                    FOREIGN KEY (unit_id) REFERENCES helicopter_units (id)
-                )
-            ''')
-            
-            # Predictive maintenance table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS maintenance_predictions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    station_id INTEGER,
-                    predicted_failure_date DATE,
-                    failure_probability FLOAT,
-                    recommended_action TEXT,
-                    estimated_downtime_hours FLOAT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    acknowledged BOOLEAN DEFAULT 0
-                )
-            ''')
-            
-            # Sensor data table (for IoT integration)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS sensor_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    station_id INTEGER,
-                    sensor_type TEXT,
-                    timestamp TIMESTAMP,
-                    value FLOAT,
-                    unit TEXT,
-                    alert_level INTEGER DEFAULT 0
-                )
-            ''')
-            
-            # Production logs
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS production_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    event_type TEXT,
-                    unit_id INTEGER,
-                    station_id INTEGER,
-                    user_id INTEGER,
-                    description TEXT,
-                    data TEXT
-                )
-            ''')
-            
-            conn.commit()
-            
-            # Initialize stations if empty
-            self.init_stations(conn)
-            
-            # Create default admin if no users exist
-            self.create_default_admin(conn)
+    @contextmanager
+    def get_connection(self):
+        self.ensure_initialized()
+        with self.connect() as conn:
+            yield conn
     
-    def init_stations(self, conn):
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM stations")
-        if cursor.fetchone()[0] == 0:
-            for station in Config.STATIONS:
-                cursor.execute('''
-                    INSERT INTO stations (id, name, critical, target_cycle_time, current_status, last_maintenance, next_maintenance)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    station["id"], 
-                    station["name"], 
-                    station["critical"],
-                    station["cycle_time"],
-                    "Operational",
-                    datetime.now().date(),
-                    (datetime.now() + timedelta(days=30)).date()
-                ))
-            conn.commit()
+    def init_database(self):
+        """Bring the schema up to date (no-op when PRAGMA user_version is current)"""
+        with self.connect() as conn:
+            applied = migrate(conn)
+            if applied:
+                print(f"✅ Applied database migrations: {applied}")
     
-    def create_default_admin(self, conn):
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM users")
-        if cursor.fetchone()[0] == 0:
-            # Simple password - just for demo
-           simple_password = "admin123"  # Plain text for demo
-           cursor.execute('''
-               INSERT INTO users (username, password_hash, full_name, role, is_active)
-               VALUES (?, ?, ?, ?, ?)
-        ''', ('admin', simple_password, 'System Administrator', 'admin', 1))
-        conn.commit()
-        print("✅ Default admin created")
+    @property
+    def event_logger(self):
+        """Write-behind logger for this database, started (and old journals replayed) on first use"""
+        if self._event_logger is None:
+            with _init_lock:
+                if self._event_logger is None:
+                    from utils.event_journal import WriteBehindLogger
+                    self._event_logger = WriteBehindLogger(self)
+        return self._event_logger
     
     def log_event(self, event_type, description, unit_id=None, station_id=None, user_id=None, data=None):
+        """Record a production event; with Config.EVENT_WRITE_BEHIND it reaches the table within a flush interval"""
+        if Config.EVENT_WRITE_BEHIND:
+            self.event_logger.log(event_type, description, unit_id, station_id, user_id, data)
+            return
         with self.get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
@@ -204,48 +161,70 @@ class ProductionDatabase:
             ''', (event_type, description, unit_id, station_id, user_id, json.dumps(data) if data else None))
             conn.commit()
     
-    def get_production_dashboard_data(self):
-        """Get all data needed for main dashboard"""
+    def flush_events(self):
+        """Write queued events now, for readers that need to see them immediately"""
+        if self._event_logger is not None:
+            self._event_logger.flush()
+    
+    def backup(self, target_path, pages=1024):
+        """Consistent copy via SQLite's online backup; writers are only held up between steps of pages"""
+        with self.get_connection() as conn:
+            target = sqlite3.connect(target_path)
+            try:
+                conn.backup(target, pages=pages)
+            finally:
+                target.close()
+    
+    def get_production_dashboard_data(self, scope=PLANT_WIDE):
+        """Get all data needed for main dashboard, limited to the scope's station and shift"""
         with self.get_connection() as conn:
-            # Active units
-            active_units = pd.read_sql_query('''
+            # Active units (for a station scope: units with an open job at that station)
+            unit_filter, unit_params = '', []
+            if scope.station_id is not None:
+                unit_filter = "AND id IN (SELECT unit_id FROM assembly_tracking WHERE station_id = ? AND end_time IS NULL)"
+                unit_params = [scope.station_id]
+            active_units = pd.read_sql_query(f'''
                 SELECT * FROM helicopter_units 
-                WHERE status = 'In Production' 
+                WHERE status = 'In Production' {unit_filter}
                 ORDER BY start_date
-            ''', conn)
+            ''', conn, params=unit_params)
             
             # Today's production
             today = datetime.now().date()
-            today_production = pd.read_sql_query('''
+            job_filter, job_params = scope.sql('at.station_id', 'at.start_time')
+            today_production = pd.read_sql_query(f'''
                 SELECT at.*, hu.tail_number, s.name as station_name, u.full_name as operator_name
                 FROM assembly_tracking at
                 JOIN helicopter_units hu ON at.unit_id = hu.id
                 JOIN stations s ON at.station_id = s.id
                 LEFT JOIN users u ON at.operator_id = u.id
-                WHERE DATE(at.start_time) = ?
+                WHERE at.start_time >= ? AND at.start_time < ? {job_filter}
                 ORDER BY at.start_time DESC
-            ''', conn, params=[today.isoformat()])
+            ''', conn, params=[today.isoformat(), (today + timedelta(days=1)).isoformat()] + job_params)
             
             # Quality metrics
-            quality_stats = pd.read_sql_query('''
+            quality_filter, quality_params = scope.sql('station_id', 'measurement_time')
+            quality_stats = pd.read_sql_query(f'''
                 SELECT 
                     AVG(CASE WHEN status = 'PASS' THEN 1 ELSE 0 END) * 100 as pass_rate,
                     COUNT(*) as total_checks,
                     COUNT(DISTINCT unit_id) as units_tested
                 FROM quality_measurements
-                WHERE DATE(measurement_time) >= DATE('now', '-7 days')
-            ''', conn)
+                WHERE measurement_time >= DATE('now', '-7 days') {quality_filter}
+            ''', conn, params=quality_params)
             
             # Station status
-            station_status = pd.read_sql_query('''
+            station_filter, station_params = scope.sql('s.id')
+            station_status = pd.read_sql_query(f'''
                 SELECT s.*, 
                        COUNT(at.id) as active_jobs,
                        AVG(at.cycle_time_hours) as avg_cycle_time
                 FROM stations s
                 LEFT JOIN assembly_tracking at ON s.id = at.station_id 
                     AND at.end_time IS NULL
+                WHERE 1 = 1 {station_filter}
                 GROUP BY s.id
-            ''', conn)
+            ''', conn, params=station_params)
             
             return {
                 'active_units': active_units,
@@ -254,6 +233,137 @@ class ProductionDatabase:
                 'station_status': station_status
             }
     
+    def get_plant_dashboard_data(self, scope=PLANT_WIDE, line_ids=None):
+        """
+        Dashboard data (plus active_unit_progress) of several lines, all by default, queried in
+        parallel and merged. Unit ids become 'line:id' and timeline stations are prefixed with
+        the line name so rows from different lines stay apart; station status is combined per
+        station, with avg_cycle_time weighted by each line's open jobs.
+        """
+        results = self.fan_out(lambda line: dict(line.get_production_dashboard_data(scope),
+                                                 active_unit_progress=line.get_active_unit_progress(scope)),
+                               line_ids)
+        if len(results) == 1:
+            return next(iter(results.values()))
+        
+        def merged(key, unit_column=None):
+            frames = [data[key] for data in results.values()]
+            frame = pd.concat(frames, ignore_index=True)
+            frame['line_id'] = pd.Index(list(results)).repeat([len(part) for part in frames])
+            if unit_column:
+                frame[unit_column] = frame['line_id'].astype(str) + ':' + frame[unit_column].astype(str)
+            return frame
+        
+        progress = merged('active_unit_progress', 'unit_id')
+        line_names = {line_id: self.lines_config[line_id]['name'] for line_id in results}
+        progress['station'] = progress['line_id'].map(line_names).astype(str) + ' · ' + progress['station'].astype(str)
+        
+        # The summaries are a few rows per line: combine them as records rather than frames
+        quality = [row for data in results.values() for row in data['quality_stats'].to_dict('records')]
+        checks = sum(row['total_checks'] for row in quality)
+        passes = sum(row['pass_rate'] * row['total_checks'] for row in quality if row['total_checks'])
+        quality_stats = pd.DataFrame([{
+            'pass_rate': passes / checks if checks else None,
+            'total_checks': checks,
+            'units_tested': sum(row['units_tested'] for row in quality)
+        }])
+        
+        # Lines share the station layout; avg_cycle_time is weighted by each line's open jobs
+        stations = {}
+        for data in results.values():
+            for row in data['station_status'].to_dict('records'):
+                station = stations.setdefault(row['id'], dict(row, active_jobs=0, cycle_time_total=0.0, timed_jobs=0))
+                station['active_jobs'] += row['active_jobs']
+                if row['avg_cycle_time'] is not None and not pd.isna(row['avg_cycle_time']):
+                    station['cycle_time_total'] += row['avg_cycle_time'] * row['active_jobs']
+                    station['timed_jobs'] += row['active_jobs']
+        for station in stations.values():
+            timed_jobs = station.pop('timed_jobs')
+            cycle_time_total = station.pop('cycle_time_total')
+            station['avg_cycle_time'] = cycle_time_total / timed_jobs if timed_jobs else None
+        
+        return {
+            'active_units': merged('active_units', 'id'),
+            'today_production': merged('today_production', 'unit_id').sort_values('start_time', ascending=False),
+            'quality_stats': quality_stats,
+            'station_status': pd.DataFrame(list(stations.values())),
+            'active_unit_progress': progress
+        }
+    
+    def get_active_unit_progress(self, scope=PLANT_WIDE):
+        """Station jobs of every unit in production, for the dashboard timeline"""
+        job_filter, params = scope.sql('at.station_id')
+        with self.get_connection() as conn:
+            return pd.read_sql_query(f'''
+                SELECT at.unit_id,
+                       s.name as station,
+                       at.start_time,
+                       at.end_time,
+                       s.target_cycle_time
+                FROM assembly_tracking at
+                JOIN stations s ON at.station_id = s.id
+                JOIN helicopter_units hu ON at.unit_id = hu.id
+                WHERE hu.status = 'In Production' {job_filter}
+                ORDER BY at.start_time
+            ''', conn, params=params)
+    
+    def get_quality_trend(self, days=30, scope=PLANT_WIDE):
+        """Daily quality pass rate over the last days"""
+        quality_filter, params = scope.sql('station_id', 'measurement_time')
+        with self.get_connection() as conn:
+            return pd.read_sql_query(f'''
+                SELECT DATE(measurement_time) as date,
+                       AVG(CASE WHEN status = 'PASS' THEN 1 ELSE 0 END) * 100 as pass_rate,
+                       COUNT(*) as checks
+                FROM quality_measurements
+                WHERE measurement_time >= DATE('now', ?) {quality_filter}
+                GROUP BY DATE(measurement_time)
+                ORDER BY date
+            ''', conn, params=[f'-{int(days)} days'] + params)
+    
+    def get_unit_history(self, tail_number):
+        """Everything recorded against a unit (jobs, quality checks, logs), oldest first"""
+        self.flush_events()
+        with self.get_connection() as conn:
+            return pd.read_sql_query('''
+                SELECT tl.event_time, tl.event_type, tl.station_id, s.name as station,
+                       tl.operator_id, u.full_name as operator, tl.summary, tl.source, tl.source_id
+                FROM helicopter_units hu
+                JOIN unit_timeline tl ON tl.unit_id = hu.id
+                LEFT JOIN stations s ON s.id = tl.station_id
+                LEFT JOIN users u ON u.id = tl.operator_id
+                WHERE hu.tail_number = ?
+                ORDER BY tl.event_time, tl.source, tl.source_id
+            ''', conn, params=[tail_number])
+    
+    def get_units_touched(self, start, end, station_id=None, operator_id=None):
+        """Units with any timeline event at a station and/or by an operator in [start, end)"""
+        if station_id is None and operator_id is None:
+            raise ValueError("Give a station_id or an operator_id")
+        
+        # Range scan on the station or operator index; the other filter is checked per entry
+        column, value = ('station_id', station_id) if station_id is not None else ('operator_id', operator_id)
+        where = f"tl.{column} = ? AND tl.event_time >= ? AND tl.event_time < ?"
+        params = [value, start, end]
+        if station_id is not None and operator_id is not None:
+            where += " AND tl.operator_id = ?"
+            params.append(operator_id)
+        
+        self.flush_events()
+        with self.get_connection() as conn:
+            return pd.read_sql_query(f'''
+                SELECT hu.tail_number, hu.status, t.*
+                FROM (
+                    SELECT tl.unit_id, COUNT(*) as events,
+                           MIN(tl.event_time) as first_event, MAX(tl.event_time) as last_event
+                    FROM unit_timeline tl
+                    WHERE {where}
+                    GROUP BY tl.unit_id
+                ) t
+                JOIN helicopter_units hu ON hu.id = t.unit_id
+                ORDER BY t.last_event DESC
+            ''', conn, params=params)
+    
     def add_helicopter_unit(self, tail_number, customer=None):
         """Add new helicopter to production"""
         with self.get_connection() as conn:
@@ -305,5 +415,59 @@ class ProductionDatabase:
             ''', conn)
             return alerts
 
-# Initialize global database instance
-db = ProductionDatabase()
+    def record_sensor_reading(self, station_id, sensor_type, value, unit=None, timestamp=None, alert_level=0):
+        """Store a single IoT sensor reading"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                INSERT INTO sensor_data (station_id, sensor_type, timestamp, value, unit, alert_level)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (station_id, sensor_type, timestamp or datetime.now(), value, unit, alert_level))
+            conn.commit()
+            return cursor.lastrowid
+    
+    def get_sensor_data_since(self, last_id=0, limit=50000):
+        """Get sensor readings with id greater than last_id, oldest first"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, station_id, sensor_type, timestamp, value
+                FROM sensor_data
+                WHERE id > ?
+                ORDER BY id
+                LIMIT ?
+            ''', (last_id, limit))
+            return cursor.fetchall()
+    
+    def get_sensor_id_before(self, since):
+        """Id to read sensor_data after so the first reading returned is the first at or after since"""
+        with self.get_connection() as conn:
+            first_id = conn.execute("SELECT MIN(id) FROM sensor_data WHERE timestamp >= ?", (since,)).fetchone()[0]
+            if first_id is not None:
+                return first_id - 1
+            return conn.execute("SELECT COALESCE(MAX(id), 0) FROM sensor_data").fetchone()[0]
+    
+    def get_station_context(self):
+        """Get slowly changing per-station model inputs (maintenance, defects, cycle deviation)"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT s.id as station_id,
+                       julianday('now') - julianday(s.last_maintenance) as days_since_maintenance,
+                       (SELECT AVG(at.defects) FROM assembly_tracking at
+                         WHERE at.station_id = s.id
+                         AND at.start_time >= DATE('now', '-30 days')) as previous_defects,
+                       (SELECT AVG(at.cycle_time_hours - s.target_cycle_time) FROM assembly_tracking at
+                         WHERE at.station_id = s.id
+                         AND at.start_time >= DATE('now', '-30 days')) as cycle_time_deviation,
+                       (SELECT julianday('now') - julianday(MIN(hu.start_date))
+                         FROM assembly_tracking at
+                         JOIN helicopter_units hu ON at.unit_id = hu.id
+                         WHERE at.station_id = s.id AND at.end_time IS NULL) as component_age_days
+                FROM stations s
+            ''')
+            return {row['station_id']: dict(row) for row in cursor.fetchall()}
+
+# Initialize global database instance (one per process; connections are opened per call).
+# Not leased by sessions: the scheduler and line fan-out use it for the life of the process.
+db = resources.register('database', ProductionDatabase).get()
@@ -0,0 +1,603 @@
+"""
+Versioned schema migrations for the production database.
+
+Each step runs once per database file, in order. The applied version is kept in
+PRAGMA user_version (read on startup as a single header lookup, so an up-to-date
+database costs no schema work) and every applied step is recorded in schema_version.
+To change the schema, append a new step; never edit one that has shipped.
+"""
+from datetime import datetime, timedelta
+from config import Config
+from utils.passwords import hash_password, is_hashed
+from utils.shift_calendar import shift_calendar
+
+def core_schema(cursor):
+    """Tables of the original production schema"""
+    # Users table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            full_name TEXT NOT NULL,
+            email TEXT UNIQUE,
+            role TEXT NOT NULL,
+            station_id INTEGER,
+            shift_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            is_active BOOLEAN DEFAULT 1
+        )
+    ''')
+
+    # Helicopter units table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS helicopter_units (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            tail_number TEXT UNIQUE,
+            model TEXT DEFAULT 'H-125',
+            customer TEXT,
+            order_date DATE,
+            start_date DATE,
+            target_completion DATE,
+            actual_completion DATE,
+            status TEXT DEFAULT 'In Production',
+            quality_score FLOAT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # Assembly tracking table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS assembly_tracking (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            unit_id INTEGER,
+            station_id INTEGER,
+            operator_id INTEGER,
+            start_time TIMESTAMP,
+            end_time TIMESTAMP,
+            cycle_time_hours FLOAT,
+            defects INTEGER DEFAULT 0,
+            rework_hours FLOAT DEFAULT 0,
+            quality_checkpoint TEXT,
+            quality_status TEXT,
+            notes TEXT,
+            FOREIGN KEY (unit_id) REFERENCES helicopter_units (id),
+            FOREIGN KEY (station_id) REFERENCES stations (id),
+            FOREIGN KEY (operator_id) REFERENCES users (id)
+        )
+    ''')
+
+    # Stations table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS stations (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            critical BOOLEAN,
+            target_cycle_time FLOAT,
+            current_status TEXT DEFAULT 'Operational',
+            last_maintenance DATE,
+            next_maintenance DATE
+        )
+    ''')
+
+    # Quality measurements table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quality_measurements (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            unit_id INTEGER,
+            station_id INTEGER,
+            checkpoint TEXT,
+            measurement_time TIMESTAMP,
+            parameter TEXT,
+            value FLOAT,
+            tolerance_min FLOAT,
+            tolerance_max FLOAT,
+            status TEXT,
+            operator_id INTEGER,
+            FOREIGN KEY (unit_id) REFERENCES helicopter_units (id)
+        )
+    ''')
+
+    # Predictive maintenance table
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            station_id INTEGER,
+            predicted_failure_date DATE,
+            failure_probability FLOAT,
+            recommended_action TEXT,
+            estimated_downtime_hours FLOAT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            acknowledged BOOLEAN DEFAULT 0
+        )
+    ''')
+
+    # Sensor data table (for IoT integration)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sensor_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            station_id INTEGER,
+            sensor_type TEXT,
+            timestamp TIMESTAMP,
+            value FLOAT,
+            unit TEXT,
+            alert_level INTEGER DEFAULT 0
+        )
+    ''')
+
+    # Production logs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS production_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            event_type TEXT,
+            unit_id INTEGER,
+            station_id INTEGER,
+            user_id INTEGER,
+            description TEXT,
+            data TEXT
+        )
+    ''')
+
+def seed_defaults(cursor):
+    """Stations from Config.STATIONS and the default admin account, if missing"""
+    cursor.execute("SELECT COUNT(*) FROM stations")
+    if cursor.fetchone()[0] == 0:
+        for station in Config.STATIONS:
+            cursor.execute('''
+                INSERT INTO stations (id, name, critical, target_cycle_time, current_status, last_maintenance, next_maintenance)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                station["id"], 
+                station["name"], 
+                station["critical"],
+                station["cycle_time"],
+                "Operational",
+                datetime.now().date(),
+                (datetime.now() + timedelta(days=30)).date()
+            ))
+    
+    cursor.execute("SELECT COUNT(*) FROM users")
+    if cursor.fetchone()[0] == 0:
+        # Simple password - just for demo
+        cursor.execute('''
+            INSERT INTO users (username, password_hash, full_name, role, is_active)
+            VALUES (?, ?, ?, ?, ?)
+        ''', ('admin', 'admin123', 'System Administrator', 'admin', 1))
+
+def grid_indexes(cursor):
+    """Indexes backing keyset pagination and filtered grids"""
+    for index_sql in [
+        "CREATE INDEX IF NOT EXISTS idx_logs_timestamp ON production_logs (timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_logs_event_type ON production_logs (event_type, timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_logs_unit ON production_logs (unit_id, timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_logs_station ON production_logs (station_id, timestamp, id)",
+        "CREATE INDEX IF NOT EXISTS idx_quality_unit ON quality_measurements (unit_id, measurement_time, id)",
+        "CREATE INDEX IF NOT EXISTS idx_quality_station ON quality_measurements (station_id, measurement_time, id)",
+        "CREATE INDEX IF NOT EXISTS idx_assembly_start ON assembly_tracking (start_time)"
+    ]:
+        cursor.execute(index_sql)
+
+def report_cube(cursor):
+    """Report cube tables and the triggers that queue changed days"""
+    # Precomputed report cube (day x station x shift x unit) and its dirty-day queue
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_cube (
+            day DATE NOT NULL,
+            station_id INTEGER NOT NULL,
+            shift_id INTEGER NOT NULL,
+            unit_id INTEGER NOT NULL,
+            operations INTEGER DEFAULT 0,
+            completed INTEGER DEFAULT 0,
+            cycle_time_sum FLOAT DEFAULT 0,
+            cycle_time_count INTEGER DEFAULT 0,
+            defects INTEGER DEFAULT 0,
+            rework_hours FLOAT DEFAULT 0,
+            checks INTEGER DEFAULT 0,
+            passes INTEGER DEFAULT 0,
+            PRIMARY KEY (day, station_id, shift_id, unit_id)
+        ) WITHOUT ROWID
+    ''')
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS report_cube_dirty (
+            day DATE PRIMARY KEY
+        ) WITHOUT ROWID
+    ''')
+    
+    # Mark days touched by writes so only those cube slices are rebuilt
+    for table, time_expr in [
+        ('assembly_tracking', 'COALESCE({row}.end_time, {row}.start_time)'),
+        ('quality_measurements', '{row}.measurement_time')
+    ]:
+        new_day = f"DATE({time_expr.format(row='NEW')})"
+        old_day = f"DATE({time_expr.format(row='OLD')})"
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_cube_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {new_day} WHERE {new_day} IS NOT NULL;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_cube_update AFTER UPDATE ON {table}
+            BEGIN
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {old_day} WHERE {old_day} IS NOT NULL;
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {new_day} WHERE {new_day} IS NOT NULL;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_cube_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {old_day} WHERE {old_day} IS NOT NULL;
+            END
+        ''')
+
+def line_day_stats(cursor):
+    """Cached per-day line flow statistics, invalidated by assembly_tracking writes"""
+    # Per closed day line-flow statistics (station_id 0 holds line-level WIP)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS line_day_stats (
+            day DATE NOT NULL,
+            station_id INTEGER NOT NULL,
+            busy_hours FLOAT DEFAULT 0,
+            job_hours FLOAT DEFAULT 0,
+            jobs_started INTEGER DEFAULT 0,
+            queue_hours FLOAT DEFAULT 0,
+            queue_count INTEGER DEFAULT 0,
+            PRIMARY KEY (day, station_id)
+        ) WITHOUT ROWID
+    ''')
+    
+    # Any change to a job invalidates cached days from its start onwards
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS assembly_tracking_flow_insert AFTER INSERT ON assembly_tracking
+        BEGIN
+            DELETE FROM line_day_stats WHERE day >= DATE(NEW.start_time);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS assembly_tracking_flow_update AFTER UPDATE ON assembly_tracking
+        BEGIN
+            DELETE FROM line_day_stats WHERE day >= MIN(DATE(OLD.start_time), DATE(NEW.start_time));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS assembly_tracking_flow_delete AFTER DELETE ON assembly_tracking
+        BEGIN
+            DELETE FROM line_day_stats WHERE day >= DATE(OLD.start_time);
+        END
+    ''')
+
+def event_journal(cursor):
+    """Last journal sequence number written to production_logs, per write-behind journal"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS event_journal_checkpoint (
+            journal TEXT PRIMARY KEY,
+            last_seq INTEGER NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        ) WITHOUT ROWID
+    ''')
+
+def note_search(cursor):
+    """FTS5 indexes over log text and assembly job notes, kept in sync by triggers"""
+    # External-content tables: the text stays in the source tables, FTS holds only the index
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS production_logs_fts USING fts5(
+            description, data,
+            content='production_logs', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS assembly_notes_fts USING fts5(
+            notes,
+            content='assembly_tracking', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+    ''')
+    
+    # FTS5 removes an entry by re-supplying the values it was indexed with
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS production_logs_fts_insert AFTER INSERT ON production_logs
+        BEGIN
+            INSERT INTO production_logs_fts (rowid, description, data) VALUES (NEW.id, NEW.description, NEW.data);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS production_logs_fts_update AFTER UPDATE OF description, data ON production_logs
+        BEGIN
+            INSERT INTO production_logs_fts (production_logs_fts, rowid, description, data)
+            VALUES ('delete', OLD.id, OLD.description, OLD.data);
+            INSERT INTO production_logs_fts (rowid, description, data) VALUES (NEW.id, NEW.description, NEW.data);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS production_logs_fts_delete AFTER DELETE ON production_logs
+        BEGIN
+            INSERT INTO production_logs_fts (production_logs_fts, rowid, description, data)
+            VALUES ('delete', OLD.id, OLD.description, OLD.data);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS assembly_notes_fts_insert AFTER INSERT ON assembly_tracking
+        BEGIN
+            INSERT INTO assembly_notes_fts (rowid, notes) VALUES (NEW.id, NEW.notes);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS assembly_notes_fts_update AFTER UPDATE OF notes ON assembly_tracking
+        BEGIN
+            INSERT INTO assembly_notes_fts (assembly_notes_fts, rowid, notes) VALUES ('delete', OLD.id, OLD.notes);
+            INSERT INTO assembly_notes_fts (rowid, notes) VALUES (NEW.id, NEW.notes);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS assembly_notes_fts_delete AFTER DELETE ON assembly_tracking
+        BEGIN
+            INSERT INTO assembly_notes_fts (assembly_notes_fts, rowid, notes) VALUES ('delete', OLD.id, OLD.notes);
+        END
+    ''')
+    
+    # Index rows written before this migration
+    cursor.execute("INSERT INTO production_logs_fts (production_logs_fts) VALUES ('rebuild')")
+    cursor.execute("INSERT INTO assembly_notes_fts (assembly_notes_fts) VALUES ('rebuild')")
+
+# Per-source projections into unit_timeline: (table, source, station, operator, time, event type, summary)
+# Event times are local; columns defaulting to CURRENT_TIMESTAMP (production_logs.timestamp, which
+# the write-behind logger also writes in UTC, and created_at) are converted so a history sorts in order
+TIMELINE_SOURCES = [
+    ('helicopter_units', 'unit_start', 'NULL', 'NULL', "COALESCE(R.start_date, datetime(R.created_at, 'localtime'))", "'UNIT_START'",
+     "'Unit ' || R.tail_number || ' started' || COALESCE(' for ' || R.customer, '')"),
+    ('helicopter_units', 'unit_complete', 'NULL', 'NULL', 'R.actual_completion', "'UNIT_COMPLETE'",
+     "'Unit ' || R.tail_number || ' completed'"),
+    ('assembly_tracking', 'job_start', 'R.station_id', 'R.operator_id', 'R.start_time', "'JOB_START'",
+     "'Started work at station ' || R.station_id"),
+    ('assembly_tracking', 'job_end', 'R.station_id', 'R.operator_id', 'R.end_time', "'JOB_END'",
+     "'Finished at station ' || R.station_id || COALESCE(' (' || R.quality_status || ')', '')"
+     " || COALESCE(', ' || R.defects || ' defects', '')"),
+    ('quality_measurements', 'quality', 'R.station_id', 'R.operator_id', 'R.measurement_time', "'QUALITY_' || R.status",
+     "R.checkpoint || ': ' || R.parameter || ' = ' || R.value"),
+    ('production_logs', 'log', 'R.station_id', 'R.user_id', "datetime(R.timestamp, 'localtime')", 'R.event_type',
+     'R.description')
+]
+
+def timeline_select(table, source, station, operator, time, event_type, summary, row):
+    """SELECT producing the timeline entry for one source row (row is NEW, OLD or a table alias)"""
+    unit = 'R.id' if table == 'helicopter_units' else 'R.unit_id'
+    columns = [unit, f"'{source}'", 'R.id', station, operator, time, event_type, summary]
+    return (f"SELECT {', '.join(columns)}".replace('R.', f'{row}.') +
+            f" WHERE {unit} IS NOT NULL AND {time} IS NOT NULL".replace('R.', f'{row}.'))
+
+def unit_timeline(cursor):
+    """Denormalised per-unit event timeline maintained by triggers on the source tables"""
+    # Clustered on (unit_id, event_time): a unit's full history is one primary-key range scan
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS unit_timeline (
+            unit_id INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            source_id INTEGER NOT NULL,
+            station_id INTEGER,
+            operator_id INTEGER,
+            event_time TIMESTAMP NOT NULL,
+            event_type TEXT,
+            summary TEXT,
+            PRIMARY KEY (unit_id, event_time, source, source_id)
+        ) WITHOUT ROWID
+    ''')
+    for index_sql in [
+        # Units touched by a station or operator in a window: index-only range scans
+        "CREATE INDEX IF NOT EXISTS idx_timeline_station ON unit_timeline (station_id, event_time, unit_id)",
+        "CREATE INDEX IF NOT EXISTS idx_timeline_operator ON unit_timeline (operator_id, event_time, unit_id)",
+        # Trigger maintenance: find the entry of a source row
+        "CREATE INDEX IF NOT EXISTS idx_timeline_source ON unit_timeline (source, source_id)"
+    ]:
+        cursor.execute(index_sql)
+    
+    for table in dict.fromkeys(spec[0] for spec in TIMELINE_SOURCES):
+        timeline_triggers(cursor, table)
+
+def timeline_triggers(cursor, table):
+    """(Re)create a source table's timeline triggers and rebuild its timeline entries"""
+    insert = "INSERT INTO unit_timeline (unit_id, source, source_id, station_id, operator_id, event_time, event_type, summary) "
+    specs = [spec for spec in TIMELINE_SOURCES if spec[0] == table]
+    inserts = ''.join(f"{insert}{timeline_select(*spec, 'NEW')};\n" for spec in specs)
+    deletes = ''.join(f"DELETE FROM unit_timeline WHERE source = '{spec[1]}' AND source_id = OLD.id;\n"
+                      for spec in specs)
+    for event in ['insert', 'update', 'delete']:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {table}_timeline_{event}")
+    cursor.execute(f"CREATE TRIGGER {table}_timeline_insert AFTER INSERT ON {table} "
+                   f"BEGIN\n{inserts}END")
+    cursor.execute(f"CREATE TRIGGER {table}_timeline_update AFTER UPDATE ON {table} "
+                   f"BEGIN\n{deletes}{inserts}END")
+    cursor.execute(f"CREATE TRIGGER {table}_timeline_delete AFTER DELETE ON {table} "
+                   f"BEGIN\n{deletes}END")
+    
+    for spec in specs:
+        cursor.execute("DELETE FROM unit_timeline WHERE source = ?", (spec[1],))
+        cursor.execute(insert + timeline_select(*spec, 'R').replace(' WHERE', f" FROM {table} R WHERE"))
+
+# Accounts listed on the login page (username, password, full name, role, station, shift)
+DEMO_USERS = [
+    ('supervisor', 'super123', 'Shift Supervisor', 'supervisor', None, 1),
+    ('operator', 'op123', 'Assembly Operator', 'operator', 3, 1),
+    ('demo', 'demo123', 'Demo User', 'viewer', None, None)
+]
+
+def hashed_passwords(cursor):
+    """Hash plain-text passwords left by earlier seeds and add the demo accounts"""
+    for user_id, password in cursor.execute("SELECT id, password_hash FROM users").fetchall():
+        if not is_hashed(password):
+            cursor.execute("UPDATE users SET password_hash = ? WHERE id = ?", (hash_password(password), user_id))
+    
+    for username, password, full_name, role, station_id, shift_id in DEMO_USERS:
+        cursor.execute("SELECT 1 FROM users WHERE username = ?", (username,))
+        if cursor.fetchone() is None:
+            cursor.execute('''
+                INSERT INTO users (username, password_hash, full_name, role, station_id, shift_id, is_active)
+                VALUES (?, ?, ?, ?, ?, ?, 1)
+            ''', (username, hash_password(password), full_name, role, station_id, shift_id))
+
+def station_scope_indexes(cursor):
+    """Indexes for station-scoped reads of assembly jobs"""
+    for index_sql in [
+        "CREATE INDEX IF NOT EXISTS idx_assembly_station ON assembly_tracking (station_id, start_time)",
+        # Open jobs only: which units are at a station right now
+        "CREATE INDEX IF NOT EXISTS idx_assembly_open ON assembly_tracking (station_id, unit_id) WHERE end_time IS NULL"
+    ]:
+        cursor.execute(index_sql)
+
+def scheduler_jobs(cursor):
+    """Schedule and lease of each background job, shared by all app workers"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS scheduler_jobs (
+            name TEXT PRIMARY KEY,
+            spec TEXT,
+            next_run TIMESTAMP,
+            owner TEXT,
+            leased_until TIMESTAMP,
+            last_started_at TIMESTAMP,
+            last_run_at TIMESTAMP,
+            last_status TEXT,
+            last_error TEXT,
+            last_duration_ms FLOAT
+        )
+    ''')
+    # Recent readings per station for maintenance scoring
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_sensor_station ON sensor_data (station_id, timestamp)")
+
+def production_day_cube(cursor):
+    """Key report cube days by production day, so a Night shift is not split at midnight"""
+    for table, time_expr in [
+        ('assembly_tracking', 'COALESCE({row}.end_time, {row}.start_time)'),
+        ('quality_measurements', '{row}.measurement_time')
+    ]:
+        new_day = shift_calendar.sql_day(time_expr.format(row='NEW'))
+        old_day = shift_calendar.sql_day(time_expr.format(row='OLD'))
+        for event in ['insert', 'update', 'delete']:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {table}_cube_{event}")
+        cursor.execute(f'''
+            CREATE TRIGGER {table}_cube_insert AFTER INSERT ON {table}
+            BEGIN
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {new_day} WHERE {new_day} IS NOT NULL;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER {table}_cube_update AFTER UPDATE ON {table}
+            BEGIN
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {old_day} WHERE {old_day} IS NOT NULL;
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {new_day} WHERE {new_day} IS NOT NULL;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER {table}_cube_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT OR IGNORE INTO report_cube_dirty (day) SELECT {old_day} WHERE {old_day} IS NOT NULL;
+            END
+        ''')
+    # An empty cube is rebuilt in full on the next refresh
+    cursor.execute("DELETE FROM report_cube")
+    cursor.execute("DELETE FROM report_cube_dirty")
+
+def parquet_dirty(cursor):
+    """Parquet history partitions whose rows were updated or deleted after they were exported"""
+    # No key: every change appends, so an export can clear exactly the marks it has read
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS parquet_dirty (
+            table_name TEXT NOT NULL,
+            month TEXT NOT NULL,
+            station_id INTEGER
+        )
+    ''')
+    for table, time_column in [
+        ('assembly_tracking', 'start_time'),
+        ('quality_measurements', 'measurement_time'),
+        ('sensor_data', 'timestamp')
+    ]:
+        # Same month key as the exporter's partitioning
+        new_month = f"COALESCE(strftime('%Y-%m', NEW.{time_column}), 'unknown')"
+        old_month = f"COALESCE(strftime('%Y-%m', OLD.{time_column}), 'unknown')"
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_parquet_update AFTER UPDATE ON {table}
+            BEGIN
+                INSERT INTO parquet_dirty (table_name, month, station_id) VALUES ('{table}', {old_month}, OLD.station_id);
+                INSERT INTO parquet_dirty (table_name, month, station_id)
+                SELECT '{table}', {new_month}, NEW.station_id
+                WHERE {new_month} != {old_month} OR NEW.station_id IS NOT OLD.station_id;
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_parquet_delete AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO parquet_dirty (table_name, month, station_id) VALUES ('{table}', {old_month}, OLD.station_id);
+            END
+        ''')
+
+def local_timeline_times(cursor):
+    """Timeline entries of UTC-stamped sources in local time, like the other sources"""
+    for table in ['helicopter_units', 'production_logs']:
+        timeline_triggers(cursor, table)
+
+# Ordered migration steps: (version, description, step)
+MIGRATIONS = [
+    (1, "core schema", core_schema),
+    (2, "seed stations and default admin", seed_defaults),
+    (3, "grid pagination indexes", grid_indexes),
+    (4, "report cube", report_cube),
+    (5, "line flow day stats", line_day_stats),
+    (6, "event journal checkpoints", event_journal),
+    (7, "note full-text search", note_search),
+    (8, "unit traceability timeline", unit_timeline),
+    (9, "hashed passwords and demo accounts", hashed_passwords),
+    (10, "station scope indexes", station_scope_indexes),
+    (11, "scheduler jobs", scheduler_jobs),
+    (12, "report cube production days", production_day_cube),
+    (13, "parquet dirty partitions", parquet_dirty),
+    (14, "local timeline times", local_timeline_times)
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+def current_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
+    """Apply pending migrations in one write transaction; returns the versions applied"""
+    if current_version(conn) >= LATEST_VERSION:
+        return []
+    
+    # Manage the transaction explicitly so DDL and the version bump commit together
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        # BEGIN IMMEDIATE takes the write lock so concurrent workers migrate one at a time
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = current_version(conn)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP NOT NULL
+                )
+            ''')
+            
+            applied = []
+            cursor = conn.cursor()
+            for step_version, description, step in MIGRATIONS:
+                if step_version <= version:
+                    continue
+                step(cursor)
+                cursor.execute('''
+                    INSERT INTO schema_version (version, description, applied_at) VALUES (?, ?, ?)
+                ''', (step_version, description, datetime.now()))
+                cursor.execute(f"PRAGMA user_version = {int(step_version)}")
+                applied.append(step_version)
+            
+            conn.execute("COMMIT")
+            return applied
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.isolation_level = isolation_level
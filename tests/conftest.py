@@ -0,0 +1,13 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def database(tmp_path):
+    """A migrated database in a temporary directory"""
+    from database import ProductionDatabase
+    database = ProductionDatabase(str(tmp_path / 'production.db'))
+    database.ensure_initialized()
+    return database
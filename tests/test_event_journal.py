@@ -0,0 +1,61 @@
+import json
+import os
+from utils.event_journal import WriteBehindLogger
+
+def _count(database, table, where='1 = 1', params=()):
+    with database.connect() as conn:
+        return conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", params).fetchone()[0]
+
+def _crash(logger):
+    """Lose the queued events and the journal lock, as a killed process would"""
+    with logger._lock:
+        logger._pending = []
+    thread, logger._thread = logger._thread, None
+    logger._stopping = True
+    logger._wake.set()
+    thread.join()
+    logger._file.close()
+    logger._file = None
+
+def test_replay_inserts_only_events_after_the_checkpoint(database):
+    logger = WriteBehindLogger(database, flush_interval=3600)
+    for i in range(3):
+        logger.log('NOTE', f"written {i}")
+    assert logger.flush() == 3
+    for i in range(4):
+        logger.log('NOTE', f"journal only {i}")
+    path = os.path.join(logger.directory, logger.name)
+    _crash(logger)
+
+    # A torn final line from a crash mid-append is ignored
+    with open(path, 'a', encoding='utf-8') as journal:
+        journal.write(json.dumps([99, ['2026-01-01 00:00:00', 'NOTE', 'torn', None, None, None, None]])[:20])
+
+    assert WriteBehindLogger(database).recover() == 4
+    assert _count(database, 'production_logs', "event_type = 'NOTE'") == 7
+    assert _count(database, 'production_logs', "description LIKE 'journal only%'") == 4
+    assert not os.path.exists(path)
+    assert _count(database, 'event_journal_checkpoint') == 0
+
+    # Nothing is replayed twice
+    assert WriteBehindLogger(database).recover() == 0
+    assert _count(database, 'production_logs', "event_type = 'NOTE'") == 7
+
+def test_live_journals_are_not_replayed(database):
+    logger = WriteBehindLogger(database, flush_interval=3600)
+    logger.log('NOTE', "pending")
+    assert WriteBehindLogger(database).recover() == 0  # locked by a running writer
+    logger.close()
+    assert _count(database, 'production_logs', "event_type = 'NOTE'") == 1
+
+def test_clean_close_removes_journal_and_checkpoint(database):
+    logger = WriteBehindLogger(database, flush_interval=3600)
+    logger.log('NOTE', "one")
+    logger.flush()
+    logger.log('NOTE', "two")
+    path = os.path.join(logger.directory, logger.name)
+    logger.close()
+
+    assert _count(database, 'production_logs', "event_type = 'NOTE'") == 2
+    assert not os.path.exists(path)
+    assert _count(database, 'event_journal_checkpoint') == 0
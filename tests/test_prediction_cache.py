@@ -0,0 +1,36 @@
+from utils.prediction_cache import PredictionCache
+
+class StubPredictor:
+    """Counts model calls and drift observations"""
+
+    def __init__(self):
+        self.last_model_version = 'v1'
+        self.predicted = []
+        self.observed = []
+
+    def ensure_loaded(self):
+        pass
+
+    def predict_quality(self, features):
+        self.predicted.append(features)
+        return {'quality_score': features['torque_value'], 'version': self.last_model_version}
+
+    def observe(self, features_list):
+        self.observed.extend(features_list)
+
+def test_hits_skip_the_model_but_reach_the_drift_monitor():
+    cache, predictor = PredictionCache(buckets={'torque_value': 5.0}), StubPredictor()
+    first = cache.predict(predictor, {'torque_value': 100.0})
+    assert cache.predict(predictor, {'torque_value': 101.0}) == first  # same bucket
+    assert cache.predict(predictor, {'torque_value': 100.5}) == first
+    assert len(predictor.predicted) == 1
+    assert predictor.observed == [{'torque_value': 101.0}, {'torque_value': 100.5}]
+    assert (cache.hits, cache.misses) == (2, 1)
+
+def test_version_from_a_miss_drops_older_entries():
+    cache, predictor = PredictionCache(buckets={'torque_value': 5.0}), StubPredictor()
+    cache.predict(predictor, {'torque_value': 100.0})
+    predictor.last_model_version = 'v2'  # retrained; the next miss reports the new version
+    assert cache.predict(predictor, {'torque_value': 200.0})['version'] == 'v2'
+    assert cache.model_version == 'v2' and cache.invalidations == 1
+    assert cache.predict(predictor, {'torque_value': 100.0})['version'] == 'v2'
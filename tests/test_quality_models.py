@@ -0,0 +1,45 @@
+import pandas as pd
+import pytest
+from config import Config
+from utils import quality_models
+from utils.model_evaluation import DriftMonitor
+from utils.quality_models import QualityPredictor, save_models
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    """Model storage in a temporary directory"""
+    monkeypatch.setattr(quality_models, 'MODEL_DIR', str(tmp_path))
+    monkeypatch.setattr(quality_models, 'CURRENT_MODELS', str(tmp_path / 'current'))
+    return tmp_path
+
+def _save(name):
+    reference = DriftMonitor().fit(pd.DataFrame({'torque_value': [float(i) for i in range(50)]}))
+    return save_models({
+        'quality_regressor.pkl': f"{name} regressor",
+        'quality_classifier.pkl': f"{name} classifier",
+        'scaler.pkl': f"{name} scaler",
+        'feature_columns.pkl': ['torque_value'],
+        'training_reference.pkl': {'drift': reference.state(), 'evaluation': None}
+    })
+
+def test_loaded_predictor_picks_up_a_version_saved_elsewhere(model_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'MODEL_RELOAD_CHECK_SECONDS', 0)
+    first = _save('first')
+    predictor = QualityPredictor()
+    predictor.ensure_loaded()
+    assert (predictor.model_version, predictor.reg_model) == (first, 'first regressor')
+
+    # A retrain in another process saves a new version and switches the pointer
+    second = _save('second')
+    assert second != first
+    predictor.ensure_loaded()
+    assert (predictor.model_version, predictor.reg_model) == (second, 'second regressor')
+
+def test_version_check_waits_for_the_interval(model_dir, monkeypatch):
+    monkeypatch.setattr(Config, 'MODEL_RELOAD_CHECK_SECONDS', 3600)
+    first = _save('first')
+    predictor = QualityPredictor()
+    predictor.ensure_loaded()
+    _save('second')
+    predictor.ensure_loaded()
+    assert predictor.model_version == first
@@ -0,0 +1,84 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from utils.scheduler import CronSpec, Job, Scheduler
+
+def test_day_fields_match_either_when_both_restricted():
+    spec = CronSpec('0 9 13 * 1')  # the 13th, or any Monday
+    assert spec.matches(datetime(2026, 2, 13, 9, 0))  # Friday the 13th
+    assert spec.matches(datetime(2026, 2, 9, 9, 0))  # Monday the 9th
+    assert not spec.matches(datetime(2026, 2, 12, 9, 0))
+    assert spec.next_after(datetime(2026, 2, 3, 10, 0)) == datetime(2026, 2, 9, 9, 0)
+    assert spec.next_after(datetime(2026, 2, 10, 10, 0)) == datetime(2026, 2, 13, 9, 0)
+
+def test_day_fields_match_both_when_one_is_wildcard():
+    assert CronSpec('0 9 13 * *').next_after(datetime(2026, 2, 3)) == datetime(2026, 2, 13, 9, 0)
+    assert CronSpec('0 9 * * 1').next_after(datetime(2026, 2, 10)) == datetime(2026, 2, 16, 9, 0)
+    assert CronSpec('0 0 * * 7').matches(datetime(2026, 2, 15))  # 7 is Sunday too
+
+def test_next_after_rolls_over_months_and_years():
+    last_day = CronSpec('30 23 31 * *')
+    assert last_day.next_after(datetime(2026, 4, 1)) == datetime(2026, 5, 31, 23, 30)  # skips 30-day April
+    assert last_day.next_after(datetime(2026, 12, 31, 23, 45)) == datetime(2027, 1, 31, 23, 30)
+    assert CronSpec('@monthly').next_after(datetime(2026, 12, 15, 8, 0)) == datetime(2027, 1, 1, 0, 0)
+    assert CronSpec('0 0 29 2 *').next_after(datetime(2026, 3, 1)) == datetime(2028, 2, 29, 0, 0)
+
+def test_next_after_is_strictly_later():
+    spec = CronSpec('*/15 * * * *')
+    assert spec.next_after(datetime(2026, 1, 1, 10, 15)) == datetime(2026, 1, 1, 10, 30)
+    assert spec.next_after(datetime(2026, 1, 1, 23, 59, 30)) == datetime(2026, 1, 2, 0, 0)
+
+@pytest.mark.parametrize('text', ['0 9 * *', '60 * * * *', '0 0 0 * *', '5-1 * * * *', '*/0 * * * *'])
+def test_invalid_specs_are_rejected(text):
+    with pytest.raises(ValueError):
+        CronSpec(text)
+
+def _schedulers(database, count, lease_seconds=60):
+    schedulers = []
+    for _ in range(count):
+        scheduler = Scheduler(database, lease_seconds=lease_seconds)
+        scheduler.add(Job('sweep', '*/5 * * * *', 'builtins.list'))
+        schedulers.append(scheduler)
+    schedulers[0].sync_jobs()
+    return schedulers
+
+def _claim_concurrently(schedulers, now, next_run):
+    barrier = threading.Barrier(len(schedulers))
+    results = [None] * len(schedulers)
+
+    def claim(index):
+        barrier.wait()
+        results[index] = schedulers[index]._claim(schedulers[index].jobs['sweep'], now, next_run)
+
+    threads = [threading.Thread(target=claim, args=(index,)) for index in range(len(schedulers))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_claimers_take_a_due_slot_once(database):
+    first, second = _schedulers(database, 2)
+    job = first.jobs['sweep']
+    now = job.spec.next_after(datetime.now()) + timedelta(seconds=1)
+
+    assert sorted(_claim_concurrently([first, second], now, job.spec.next_after(now))) == [False, True]
+    # The slot moved forward and the lease is held: nobody can claim until both allow it
+    assert _claim_concurrently([first, second], now, job.spec.next_after(now)) == [False, False]
+
+def test_lease_blocks_claims_until_it_expires(database):
+    first, second = _schedulers(database, 2, lease_seconds=900)
+    job = first.jobs['sweep']
+    now = job.spec.next_after(datetime.now()) + timedelta(seconds=1)
+    assert first._claim(job, now, job.spec.next_after(now))
+
+    # The next slot is due but the first owner's 15-minute lease has not run out
+    later = job.spec.next_after(now) + timedelta(seconds=1)
+    assert not second._claim(job, later, job.spec.next_after(later))
+    assert not second._claim(job, later, None)  # run_now respects the lease as well
+
+    expired = now + timedelta(seconds=901)
+    assert second._claim(job, expired, job.spec.next_after(expired))
+    with database.get_connection() as conn:
+        owner = conn.execute("SELECT owner FROM scheduler_jobs WHERE name = 'sweep'").fetchone()[0]
+    assert owner == second.owner
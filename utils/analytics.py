@@ -0,0 +1,137 @@
+import os
+import time
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from config import Config
+from utils.parquet_store import EXPORT_TABLES, PARTITIONING
+
+class ParquetAnalytics:
+    """Aggregations over the Parquet history with column pruning and partition filtering"""
+
+    def __init__(self, root=Config.PARQUET_PATH):
+        self.root = root
+
+    def dataset(self, table):
+        return ds.dataset(os.path.join(self.root, table), format='parquet', partitioning=PARTITIONING)
+
+    def build_filter(self, months=None, stations=None, where=None):
+        """Combine partition filters (month, station_id) with an optional row filter"""
+        expression = None
+        for part in [
+            ds.field('month').isin(list(months)) if months else None,
+            ds.field('station_id').isin(list(stations)) if stations else None,
+            where
+        ]:
+            if part is not None:
+                expression = part if expression is None else expression & part
+        return expression
+
+    def aggregate(self, table, group_by, metrics, months=None, stations=None, where=None):
+        """
+        Group and aggregate a history table.
+
+        metrics maps output name -> (column, function), e.g. {'avg_cycle': ('cycle_time_hours', 'mean')}.
+        Only the grouped and aggregated columns are read, and only matching partitions are scanned.
+        """
+        if table not in EXPORT_TABLES:
+            raise ValueError(f"Unknown table: {table}")
+        if not os.path.exists(os.path.join(self.root, table)):
+            return None
+
+        columns = list(dict.fromkeys(list(group_by) + [column for column, _ in metrics.values()]))
+        data = self.dataset(table).to_table(
+            columns=columns,
+            filter=self.build_filter(months, stations, where)
+        )
+
+        result = data.group_by(list(group_by)).aggregate(
+            [(column, function) for column, function in metrics.values()]
+        )
+        renames = {f"{column}_{function}": name for name, (column, function) in metrics.items()}
+        result = result.rename_columns([renames.get(c, c) for c in result.column_names])
+        return result.to_pandas().sort_values(list(group_by)).reset_index(drop=True)
+
+    def station_cycle_times(self, months=None, stations=None):
+        """Monthly average cycle time, defects and rework per station"""
+        return self.aggregate(
+            'assembly_tracking',
+            ['month', 'station_id'],
+            {
+                'operations': ('id', 'count'),
+                'avg_cycle_time': ('cycle_time_hours', 'mean'),
+                'defects': ('defects', 'sum'),
+                'rework_hours': ('rework_hours', 'sum')
+            },
+            months=months, stations=stations
+        )
+
+    def quality_pass_rates(self, months=None, stations=None):
+        """Monthly quality pass rate per station"""
+        result = self.aggregate(
+            'quality_measurements',
+            ['month', 'station_id', 'status'],
+            {'checks': ('id', 'count')},
+            months=months, stations=stations
+        )
+        if result is None or result.empty:
+            return result
+        pivot = result.pivot_table(index=['month', 'station_id'], columns='status',
+                                   values='checks', aggfunc='sum', fill_value=0).reset_index()
+        pivot.columns.name = None
+        total = pivot.drop(columns=['month', 'station_id']).sum(axis=1)
+        pivot['pass_rate'] = pivot.get('PASS', 0) / total * 100
+        pivot['total_checks'] = total
+        return pivot
+
+    def sensor_summary(self, sensor_type, months=None, stations=None):
+        """Monthly mean/max of one sensor type per station"""
+        return self.aggregate(
+            'sensor_data',
+            ['month', 'station_id'],
+            {'mean_value': ('value', 'mean'), 'max_value': ('value', 'max'), 'readings': ('id', 'count')},
+            months=months, stations=stations,
+            where=pc.field('sensor_type') == sensor_type
+        )
+
+def benchmark_against_sqlite(database, analytics, months=None, stations=None, repeat=3):
+    """Time the Parquet aggregations against the equivalent SQLite queries"""
+    month_clause = ''
+    station_clause = ''
+    params = []
+    if months:
+        month_clause = f"AND strftime('%Y-%m', start_time) IN ({','.join('?' * len(months))})"
+        params += list(months)
+    if stations:
+        station_clause = f"AND station_id IN ({','.join('?' * len(stations))})"
+        params += list(stations)
+
+    sqlite_sql = f'''
+        SELECT strftime('%Y-%m', start_time) as month, station_id,
+               COUNT(id) as operations, AVG(cycle_time_hours) as avg_cycle_time,
+               SUM(defects) as defects, SUM(rework_hours) as rework_hours
+        FROM assembly_tracking
+        WHERE 1 = 1 {month_clause} {station_clause}
+        GROUP BY month, station_id
+    '''
+
+    def run_sqlite():
+        with database.get_connection() as conn:
+            return conn.execute(sqlite_sql, params).fetchall()
+
+    def run_parquet():
+        return analytics.station_cycle_times(months=months, stations=stations)
+
+    timings = {}
+    for name, func in [('sqlite', run_sqlite), ('parquet', run_parquet)]:
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+
+    timings['speedup'] = timings['sqlite'] / timings['parquet'] if timings['parquet'] else None
+    return timings
+
+# Initialize analytics over the default Parquet location
+analytics = ParquetAnalytics()
@@ -0,0 +1,49 @@
+from datetime import datetime
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.express as px
+
+def build_production_timeline(active_units, progress):
+    """Gantt-style timeline of station work for active units (progress rows carry unit_id)"""
+    fig = go.Figure()
+    
+    colors = px.colors.qualitative.Set3
+    by_unit = {unit_id: rows for unit_id, rows in progress.groupby('unit_id')}
+    
+    for idx, unit in active_units.iterrows():
+        unit_progress = by_unit.get(unit['id'])
+        if unit_progress is None:
+            continue
+        
+        for i, row in unit_progress.iterrows():
+            start = pd.to_datetime(row['start_time'])
+            if pd.isna(row['end_time']):
+                end = datetime.now()
+                opacity = 0.6
+            else:
+                end = pd.to_datetime(row['end_time'])
+                opacity = 0.3
+            
+            fig.add_trace(go.Bar(
+                name=f"{unit['tail_number']} - {row['station']}",
+                x=[(end - start).total_seconds() / 3600],
+                y=[row['station']],
+                base=[start.strftime('%Y-%m-%d %H:%M')],
+                orientation='h',
+                marker=dict(color=colors[idx % len(colors)], opacity=opacity),
+                text=f"{unit['tail_number']}<br>{row['station']}",
+                textposition='inside',
+                hoverinfo='text'
+            ))
+    
+    fig.update_layout(
+        title="Active Production Timeline",
+        xaxis_title="Time",
+        yaxis_title="Station",
+        barmode='overlay',
+        height=500,
+        showlegend=False,
+        hovermode='y unified'
+    )
+    
+    return fig
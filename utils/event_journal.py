@@ -0,0 +1,216 @@
+"""
+Write-behind logging for production_logs.
+
+log() appends the event to a local journal file and queues it in memory; a
+background thread writes queued events in one transaction per flush (at most
+Config.EVENT_FLUSH_INTERVAL seconds after they were logged, sooner once
+Config.EVENT_FLUSH_BATCH are waiting). The same transaction records the last
+written journal sequence number in event_journal_checkpoint, so replaying a
+journal after a crash inserts exactly the events that never reached the table.
+
+Each process writes its own journal under <database>_journal/ and holds an
+exclusive lock on it. On startup, journals whose lock can be taken belong to
+processes that have exited; their unwritten events are replayed and the files
+removed.
+"""
+import atexit
+import fcntl
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from config import Config
+
+INSERT_EVENT = '''
+    INSERT INTO production_logs (timestamp, event_type, description, unit_id, station_id, user_id, data)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+def journal_dir(db_path):
+    return os.path.splitext(db_path)[0] + '_journal'
+
+class WriteBehindLogger:
+    def __init__(self, database, flush_interval=Config.EVENT_FLUSH_INTERVAL,
+                 max_batch=Config.EVENT_FLUSH_BATCH, fsync=Config.EVENT_JOURNAL_FSYNC,
+                 max_journal_bytes=Config.EVENT_JOURNAL_MAX_BYTES):
+        self.database = database
+        self.directory = journal_dir(database.db_path)
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.max_journal_bytes = max_journal_bytes
+        self._lock = threading.Lock()  # journal appends and the pending queue
+        self._flush_lock = threading.Lock()  # one flush at a time
+        self._wake = threading.Event()
+        self._pending = []  # (seq, row) not yet in production_logs
+        self._seq = 0
+        self._file = None
+        self._thread = None
+        self._stopping = False
+        self.name = None
+        self.logged = 0
+        self.written = 0
+        self.flushes = 0
+        self.replayed = 0
+        self.failures = 0
+        atexit.register(self.close)
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        """Replay journals left by exited processes, then open this process's journal"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            os.makedirs(self.directory, exist_ok=True)
+            self.database.ensure_initialized()
+            self.recover()
+
+            self.name = f"events-{os.getpid()}-{time.time_ns()}.jsonl"
+            self._file = open(os.path.join(self.directory, self.name), 'a', encoding='utf-8')
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='event-writer', daemon=True)
+            self._thread.start()
+
+    def close(self):
+        """Stop the writer and flush; the journal is removed once everything is written"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+        if thread is None:
+            return
+        self._wake.set()
+        thread.join()
+        self.flush()
+        with self._lock:
+            path = os.path.join(self.directory, self.name)
+            complete = not self._pending
+            if complete:
+                os.remove(path)
+            self._file.close()  # a journal with unwritten events is replayed by the next process
+            self._file = None
+        if complete:
+            # As in recover(): the file goes first, so a crash in between can never replay twice
+            try:
+                with self.database.connect() as conn:
+                    conn.execute("DELETE FROM event_journal_checkpoint WHERE journal = ?", (self.name,))
+                    conn.commit()
+            except Exception as e:
+                print(f"⚠️ Could not remove checkpoint of journal {self.name}: {e}")
+
+    # ------------------------------------------------------------------ logging
+
+    def log(self, event_type, description, unit_id=None, station_id=None, user_id=None, data=None):
+        self.start()
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')  # as CURRENT_TIMESTAMP
+        row = (timestamp, event_type, description, unit_id, station_id, user_id,
+               json.dumps(data) if data else None)
+        with self._lock:
+            self._seq += 1
+            self._file.write(json.dumps([self._seq, row]) + '\n')
+            self._file.flush()  # in the OS page cache: survives a process crash
+            if self.fsync:
+                os.fsync(self._file.fileno())  # on disk: survives power loss too
+            self._pending.append((self._seq, row))
+            self.logged += 1
+            if len(self._pending) >= self.max_batch:
+                self._wake.set()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write every queued event now; returns how many were written"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                self.write_batch(self.name, batch)
+            except Exception as e:
+                # Keep the events queued (they are still in the journal) and retry next interval
+                with self._lock:
+                    self._pending = batch + self._pending
+                self.failures += 1
+                print(f"⚠️ Event log flush failed, will retry: {e}")
+                return 0
+
+            with self._lock:
+                self.written += len(batch)
+                self.flushes += 1
+                # Everything in the journal is in the table: start it again when it gets large
+                if not self._pending and self._file is not None and self._file.tell() > self.max_journal_bytes:
+                    self._file.truncate(0)
+                    self._file.seek(0)
+            return len(batch)
+
+    def write_batch(self, journal, batch):
+        """Insert events and advance the journal checkpoint in one transaction"""
+        with self.database.connect() as conn:
+            conn.executemany(INSERT_EVENT, [row for _, row in batch])
+            conn.execute('''
+                INSERT INTO event_journal_checkpoint (journal, last_seq, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (journal) DO UPDATE SET last_seq = excluded.last_seq, updated_at = excluded.updated_at
+            ''', (journal, batch[-1][0]))
+            conn.commit()
+
+    # ------------------------------------------------------------------ recovery
+
+    def recover(self):
+        """Replay and remove journals whose owning process has exited; returns events replayed"""
+        replayed = 0
+        for path in sorted(glob.glob(os.path.join(self.directory, 'events-*.jsonl'))):
+            with open(path, 'r+', encoding='utf-8') as journal:
+                try:
+                    fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # another live process is writing it
+                name = os.path.basename(path)
+                with self.database.connect() as conn:
+                    row = conn.execute("SELECT last_seq FROM event_journal_checkpoint WHERE journal = ?",
+                                       (name,)).fetchone()
+                checkpoint = row[0] if row else 0
+
+                batch = []
+                for line in journal:
+                    try:
+                        seq, event = json.loads(line)
+                    except ValueError:
+                        break  # torn final line from a crash mid-write
+                    if seq > checkpoint:
+                        batch.append((seq, tuple(event)))
+                for start in range(0, len(batch), self.max_batch):
+                    self.write_batch(name, batch[start:start + self.max_batch])
+                replayed += len(batch)
+
+                # Remove the file before its checkpoint so a crash here can never replay twice
+                os.remove(path)
+                with self.database.connect() as conn:
+                    conn.execute("DELETE FROM event_journal_checkpoint WHERE journal = ?", (name,))
+                    conn.commit()
+        if replayed:
+            print(f"✅ Replayed {replayed} journaled events")
+        self.replayed += replayed
+        return replayed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'journal': self.name,
+                'queued': len(self._pending),
+                'logged': self.logged,
+                'written': self.written,
+                'flushes': self.flushes,
+                'replayed': self.replayed,
+                'failures': self.failures,
+                'journal_bytes': self._file.tell() if self._file else 0
+            }
@@ -0,0 +1,88 @@
+import numpy as np
+
+class TreePathExplainer:
+    """
+    Per-prediction feature attributions for a tree ensemble (Saabas tree-path method).
+
+    Walking from the root to a leaf, each split moves the node value by some amount;
+    that change is credited to the split feature. The per-leaf totals are precomputed
+    once, so explaining a batch is one apply() plus a gather-and-sum:
+
+        prediction = bias + contributions.sum(axis=1)
+    """
+
+    def __init__(self, trees, n_features, apply, scale=1.0, bias=0.0):
+        self.n_features = n_features
+        self.apply = apply  # X -> (n_samples, n_trees) leaf node ids
+        self.scale = scale
+        self.bias = bias
+
+        tables, leaf_rows, offset = [], [], 0
+        for tree in trees:
+            tree_table, rows = self.leaf_contributions(tree.tree_, n_features)
+            tables.append(tree_table)
+            leaf_rows.append(np.where(rows >= 0, rows + offset, -1))
+            offset += len(tree_table)
+            self.bias += scale * float(tree.tree_.value[0, 0, 0])
+        self.table = np.vstack(tables).astype(np.float32)
+        self.leaf_rows = leaf_rows
+
+    @staticmethod
+    def leaf_contributions(tree, n_features):
+        """Cumulative root-to-leaf contributions for each leaf, and node id -> leaf row"""
+        values = tree.value[:, 0, 0]
+        cumulative = np.zeros((tree.node_count, n_features))
+        frontier = np.array([0])
+        # Children always follow their parent, so one pass per depth level fills the table
+        while len(frontier):
+            next_frontier = []
+            for children in (tree.children_left[frontier], tree.children_right[frontier]):
+                has_child = children >= 0
+                parents, kids = frontier[has_child], children[has_child]
+                cumulative[kids] = cumulative[parents]
+                cumulative[kids, tree.feature[parents]] += values[kids] - values[parents]
+                next_frontier.append(kids)
+            frontier = np.concatenate(next_frontier)
+
+        is_leaf = tree.children_left < 0
+        rows = np.full(tree.node_count, -1)
+        rows[is_leaf] = np.arange(is_leaf.sum())
+        return cumulative[is_leaf], rows
+
+    def contributions(self, X):
+        """(n_samples, n_features) attributions for already-preprocessed X"""
+        leaves = np.asarray(self.apply(X), dtype=np.intp)
+        rows = np.column_stack([leaf_rows[leaves[:, i]] for i, leaf_rows in enumerate(self.leaf_rows)])
+        return self.table[rows].sum(axis=1, dtype=np.float64) * self.scale
+
+    @classmethod
+    def for_forest(cls, forest):
+        """Random forest regressor: the prediction is the mean over trees"""
+        def apply(X):
+            # forest.apply dispatches to a thread pool, which costs more than it saves for small batches
+            if len(X) >= 256:
+                return forest.apply(X)
+            X = np.ascontiguousarray(X, dtype=np.float32)
+            return np.column_stack([tree.apply(X, check_input=False) for tree in forest.estimators_])
+        return cls(forest.estimators_, forest.n_features_in_, apply, scale=1.0 / len(forest.estimators_))
+
+    @classmethod
+    def for_boosting(cls, model):
+        """Binary gradient boosting classifier: attributions are in log-odds of the positive class"""
+        trees = model.estimators_[:, 0]
+        # Log-odds of the init estimator: the decision function minus every tree's contribution
+        x0 = np.zeros((1, model.n_features_in_))
+        init = model.decision_function(x0)[0] - model.learning_rate * sum(tree.predict(x0)[0] for tree in trees)
+        return cls(trees, model.n_features_in_, lambda X: model.apply(X)[:, :, 0],
+                   scale=model.learning_rate, bias=float(init))
+
+def explain_rows(feature_columns, quality_explainer, defect_explainer, X_scaled):
+    """Per-row dicts of quality-score and defect log-odds attributions by feature"""
+    quality = quality_explainer.contributions(X_scaled)
+    defect = defect_explainer.contributions(X_scaled)
+    return [{
+        'quality_bias': round(quality_explainer.bias, 4),
+        'quality_contributions': dict(zip(feature_columns, np.round(quality[i], 4).tolist())),
+        'defect_bias_logodds': round(defect_explainer.bias, 4),
+        'defect_contributions': dict(zip(feature_columns, np.round(defect[i], 4).tolist()))
+    } for i in range(len(X_scaled))]
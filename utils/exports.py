@@ -0,0 +1,100 @@
+import csv
+import io
+import tempfile
+import xlsxwriter
+from config import Config
+
+# Supervisor report exports, filtered by an inclusive date range
+EXPORT_QUERIES = {
+    'assembly_tracking': '''
+        SELECT at.id, hu.tail_number, s.name as station, u.full_name as operator,
+               at.start_time, at.end_time, at.cycle_time_hours, at.defects, at.rework_hours,
+               at.quality_checkpoint, at.quality_status, at.notes
+        FROM assembly_tracking at
+        LEFT JOIN helicopter_units hu ON at.unit_id = hu.id
+        LEFT JOIN stations s ON at.station_id = s.id
+        LEFT JOIN users u ON at.operator_id = u.id
+        WHERE at.start_time >= ? AND at.start_time < DATE(?, '+1 day')
+        ORDER BY at.start_time, at.id
+    ''',
+    'quality_measurements': '''
+        SELECT qm.id, hu.tail_number, s.name as station, qm.checkpoint, qm.measurement_time,
+               qm.parameter, qm.value, qm.tolerance_min, qm.tolerance_max, qm.status, qm.operator_id
+        FROM quality_measurements qm
+        LEFT JOIN helicopter_units hu ON qm.unit_id = hu.id
+        LEFT JOIN stations s ON qm.station_id = s.id
+        WHERE qm.measurement_time >= ? AND qm.measurement_time < DATE(?, '+1 day')
+        ORDER BY qm.measurement_time, qm.id
+    '''
+}
+
+def iter_query_chunks(database, sql, params=(), chunk_size=Config.EXPORT_CHUNK_SIZE):
+    """Yield (columns, rows) in fixed-size chunks straight from a SQLite cursor"""
+    with database.get_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        columns = [d[0] for d in cursor.description]
+        rows = cursor.fetchmany(chunk_size)
+        # Always yield once so empty exports still carry a header row
+        yield columns, rows
+        while rows:
+            rows = cursor.fetchmany(chunk_size)
+            if rows:
+                yield columns, rows
+
+def iter_report_chunks(database, report, start_day, end_day, chunk_size=Config.EXPORT_CHUNK_SIZE):
+    """Yield chunks for one of the EXPORT_QUERIES over a date range"""
+    if report not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown report: {report}")
+    return iter_query_chunks(database, EXPORT_QUERIES[report], (str(start_day), str(end_day)), chunk_size)
+
+def stream_csv(chunks):
+    """Encode chunks as CSV, yielding one UTF-8 block per chunk"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+
+    for columns, rows in chunks:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(tuple(row) for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+def write_xlsx(chunks, target, sheet_name='Export'):
+    """Write chunks to an XLSX file using xlsxwriter's constant-memory mode; returns rows written"""
+    workbook = xlsxwriter.Workbook(target, {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm'})
+    worksheet = workbook.add_worksheet(sheet_name[:31])
+    bold = workbook.add_format({'bold': True})
+    row_index = 0
+
+    try:
+        for columns, rows in chunks:
+            if row_index == 0:
+                worksheet.write_row(0, 0, columns, bold)
+                row_index = 1
+            for row in rows:
+                worksheet.write_row(row_index, 0, tuple(row))
+                row_index += 1
+    finally:
+        workbook.close()
+
+    return max(row_index - 1, 0)
+
+def export_to_file(database, report, start_day, end_day, fmt='csv'):
+    """
+    Spool a report through a temp file and return its bytes for st.download_button.
+    Database reads are chunked, but the finished file is returned whole: Streamlit reads
+    any file object it is given into memory to serve it.
+    """
+    chunks = iter_report_chunks(database, report, start_day, end_day)
+    with tempfile.TemporaryFile() as tmp:
+        if fmt == 'xlsx':
+            write_xlsx(chunks, tmp, report)
+        else:
+            for block in stream_csv(chunks):
+                tmp.write(block)
+        tmp.seek(0)
+        return tmp.read()
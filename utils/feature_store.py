@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+import math
+import pandas as pd
+from config import Config
+from database import db
+from utils.shift_calendar import shift_calendar
+
+class RollingWindow:
+    """
+    Time-bounded ring buffer keeping running mean, std and max in O(1). Mean and variance
+    are updated with Welford's method (also on removal), which stays accurate over long
+    runs where a running sum of squares would cancel catastrophically.
+    """
+
+    def __init__(self, span_seconds, capacity=Config.FEATURE_BUFFER_SIZE):
+        self.span = span_seconds
+        self.capacity = capacity
+        self.values = deque()  # (seq, ts, value)
+        self._max = deque()  # monotonic decreasing (seq, value)
+        self._mean = 0.0
+        self._m2 = 0.0  # sum of squared deviations from the mean
+        self._seq = 0
+
+    def push(self, ts, value):
+        if len(self.values) >= self.capacity:
+            self._pop_oldest()
+
+        self._seq += 1
+        self.values.append((self._seq, ts, value))
+        delta = value - self._mean
+        self._mean += delta / len(self.values)
+        self._m2 += delta * (value - self._mean)
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((self._seq, value))
+
+    def expire(self, now):
+        """Drop readings older than the window span relative to now (epoch seconds)"""
+        cutoff = now - self.span
+        while self.values and self.values[0][1] <= cutoff:
+            self._pop_oldest()
+
+    def _pop_oldest(self):
+        seq, _, value = self.values.popleft()
+        n = len(self.values)
+        if n == 0:
+            self._mean = self._m2 = 0.0
+        else:
+            delta = value - self._mean
+            self._mean -= delta / n
+            self._m2 = max(self._m2 - delta * (value - self._mean), 0.0)
+        if self._max and self._max[0][0] == seq:
+            self._max.popleft()
+
+    def stats(self):
+        n = len(self.values)
+        if n == 0:
+            return None
+        return {'mean': self._mean, 'std': math.sqrt(self._m2 / n), 'max': self._max[0][1], 'count': n}
+
+class SensorFeatureStore:
+    """Online store of rolling sensor aggregates and model feature vectors per station"""
+
+    def __init__(self, database, windows=Config.FEATURE_WINDOWS,
+                 refresh_seconds=Config.FEATURE_REFRESH_SECONDS):
+        self.db = database
+        self.windows = windows
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._buffers = {}  # (station_id, sensor_type) -> {window_name: RollingWindow}
+        self._station_context = {}
+        self._feature_cache = {}  # station_id -> static part of the feature vector
+        self._last_id = None  # last sensor_data id read; None until the first refresh
+        self._last_refresh = None
+
+    def ingest(self, station_id, sensor_type, timestamp, value):
+        """Add one reading to the station's rolling windows"""
+        if sensor_type not in Config.SENSOR_FEATURES or value is None:
+            return
+        ts = pd.Timestamp(timestamp).timestamp()
+        with self._lock:
+            buffers = self._buffers.get((station_id, sensor_type))
+            if buffers is None:
+                buffers = {name: RollingWindow(span) for name, span in self.windows.items()}
+                self._buffers[(station_id, sensor_type)] = buffers
+            for window in buffers.values():
+                window.push(ts, float(value))
+            self._feature_cache.pop(station_id, None)
+
+    def refresh(self, force=False):
+        """Pull new sensor rows and station context from the database incrementally"""
+        now = time.monotonic()
+        with self._lock:
+            if not force and self._last_refresh is not None and now - self._last_refresh < self.refresh_seconds:
+                return
+            self._last_refresh = now
+            # Readings are naive local times; compare them on the same clock
+            clock = pd.Timestamp(datetime.now()).timestamp()
+
+            if self._last_id is None:
+                # Only readings inside the longest window can contribute
+                since = datetime.now() - timedelta(seconds=max(self.windows.values()))
+                self._last_id = self.db.get_sensor_id_before(since)
+
+            while True:
+                rows = self.db.get_sensor_data_since(self._last_id)
+                if not rows:
+                    break
+                for row in rows:
+                    self.ingest(row['station_id'], row['sensor_type'], row['timestamp'], row['value'])
+                self._last_id = rows[-1]['id']
+
+            for buffers in self._buffers.values():
+                for window in buffers.values():
+                    # Against the current time, so a sensor that stops reporting ages out
+                    window.expire(clock)
+
+            self._station_context = self.db.get_station_context()
+            self._feature_cache.clear()
+
+    def get_rolling_stats(self, station_id):
+        """Get mean/std/max per sensor and window for a station"""
+        self.refresh()
+        with self._lock:
+            stats = {}
+            for sensor_type in Config.SENSOR_FEATURES:
+                buffers = self._buffers.get((station_id, sensor_type), {})
+                stats[sensor_type] = {name: window.stats() for name, window in buffers.items()}
+            return stats
+
+    def _build_station_features(self, station_id):
+        station = next((s for s in Config.STATIONS if s['id'] == station_id), None)
+        context = self._station_context.get(station_id, {})
+        short_window = min(self.windows, key=self.windows.get)
+
+        features = {
+            'station_id': station_id,
+            'station_critical': int(station['critical']) if station else 0
+        }
+
+        for sensor_type, feature in Config.SENSOR_FEATURES.items():
+            window = self._buffers.get((station_id, sensor_type), {}).get(short_window)
+            stats = window.stats() if window else None
+            features[feature] = stats['mean'] if stats else Config.FEATURE_DEFAULTS[feature]
+
+        for feature in ['days_since_maintenance', 'previous_defects', 'cycle_time_deviation', 'component_age_days']:
+            value = context.get(feature)
+            features[feature] = Config.FEATURE_DEFAULTS[feature] if value is None else value
+
+        return features
+
+    def get_features(self, station_id, operator=None, now=None):
+        """Get the 16-feature model input vector for a station"""
+        self.refresh()
+        with self._lock:
+            features = self._feature_cache.get(station_id)
+            if features is None:
+                features = self._build_station_features(station_id)
+                self._feature_cache[station_id] = features
+
+        now = now or datetime.now()
+        vector = dict(features)
+        vector.update({
+            'hour_of_day': now.hour,
+            'day_of_week': now.weekday(),
+            'shift_id': shift_calendar.shift_at(now) or 0,
+            'operator_experience_months': Config.FEATURE_DEFAULTS['operator_experience_months'],
+            'operator_certification_level': Config.FEATURE_DEFAULTS['operator_certification_level']
+        })
+        if operator:
+            vector.update({k: v for k, v in operator.items() if k in vector})
+        return vector
+
+# Initialize feature store
+feature_store = SensorFeatureStore(db)
@@ -0,0 +1,198 @@
+import fcntl
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from config import Config
+from utils.inference_server import parse_address
+
+class RemotePredictor:
+    """QualityPredictor interface backed by the shared inference process"""
+
+    def __init__(self, address=Config.INFERENCE_ADDRESS, timeout=Config.INFERENCE_TIMEOUT,
+                 autostart=Config.INFERENCE_AUTOSTART):
+        self.address = address
+        self.timeout = timeout
+        self.autostart = autostart
+        self._local = threading.local()  # one connection per session thread
+        self._connections = []
+        self._lock = threading.Lock()
+        self.last_model_version = None  # as reported by the latest ping or prediction reply
+        self._observations = []  # cache-hit inputs for the server's drift monitor, sent with the next request
+
+    @property
+    def is_trained(self):
+        try:
+            return self._request({'op': 'ping'})['loaded']
+        except OSError:
+            return False
+
+    @property
+    def model_version(self):
+        try:
+            return self._request({'op': 'ping'}).get('model_version')
+        except OSError:
+            return None
+
+    def _connect(self):
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(target)
+            except OSError:
+                sock.close()
+                raise
+        else:
+            sock = socket.create_connection(target, timeout=self.timeout)
+        conn = sock.makefile('rwb')
+        with self._lock:
+            self._connections.append((sock, conn))
+        return sock, conn
+
+    def _roundtrip(self, payload):
+        if getattr(self._local, 'conn', None) is None:
+            self._local.sock, self._local.conn = self._connect()
+        conn = self._local.conn
+        try:
+            conn.write((json.dumps(payload, default=_to_json) + '\n').encode())
+            conn.flush()
+            line = conn.readline()
+            if not line:
+                raise ConnectionError("Inference server closed the connection")
+            return json.loads(line)
+        except (OSError, ValueError):
+            self._drop_connection()
+            raise
+
+    def _request(self, payload):
+        with self._lock:
+            observations, self._observations = self._observations, []
+        if observations:
+            payload = dict(payload, observe=observations)
+        try:
+            response = self._roundtrip(payload)
+        except OSError:
+            # Server restarted or not yet running: start it if allowed, then retry once
+            if self.autostart:
+                self.start_server()
+            response = self._roundtrip(payload)
+        if 'model_version' in response:
+            self.last_model_version = response['model_version']
+        return response
+
+    def _drop_connection(self):
+        sock, conn = getattr(self._local, 'sock', None), getattr(self._local, 'conn', None)
+        self._local.sock = self._local.conn = None
+        with self._lock:
+            if (sock, conn) in self._connections:
+                self._connections.remove((sock, conn))
+        for closable in (conn, sock):
+            try:
+                if closable is not None:
+                    closable.close()
+            except OSError:
+                pass
+
+    def ping(self):
+        return self._request({'op': 'ping'})
+
+    def health(self):
+        """Server health, or an 'unreachable' status instead of raising"""
+        try:
+            return self._roundtrip({'op': 'health'})
+        except OSError as e:
+            return {'ok': False, 'status': 'unreachable', 'error': str(e)}
+
+    def metrics(self):
+        return self._request({'op': 'metrics'})
+
+    def start_server(self):
+        """Start the inference process unless one is already answering; safe across workers"""
+        kind, target = parse_address(self.address)
+        lock_path = (target if kind == 'unix' else os.path.join('data', f"inference_{target[1]}")) + '.lock'
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+        with open(lock_path, 'w') as lock_file:
+            # Only one worker spawns the server; the others wait here and then find it running
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self._answers():
+                    return
+                root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+                env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+                subprocess.Popen([sys.executable, '-m', 'utils.inference_server', '--address', self.address],
+                                 env=env, start_new_session=True,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                deadline = time.monotonic() + self.timeout
+                while time.monotonic() < deadline:
+                    if self._answers():
+                        return
+                    time.sleep(0.1)
+                raise ConnectionError(f"Inference server did not start on {self.address}")
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _answers(self):
+        try:
+            self._roundtrip({'op': 'ping'})
+            return True
+        except OSError:
+            return False
+
+    def ensure_loaded(self):
+        self._request({'op': 'ping'})
+
+    def predict_quality(self, features):
+        """Predict quality score for current conditions"""
+        response = self._request({'op': 'predict', 'features': features})
+        if not response.get('ok'):
+            raise RuntimeError(f"Inference failed: {response.get('error')}")
+        return response['result']
+
+    def predict_batch(self, features_list):
+        """Predict quality for many feature dicts in one round trip"""
+        response = self._request({'op': 'predict_batch', 'batch': list(features_list)})
+        if not response.get('ok'):
+            raise RuntimeError(f"Inference failed: {response.get('error')}")
+        return response['results']
+
+    def observe(self, features_list):
+        """Queue inputs for the server's drift monitor without a round trip of their own"""
+        with self._lock:
+            room = Config.PREDICTION_CACHE_SIZE - len(self._observations)
+            self._observations.extend(list(features_list)[:max(room, 0)])
+
+    def explain_batch(self, features_list):
+        """Per-feature attributions computed by the inference process"""
+        response = self._request({'op': 'explain', 'batch': list(features_list)})
+        if not response.get('ok'):
+            raise RuntimeError(f"Explanation failed: {response.get('error')}")
+        return response['results']
+
+    def explain(self, features):
+        return self.explain_batch([features])[0]
+
+    def drift_report(self):
+        """PSI per feature and holdout metrics from the inference process"""
+        response = self._request({'op': 'drift'})
+        return response['psi'], response['evaluation']
+
+    def unload(self):
+        """Close this process's connections (the inference process keeps its models)"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for sock, conn in connections:
+            for closable in (conn, sock):
+                try:
+                    closable.close()
+                except OSError:
+                    pass
+        self._local = threading.local()
+
+def _to_json(value):
+    """numpy scalars and other non-JSON feature values"""
+    return value.item() if hasattr(value, 'item') else str(value)
@@ -0,0 +1,301 @@
+"""
+Shared inference service for quality predictions.
+
+In multi-worker deployments (Config.PREDICTOR_BACKEND = "remote") every Streamlit
+worker talks to this one process instead of loading its own copy of the models.
+Concurrent prediction requests are collected into micro-batches (up to
+Config.INFERENCE_MAX_BATCH within Config.INFERENCE_BATCH_WINDOW_MS) and scored
+with one model call per batch. Models saved by a retrain in another process are
+swapped in within Config.MODEL_RELOAD_CHECK_SECONDS, without a restart.
+
+Two protocols share the listening socket (Unix socket path or host:port):
+
+  JSON lines, used by RemotePredictor over a persistent connection
+    {"op": "predict", "features": {...}}          ->  {"ok": true, "result": {...}, "model_version": ...}
+    {"op": "predict_batch", "batch": [{...}]}      ->  {"ok": true, "results": [...], "model_version": ...}
+    {"op": "explain", "batch": [{...}]}            ->  {"ok": true, "results": [...]}
+    {"op": "ping"} / {"op": "health"} / {"op": "metrics"} / {"op": "drift"}
+  Any request may carry "observe": [{...}], inputs a client answered from its
+  prediction cache, which are added to the drift monitor before the op runs.
+
+  HTTP/1.1, for health checks and ad-hoc use
+    GET /health, GET /metrics, POST /predict with {"features": {...}} or {"batch": [...]}
+
+Run from the application directory (so models/ resolves the same way):
+    python -m utils.inference_server --address 127.0.0.1:8765
+    curl http://127.0.0.1:8765/metrics
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils.instrumentation import LatencyStats
+
+HTTP_METHODS = (b'GET ', b'POST ', b'HEAD ')
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+def parse_address(address):
+    """('unix', path) or ('tcp', (host, port)) from 'path/to.sock' or 'host:port'"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return 'tcp', (host or '127.0.0.1', int(port))
+    return 'unix', address
+
+def address_in_use(path):
+    """True when something is accepting connections on the Unix socket path"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+
+class InferenceServer:
+    """asyncio front end; batches run on one worker thread so the event loop stays responsive"""
+
+    def __init__(self, predictor, address=Config.INFERENCE_ADDRESS,
+                 batch_window_ms=Config.INFERENCE_BATCH_WINDOW_MS, max_batch=Config.INFERENCE_MAX_BATCH):
+        self.predictor = predictor
+        self.address = address
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch = max_batch
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='inference')
+        self.queue = None
+        self.started_at = time.time()
+        self.request_latency = LatencyStats()  # enqueue to result
+        self.batch_latency = LatencyStats()  # model time per batch
+        self.batch_sizes = Counter()
+        self.predictions = 0
+        self.errors = 0
+
+    # ------------------------------------------------------------------ batching
+
+    async def predict(self, features_list):
+        """Queue feature dicts for the batcher and wait for their results"""
+        loop = asyncio.get_running_loop()
+        for features in features_list:
+            if not isinstance(features, dict):
+                raise ValueError("features must be an object of feature name to value")
+        futures = []
+        for features in features_list:
+            future = loop.create_future()
+            self.queue.put_nowait((features, future, time.perf_counter()))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                # Unlike wait_for on 3.11, a timeout here cannot discard an item already taken
+                # off the queue: a cancelled get() leaves its item queued
+                try:
+                    async with asyncio.timeout(remaining):
+                        batch.append(await self.queue.get())
+                except TimeoutError:
+                    break
+
+            features_list = [features for features, _, _ in batch]
+            started = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.predictor.predict_batch, features_list)
+            except Exception:
+                # One client's bad features must not fail the others: score the batch item by item
+                results = await loop.run_in_executor(self.executor, self.predict_each, features_list)
+
+            finished = time.perf_counter()
+            self.batch_latency.add((finished - started) * 1000)
+            self.batch_sizes[len(batch)] += 1
+            for (_, future, queued), result in zip(batch, results):
+                self.request_latency.add((finished - queued) * 1000)
+                if isinstance(result, Exception):
+                    self.errors += 1
+                    if not future.done():
+                        future.set_exception(result)
+                    continue
+                self.predictions += 1
+                if not future.done():
+                    future.set_result(result)
+
+    def predict_each(self, features_list):
+        """Result or exception per feature dict, after a batch call failed"""
+        results = []
+        for features in features_list:
+            try:
+                results.append(self.predictor.predict_batch([features])[0])
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # ------------------------------------------------------------------ endpoints
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'loaded': self.predictor.is_trained,
+            'model_version': self.predictor.model_version,
+            'pid': os.getpid(),
+            'uptime_seconds': round(time.time() - self.started_at, 1),
+            'queued': self.queue.qsize() if self.queue else 0
+        }
+
+    def metrics(self):
+        batches = sum(self.batch_sizes.values())
+        return {
+            'predictions': self.predictions,
+            'errors': self.errors,
+            'batches': batches,
+            'avg_batch_size': round(sum(size * count for size, count in self.batch_sizes.items()) / batches, 2)
+                              if batches else None,
+            'batch_sizes': {str(size): count for size, count in sorted(self.batch_sizes.items())},
+            'request_latency_ms': self.request_latency.to_dict(),
+            'batch_latency_ms': self.batch_latency.to_dict(),
+            'batch_window_ms': self.batch_window * 1000,
+            'max_batch': self.max_batch
+        }
+
+    async def dispatch(self, request):
+        op = request.get('op')
+        if request.get('observe'):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self.executor, self.predictor.observe, request['observe'])
+        if op in ('ping', 'health'):
+            return dict(self.health(), ok=True)
+        if op == 'metrics':
+            return dict(self.metrics(), ok=True)
+        if op == 'predict':
+            result, = await self.predict([request['features']])
+            return {'ok': True, 'result': result, 'model_version': self.predictor.model_version}
+        if op == 'predict_batch':
+            results = await self.predict(request['batch'])
+            return {'ok': True, 'results': results, 'model_version': self.predictor.model_version}
+        if op == 'drift':
+            loop = asyncio.get_running_loop()
+            psi, evaluation = await loop.run_in_executor(self.executor, self.predictor.drift_report)
+            return {'ok': True, 'psi': psi, 'evaluation': evaluation}
+        if op == 'explain':
+            loop = asyncio.get_running_loop()
+            explanations = await loop.run_in_executor(self.executor, self.predictor.explain_batch, request['batch'])
+            return {'ok': True, 'results': explanations}
+        raise ValueError(f"Unknown op: {op}")
+
+    # ------------------------------------------------------------------ protocols
+
+    async def handle(self, reader, writer):
+        try:
+            line = await reader.readline()
+            if line.startswith(HTTP_METHODS):
+                await self.handle_http(line, reader, writer)
+                return
+            while line:
+                try:
+                    response = await self.dispatch(json.loads(line))
+                except Exception as e:
+                    response = {'ok': False, 'error': f"{type(e).__name__}: {e}"}
+                writer.write((json.dumps(response, default=float) + '\n').encode())
+                await writer.drain()
+                line = await reader.readline()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_http(self, request_line, reader, writer):
+        """One request per connection; enough HTTP for curl and load balancer health checks"""
+        method, path = request_line.decode('latin-1').split()[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get('content-length', 0) or 0))
+
+        status = 200
+        try:
+            if method == 'GET' and path == '/health':
+                payload = self.health()
+            elif method == 'GET' and path == '/metrics':
+                payload = self.metrics()
+            elif method == 'POST' and path == '/predict':
+                request = json.loads(body or b'{}')
+                if 'batch' in request:
+                    payload = {'results': await self.predict(request['batch'])}
+                else:
+                    payload, = await self.predict([request.get('features', {})])
+            else:
+                status, payload = 404, {'error': f"No route for {method} {path}"}
+        except (ValueError, KeyError) as e:
+            status, payload = 400, {'error': f"{type(e).__name__}: {e}"}
+        except Exception as e:
+            status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+
+        data = json.dumps(payload, default=float).encode()
+        writer.write(f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                     f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                     f"Connection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+
+    # ------------------------------------------------------------------ lifecycle
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        kind, target = parse_address(self.address)
+        if kind == 'unix':
+            if os.path.exists(target):
+                if address_in_use(target):
+                    raise RuntimeError(f"Inference server already running on {target}")
+                os.remove(target)  # stale socket from a previous run
+            os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+            return await asyncio.start_unix_server(self.handle, path=target)
+        return await asyncio.start_server(self.handle, *target)
+
+    async def serve(self):
+        server = await self.start()
+        print(f"Inference server listening on {self.address} (pid {os.getpid()})", flush=True)
+        loop = asyncio.get_running_loop()
+        batcher = loop.create_task(self.batcher())
+        # Load the models in the background; the first batch waits on the predictor lock
+        loop.run_in_executor(self.executor, self.predictor.ensure_loaded)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--address', default=Config.INFERENCE_ADDRESS, help="Unix socket path or host:port")
+    parser.add_argument('--batch-window-ms', type=float, default=Config.INFERENCE_BATCH_WINDOW_MS)
+    parser.add_argument('--max-batch', type=int, default=Config.INFERENCE_MAX_BATCH)
+    args = parser.parse_args()
+
+    from utils.quality_models import QualityPredictor
+    server = InferenceServer(QualityPredictor(), args.address, args.batch_window_ms, args.max_batch)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        kind, target = parse_address(args.address)
+        if kind == 'unix' and os.path.exists(target) and not address_in_use(target):
+            os.remove(target)
+
+if __name__ == '__main__':
+    main()
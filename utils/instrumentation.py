@@ -0,0 +1,262 @@
+import functools
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Latency histogram bucket upper bounds in milliseconds
+BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf')]
+
+# Frames from these files are skipped when looking for the caller of a query
+_SKIP_FILES = (os.path.abspath(__file__), os.sep + 'pandas' + os.sep, os.sep + 'sqlite3' + os.sep,
+               'contextlib.py', os.sep + 'streamlit' + os.sep)
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+def fingerprint(sql):
+    """Normalise SQL so executions differing only in literals/whitespace group together"""
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    return _IN_LIST.sub('(?...)', sql)
+
+_skipped_files = {}  # filename -> whether call_site() looks past its frames
+
+def call_site():
+    """First frame outside instrumentation, pandas, sqlite3 and contextlib"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        skipped = _skipped_files.get(filename)
+        if skipped is None:
+            skipped = _skipped_files[filename] = any(skip in filename for skip in _SKIP_FILES)
+        if not skipped:
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return 'unknown'
+
+class LatencyStats:
+    """Count, total, max and bucketed histogram of latencies"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.histogram = [0] * len(BUCKETS_MS)
+
+    def add(self, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.histogram[i] += 1
+                break
+
+    def percentile(self, q):
+        """Approximate percentile (bucket upper bound) from the histogram"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= target:
+                return bound if bound != float('inf') else self.max_ms
+        return self.max_ms
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.count, 3) if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 3),
+            'histogram': dict(zip([str(b) for b in BUCKETS_MS], self.histogram))
+        }
+
+class PerformanceRegistry:
+    """Process-wide store of query, call and page timings"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = True
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.queries = {}  # fingerprint -> {'latency', 'rows', 'call_sites', 'sql'}
+            self.calls = {}  # name -> LatencyStats
+            self.pages = {}  # page -> LatencyStats
+            self.started_at = datetime.now()
+
+    def record_query(self, sql, elapsed_ms, rows, site):
+        key = fingerprint(sql)
+        with self._lock:
+            entry = self.queries.get(key)
+            if entry is None:
+                entry = {'latency': LatencyStats(), 'rows': 0, 'call_sites': Counter()}
+                self.queries[key] = entry
+            entry['latency'].add(elapsed_ms)
+            entry['rows'] += rows
+            entry['call_sites'][site] += 1
+
+    def record_call(self, name, elapsed_ms):
+        with self._lock:
+            self.calls.setdefault(name, LatencyStats()).add(elapsed_ms)
+
+    def record_page(self, page, elapsed_ms):
+        with self._lock:
+            self.pages.setdefault(page, LatencyStats()).add(elapsed_ms)
+
+    def snapshot(self):
+        """Plain-dict view of everything recorded, slowest first"""
+        with self._lock:
+            queries = [
+                dict(fingerprint=key, rows=entry['rows'],
+                     call_sites=dict(entry['call_sites'].most_common(5)),
+                     **entry['latency'].to_dict())
+                for key, entry in self.queries.items()
+            ]
+            calls = [dict(name=name, **stats.to_dict()) for name, stats in self.calls.items()]
+            pages = [dict(page=page, **stats.to_dict()) for page, stats in self.pages.items()]
+            started_at = self.started_at
+
+        return {
+            'started_at': started_at.isoformat(),
+            'captured_at': datetime.now().isoformat(),
+            'queries': sorted(queries, key=lambda q: -q['total_ms']),
+            'calls': sorted(calls, key=lambda c: -c['total_ms']),
+            'pages': sorted(pages, key=lambda p: -p['total_ms'])
+        }
+
+    def dump_json(self, path=None):
+        """Serialise the snapshot; also write it to path when given"""
+        data = json.dumps(self.snapshot(), indent=2, default=str)
+        if path:
+            with open(path, 'w') as f:
+                f.write(data)
+        return data
+
+registry = PerformanceRegistry()
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor that times each statement as the time spent inside execute and the fetches of
+    its rows, so work the caller does between fetches, or before a half-read cursor is
+    closed or collected, is not counted as query latency
+    """
+
+    _pending = None  # [sql, elapsed_ms, rows, site]
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            registry.record_query(*pending)
+
+    def _execute(self, method, sql, parameters):
+        self._finish()
+        if not registry.enabled:
+            return method(sql, parameters)
+        started = time.perf_counter()
+        result = method(sql, parameters)
+        self._pending = [sql, (time.perf_counter() - started) * 1000, 0, call_site()]
+        # Statements without a result set are complete once executed
+        if self.description is None:
+            self._pending[2] = max(self.rowcount, 0)
+            self._finish()
+        return result
+
+    def execute(self, sql, parameters=()):
+        return self._execute(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._execute(super().executemany, sql, seq_of_parameters)
+
+    def _count(self, started, rows, exhausted):
+        pending = self._pending
+        pending[1] += (time.perf_counter() - started) * 1000
+        pending[2] += rows
+        if exhausted:
+            self._finish()
+
+    def fetchone(self):
+        if self._pending is None:
+            return super().fetchone()
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._count(started, 1 if row is not None else 0, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        if self._pending is None:
+            return super().fetchmany(size)
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._count(started, len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        if self._pending is None:
+            return super().fetchall()
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._count(started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        if self._pending is None:
+            return super().__next__()
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._count(started, 0, True)
+            raise
+        self._count(started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors (including conn.execute shortcuts) are instrumented"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def timed(name):
+    """Decorator recording the latency of a function call under name"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.record_call(name, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorator
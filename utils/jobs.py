@@ -0,0 +1,108 @@
+"""
+Periodic background jobs and the process-wide scheduler that runs them.
+
+    python -m utils.jobs --list          # schedules and last outcomes
+    python -m utils.jobs --run NAME      # run one job now and wait for it
+    python -m utils.jobs --serve         # run the scheduler in the foreground
+
+Job functions are top-level and take no arguments, so the process executor can
+start them by dotted path in a fresh interpreter.
+"""
+import argparse
+import glob
+import os
+from datetime import datetime
+from config import Config
+from database import db
+from utils.scheduler import Job, Scheduler
+
+def score_maintenance():
+    """Rescore station failure risk and refresh predictions and next_maintenance dates on every line"""
+    from utils.maintenance import refresh_predictions
+    return db.fan_out(refresh_predictions)
+
+def refresh_kpis():
+    """Rebuild report cube days changed since the last refresh on every line"""
+    from utils.report_cubes import ReportCubeBuilder
+    return db.fan_out(lambda line: len(ReportCubeBuilder(line).refresh()))
+
+def export_parquet():
+    """Append new history rows to each line's Parquet store"""
+    from utils.parquet_store import ParquetExporter
+    return db.fan_out(lambda line: ParquetExporter(line, root=line.lines_config[line.line_id]['parquet_path']).export_all())
+
+def backup_database(directory=Config.BACKUP_DIR, keep=Config.BACKUP_KEEP):
+    """
+    Online backup of every line to <directory>/<line>/ with a timestamped name, removing all
+    but the newest keep backups of each line. Returns the new backup paths.
+    """
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    def backup(line):
+        line_directory = os.path.join(directory, line.line_id)
+        os.makedirs(line_directory, exist_ok=True)
+        path = os.path.join(line_directory, f"backup_{stamp}.db")
+        line.backup(path)
+        if keep:
+            for old in sorted(glob.glob(os.path.join(line_directory, 'backup_*.db')))[:-keep]:
+                os.remove(old)
+        return path
+
+    return list(db.fan_out(backup).values())
+
+def retrain_models():
+    """Train and save fresh quality models (runs in a worker process)"""
+    from utils.quality_models import QualityPredictor
+    result = QualityPredictor().train()
+    return result['evaluation']
+
+def reload_models(evaluation):
+    """Swap the newly saved models into this worker's predictor"""
+    from utils.quality_models import QualityPredictor, predictor
+    if isinstance(predictor, QualityPredictor):
+        predictor.reload()
+
+scheduler = Scheduler(db)
+for name, target, executor, after, description in [
+    ('score_maintenance', 'utils.jobs.score_maintenance', 'thread', None, "Predictive maintenance scoring"),
+    ('refresh_kpis', 'utils.jobs.refresh_kpis', 'thread', None, "Report cube refresh"),
+    ('export_parquet', 'utils.jobs.export_parquet', 'process', None, "Parquet history export"),
+    ('backup_database', 'utils.jobs.backup_database', 'thread', None, "Database backup"),
+    ('retrain_models', 'utils.jobs.retrain_models', 'process', 'utils.jobs.reload_models', "Quality model retraining")
+]:
+    scheduler.add(Job(name, Config.SCHEDULES.get(name), target, executor, after, description))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--list', action='store_true')
+    group.add_argument('--run', metavar='NAME', choices=sorted(scheduler.jobs))
+    group.add_argument('--serve', action='store_true')
+    args = parser.parse_args()
+
+    if args.list:
+        for job in scheduler.status():
+            print(f"{job['job']:<20} {job['schedule']:<15} next {job['next_run'] or '-':<20} "
+                  f"last {job['last_run_at'] or '-'} {job['last_status'] or ''}")
+    elif args.run:
+        scheduler.sync_jobs()
+        if not scheduler.run_now(args.run):
+            print(f"{args.run} is already running in another worker")
+            return
+        scheduler.stop()  # waits for the job and records its outcome
+        job = next(job for job in scheduler.status() if job['job'] == args.run)
+        print(f"{args.run}: {job['last_status']} in {job['last_duration_ms']:.0f} ms {job['last_error'] or ''}")
+    else:
+        import time
+        scheduler.start()
+        print(f"Scheduler running {len(scheduler.jobs)} jobs (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            scheduler.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+from datetime import date, datetime, timedelta
+import numpy as np
+import pandas as pd
+from config import Config
+from database import db
+
+STAT_COLUMNS = ['busy_hours', 'job_hours', 'jobs_started', 'queue_hours', 'queue_count']
+QUEUE_LOOKBACK_DAYS = 30  # how far back to find a unit's previous operation
+# Longest closed job a window can reach back to (4x the slowest station's planned cycle);
+# bounds the start_time range scan, since closed jobs otherwise match from the start of history
+MAX_JOB_HOURS = 4 * max(station['cycle_time'] for station in Config.STATIONS)
+
+def to_hours(values, origin):
+    """Convert datetime-like values to float hours since origin"""
+    return (pd.to_datetime(values) - origin) / pd.Timedelta(hours=1)
+
+def overlap_hours(starts, ends, points):
+    """
+    Total interval time up to each point, summed over (possibly overlapping) intervals.
+
+    Computed from sorted starts/ends with prefix sums, so evaluating many points is
+    O((n + m) log n) with no per-interval loop.
+    """
+    starts = np.sort(starts)
+    ends = np.sort(ends)
+    start_prefix = np.concatenate([[0.0], np.cumsum(starts)])
+    end_prefix = np.concatenate([[0.0], np.cumsum(ends)])
+    n_started = np.searchsorted(starts, points, side='right')
+    n_ended = np.searchsorted(ends, points, side='right')
+    return (n_started * points - start_prefix[n_started]) - (n_ended * points - end_prefix[n_ended])
+
+def merge_intervals(starts, ends):
+    """Union of intervals as non-overlapping (starts, ends), via a sorted sweep"""
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts)
+    starts, ends = starts[order], ends[order]
+    running_end = np.maximum.accumulate(ends)
+    new_segment = np.concatenate([[True], starts[1:] > running_end[:-1]])
+    segment_ids = np.cumsum(new_segment) - 1
+    merged_ends = np.zeros(segment_ids[-1] + 1)
+    np.maximum.at(merged_ends, segment_ids, ends)
+    return starts[new_segment], merged_ends
+
+class LineFlowAnalyzer:
+    """Station utilisation, queue time, WIP and shifting bottleneck replayed from assembly_tracking"""
+
+    def __init__(self, database):
+        self.db = database
+
+    def load_jobs(self, start, end):
+        """Jobs overlapping [start, end) with a resolved end time"""
+        earliest = start - pd.Timedelta(hours=MAX_JOB_HOURS)
+        with self.db.get_connection() as conn:
+            # Closed jobs from a bounded start_time range; open ones from the partial open-jobs index
+            jobs = pd.read_sql_query('''
+                SELECT unit_id, station_id, start_time, end_time, cycle_time_hours
+                FROM assembly_tracking
+                WHERE start_time >= ? AND start_time < ?
+                AND end_time >= ?
+                UNION ALL
+                SELECT unit_id, station_id, start_time, end_time, cycle_time_hours
+                FROM assembly_tracking
+                WHERE end_time IS NULL
+            ''', conn, params=[earliest.isoformat(sep=' '), end.isoformat(sep=' '), start.isoformat(sep=' ')])
+
+        jobs['start_time'] = pd.to_datetime(jobs['start_time'], format='mixed')
+        # Open jobs without an end: use the recorded cycle time, else still running now
+        estimated_end = jobs['start_time'] + pd.to_timedelta(jobs['cycle_time_hours'], unit='h')
+        jobs['end_time'] = pd.to_datetime(jobs['end_time'], format='mixed') \
+            .fillna(estimated_end).fillna(pd.Timestamp(datetime.now()))
+        # Open jobs are filtered here: a start_time bound in SQL would steer it off the open-jobs index
+        jobs = jobs[(jobs['start_time'] < pd.Timestamp(end)) & (jobs['end_time'] >= pd.Timestamp(start))]
+        return jobs.sort_values(['unit_id', 'start_time']).reset_index(drop=True)
+
+    def compute_days(self, first_day, last_day):
+        """Replay jobs once and compute per-day, per-station statistics for an inclusive day range"""
+        origin = pd.Timestamp(first_day)
+        n_days = (last_day - first_day).days + 1
+        edges = np.arange(n_days + 1) * 24.0
+        day_labels = [(first_day + timedelta(days=i)).isoformat() for i in range(n_days)]
+
+        # Look back so queue times can see the previous operation's end
+        jobs = self.load_jobs(origin - pd.Timedelta(days=QUEUE_LOOKBACK_DAYS), origin + pd.Timedelta(days=n_days))
+        rows = []
+        if jobs.empty:
+            # Still emit line-level rows so empty closed days get cached too
+            rows = [(day, 0, 0.0, 0.0, 0, 0.0, 0) for day in day_labels]
+            return pd.DataFrame(rows, columns=['day', 'station_id'] + STAT_COLUMNS)
+
+        starts = to_hours(jobs['start_time'], origin).to_numpy()
+        ends = to_hours(jobs['end_time'], origin).to_numpy()
+
+        # Queue time: gap between a unit's previous operation ending and the next one starting
+        previous_end = jobs.groupby('unit_id')['end_time'].shift()
+        queue = ((jobs['start_time'] - previous_end) / pd.Timedelta(hours=1)).clip(lower=0)
+        start_day_index = np.floor(starts / 24).astype(int)
+
+        for station_id, index in jobs.groupby('station_id').indices.items():
+            s, e = starts[index], ends[index]
+            merged_s, merged_e = merge_intervals(s, e)
+            busy = np.diff(overlap_hours(merged_s, merged_e, edges))
+            job_hours = np.diff(overlap_hours(s, e, edges))
+
+            in_range = (start_day_index[index] >= 0) & (start_day_index[index] < n_days)
+            day_index = start_day_index[index][in_range]
+            jobs_started = np.bincount(day_index, minlength=n_days)
+            station_queue = queue.to_numpy()[index][in_range]
+            has_queue = ~np.isnan(station_queue)
+            queue_hours = np.bincount(day_index[has_queue], weights=station_queue[has_queue], minlength=n_days)
+            queue_count = np.bincount(day_index[has_queue], minlength=n_days)
+
+            for i, day in enumerate(day_labels):
+                rows.append((day, int(station_id), busy[i], job_hours[i], int(jobs_started[i]),
+                             queue_hours[i], int(queue_count[i])))
+
+        # Line-level WIP: a unit is on the line from its first start to its last end
+        units = jobs.groupby('unit_id').agg(first=('start_time', 'min'), last=('end_time', 'max'))
+        unit_hours = np.diff(overlap_hours(to_hours(units['first'], origin).to_numpy(),
+                                           to_hours(units['last'], origin).to_numpy(), edges))
+        for i, day in enumerate(day_labels):
+            rows.append((day, 0, 0.0, unit_hours[i], 0, 0.0, 0))
+
+        return pd.DataFrame(rows, columns=['day', 'station_id'] + STAT_COLUMNS)
+
+    def daily_stats(self, first_day, last_day):
+        """Per-day statistics, served from line_day_stats for closed days and replayed otherwise"""
+        today = date.today()
+        with self.db.get_connection() as conn:
+            cached = pd.read_sql_query('''
+                SELECT * FROM line_day_stats WHERE day >= ? AND day <= ?
+            ''', conn, params=[first_day.isoformat(), last_day.isoformat()])
+
+        cached_days = set(cached['day'])
+        missing = [first_day + timedelta(days=i) for i in range((last_day - first_day).days + 1)]
+        missing = [d for d in missing if d.isoformat() not in cached_days]
+        if not missing:
+            return cached
+
+        # One replay over the span of missing days; only closed days are written back
+        fresh = self.compute_days(min(missing), max(missing))
+        fresh = fresh[fresh['day'].isin({d.isoformat() for d in missing})]
+        closed = fresh[fresh['day'] < today.isoformat()]
+        if not closed.empty:
+            with self.db.get_connection() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO line_day_stats (day, station_id, busy_hours, job_hours,
+                                                           jobs_started, queue_hours, queue_count)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', closed.itertuples(index=False, name=None))
+                conn.commit()
+
+        return pd.concat([cached, fresh], ignore_index=True)
+
+    def summary(self, first_day, last_day):
+        """Per-station utilisation and queue time, average WIP and the daily (shifting) bottleneck"""
+        daily = self.daily_stats(first_day, last_day)
+        n_days = (last_day - first_day).days + 1
+        station_names = {s['id']: s['name'] for s in Config.STATIONS}
+
+        line = daily[daily['station_id'] == 0]
+        stations = daily[daily['station_id'] != 0]
+
+        per_station = stations.groupby('station_id')[STAT_COLUMNS].sum()
+        per_station['utilisation'] = per_station['busy_hours'] / (24.0 * n_days)
+        per_station['avg_active_jobs'] = per_station['job_hours'] / (24.0 * n_days)
+        per_station['avg_queue_hours'] = per_station['queue_hours'] / per_station['queue_count'].where(per_station['queue_count'] > 0)
+        per_station['station'] = [station_names.get(i, str(i)) for i in per_station.index]
+
+        # Shifting bottleneck: the most utilised station each day (busy days only)
+        busiest = stations[stations['busy_hours'] > 0]
+        daily_bottleneck = busiest.loc[busiest.groupby('day')['busy_hours'].idxmax(), ['day', 'station_id', 'busy_hours']] \
+            if not busiest.empty else pd.DataFrame(columns=['day', 'station_id', 'busy_hours'])
+        daily_bottleneck['station'] = daily_bottleneck['station_id'].map(station_names)
+        shares = daily_bottleneck['station'].value_counts(normalize=True)
+        per_station['bottleneck_share'] = per_station['station'].map(shares).fillna(0.0)
+
+        return {
+            'stations': per_station.reset_index(),
+            'avg_wip': line['job_hours'].sum() / (24.0 * n_days),
+            'daily_wip': line.assign(wip=line['job_hours'] / 24.0)[['day', 'wip']].sort_values('day'),
+            'daily_bottleneck': daily_bottleneck.sort_values('day').reset_index(drop=True),
+            'bottleneck': shares.index[0] if not shares.empty else None
+        }
+
+    def wip_series(self, start, end, freq_hours=1):
+        """Units on the line sampled every freq_hours between start and end"""
+        origin = pd.Timestamp(start)
+        jobs = self.load_jobs(origin - pd.Timedelta(days=QUEUE_LOOKBACK_DAYS), pd.Timestamp(end))
+        points = np.arange(0, (pd.Timestamp(end) - origin) / pd.Timedelta(hours=1), freq_hours)
+        if jobs.empty:
+            return pd.DataFrame({'time': origin + pd.to_timedelta(points, unit='h'), 'wip': 0})
+        units = jobs.groupby('unit_id').agg(first=('start_time', 'min'), last=('end_time', 'max'))
+        first = np.sort(to_hours(units['first'], origin).to_numpy())
+        last = np.sort(to_hours(units['last'], origin).to_numpy())
+        wip = np.searchsorted(first, points, side='right') - np.searchsorted(last, points, side='right')
+        return pd.DataFrame({'time': origin + pd.to_timedelta(points, unit='h'), 'wip': wip})
+
+# Initialize line flow analyzer
+line_flow = LineFlowAnalyzer(db)
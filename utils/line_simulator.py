@@ -0,0 +1,278 @@
+import heapq
+import math
+from bisect import bisect_left
+from collections import deque
+import numpy as np
+import pandas as pd
+from config import Config
+from utils.shift_calendar import ShiftCalendar
+
+HOURS_PER_MONTH = 30 * 24
+
+class WorkCalendar:
+    """Maps wall-clock hours (t=0 is midnight) to cumulative working hours for a set of shifts"""
+
+    def __init__(self, shift_ids=None, shifts=Config.SHIFTS):
+        shift_ids = list(shifts) if shift_ids is None else shift_ids
+        self.mask = ShiftCalendar(shifts).hour_mask(shift_ids)
+        self.cumulative = [0]
+        for working in self.mask:
+            self.cumulative.append(self.cumulative[-1] + working)
+        self.hours_per_day = self.cumulative[-1]
+        if self.hours_per_day == 0:
+            raise ValueError("At least one shift must be active")
+
+    def work_until(self, t):
+        """Working hours elapsed between t=0 and wall-clock time t"""
+        day, hour = divmod(t, 24)
+        whole_hour = int(hour)
+        return (day * self.hours_per_day + self.cumulative[whole_hour]
+                + self.mask[whole_hour] * (hour - whole_hour))
+
+    def time_at_work(self, work):
+        """Earliest wall-clock time at which the given amount of working hours has elapsed"""
+        day = int(work // self.hours_per_day)
+        remaining = work - day * self.hours_per_day
+        if remaining == 0 and day > 0:
+            day -= 1
+            remaining = self.hours_per_day
+        index = bisect_left(self.cumulative, remaining)
+        hour = max(index - 1, 0)
+        return day * 24 + hour + (remaining - self.cumulative[hour])
+
+    def advance(self, t, work_hours):
+        """Wall-clock time at which work_hours of shift time starting at t is finished"""
+        return self.time_at_work(self.work_until(t) + work_hours)
+
+class LineSimulator:
+    """
+    Discrete-event model of the assembly line.
+
+    Units flow through the stations in sequence with stochastic (lognormal) cycle times,
+    occasional rework, random breakdowns and planned maintenance. Stations only work
+    during the active shifts; work in progress pauses off-shift and while a station is down.
+    WIP on the line is capped (CONWIP), so releases keep the first station fed.
+    """
+
+    FINISH, BREAKDOWN, MAINTENANCE, REPAIR, RELEASE = range(5)
+
+    def __init__(self, stations=None, shifts=None, params=None, seed=None):
+        self.params = dict(Config.SIMULATION, **(params or {}))
+        self.stations = [
+            dict({'capacity': 1,
+                  'mtbf_hours': self.params['mtbf_hours'],
+                  'repair_hours': self.params['repair_hours']}, **station)
+            for station in (stations or Config.STATIONS)
+        ]
+        self.calendar = WorkCalendar(shifts)
+        self.rng = np.random.default_rng(seed)
+
+    def sample_cycle_time(self, nominal):
+        cv = self.params['cycle_time_cv']
+        if cv <= 0:
+            return nominal
+        sigma = math.sqrt(math.log(1 + cv * cv))
+        return float(self.rng.lognormal(math.log(nominal) - sigma * sigma / 2, sigma))
+
+    def run(self, days=365, warmup_days=30, release_interval_hours=None):
+        """Simulate the line for the given number of days and return summary statistics"""
+        horizon = days * 24.0
+        calendar = self.calendar
+        events = []
+        seq = 0
+
+        def schedule(time, kind, *payload):
+            nonlocal seq
+            seq += 1
+            heapq.heappush(events, (time, seq, kind, payload))
+
+        state = [{
+            'queue': deque(),
+            'jobs': {},  # bay -> job
+            'down_until': None,
+            'busy_work': 0.0,
+            'downtime': 0.0,
+            'waits': 0.0,
+            'started': 0,
+            'rework_jobs': 0,
+            'max_queue': 0
+        } for _ in self.stations]
+
+        now = 0.0
+        wip = 0
+        wip_area = 0.0
+        next_unit = 0
+        unit_start = {}
+        completions = []
+
+        def start_jobs(index):
+            station = self.stations[index]
+            s = state[index]
+            if s['down_until'] is not None:
+                return
+            for bay in range(station['capacity']):
+                if not s['queue']:
+                    return
+                if bay in s['jobs']:
+                    continue
+                unit, arrived = s['queue'].popleft()
+                work = self.sample_cycle_time(station['cycle_time'])
+                if self.rng.random() < self.params['rework_probability']:
+                    work += self.params['rework_fraction'] * self.sample_cycle_time(station['cycle_time'])
+                    s['rework_jobs'] += 1
+                s['waits'] += now - arrived
+                s['started'] += 1
+                job = {'unit': unit, 'remaining': work, 'segment_start': now, 'version': 0}
+                s['jobs'][bay] = job
+                schedule(calendar.advance(now, work), self.FINISH, index, bay, 0)
+
+        def arrive(index, unit):
+            s = state[index]
+            s['queue'].append((unit, now))
+            s['max_queue'] = max(s['max_queue'], len(s['queue']))
+            start_jobs(index)
+
+        def release():
+            nonlocal wip, next_unit
+            unit = next_unit
+            next_unit += 1
+            wip += 1
+            unit_start[unit] = now
+            arrive(0, unit)
+
+        def take_down(index, hours):
+            s = state[index]
+            until = now + hours
+            if s['down_until'] is not None:
+                s['downtime'] += max(until - s['down_until'], 0)
+                s['down_until'] = max(s['down_until'], until)
+            else:
+                s['downtime'] += hours
+                s['down_until'] = until
+                # Pause jobs in progress, keeping their remaining work
+                for job in s['jobs'].values():
+                    done = calendar.work_until(now) - calendar.work_until(job['segment_start'])
+                    s['busy_work'] += done
+                    job['remaining'] -= done
+                    job['version'] += 1
+            schedule(s['down_until'], self.REPAIR, index)
+
+        # Initial events
+        for index, station in enumerate(self.stations):
+            if station['mtbf_hours']:
+                failure_work = self.rng.exponential(station['mtbf_hours'])
+                schedule(calendar.time_at_work(failure_work), self.BREAKDOWN, index)
+            if self.params['planned_maintenance_days']:
+                # Stagger planned maintenance so stations are not all down together
+                offset = (index + 1) * self.params['planned_maintenance_days'] * 24 / (len(self.stations) + 1)
+                schedule(offset, self.MAINTENANCE, index)
+        if release_interval_hours:
+            schedule(0.0, self.RELEASE)
+        else:
+            for _ in range(self.params['max_wip']):
+                release()
+
+        while events:
+            time, _, kind, payload = heapq.heappop(events)
+            if time > horizon:
+                break
+            wip_area += wip * (time - now)
+            now = time
+
+            if kind == self.FINISH:
+                index, bay, version = payload
+                s = state[index]
+                job = s['jobs'].get(bay)
+                if job is None or job['version'] != version:
+                    continue  # superseded by a breakdown
+                s['busy_work'] += calendar.work_until(now) - calendar.work_until(job['segment_start'])
+                del s['jobs'][bay]
+                unit = job['unit']
+                if index + 1 < len(self.stations):
+                    arrive(index + 1, unit)
+                else:
+                    wip -= 1
+                    completions.append((now, now - unit_start.pop(unit)))
+                    if not release_interval_hours:
+                        release()
+                start_jobs(index)
+
+            elif kind == self.BREAKDOWN:
+                index, = payload
+                station = self.stations[index]
+                take_down(index, station['repair_hours'])
+                next_failure = calendar.work_until(now + station['repair_hours']) + self.rng.exponential(station['mtbf_hours'])
+                schedule(calendar.time_at_work(next_failure), self.BREAKDOWN, index)
+
+            elif kind == self.MAINTENANCE:
+                index, = payload
+                take_down(index, self.params['planned_maintenance_hours'])
+                schedule(now + self.params['planned_maintenance_days'] * 24, self.MAINTENANCE, index)
+
+            elif kind == self.REPAIR:
+                index, = payload
+                s = state[index]
+                if s['down_until'] is None or now < s['down_until']:
+                    continue  # downtime was extended by a later event
+                s['down_until'] = None
+                for bay, job in s['jobs'].items():
+                    job['segment_start'] = now
+                    schedule(calendar.advance(now, job['remaining']), self.FINISH, index, bay, job['version'])
+                start_jobs(index)
+
+            elif kind == self.RELEASE:
+                if wip < self.params['max_wip']:
+                    release()
+                schedule(now + release_interval_hours, self.RELEASE)
+
+        # Close the books at the horizon
+        wip_area += wip * (horizon - now)
+        available = calendar.work_until(horizon)
+        for index, s in enumerate(state):
+            if s['down_until'] is None:
+                for job in s['jobs'].values():
+                    s['busy_work'] += calendar.work_until(horizon) - calendar.work_until(job['segment_start'])
+            s['downtime'] -= max((s['down_until'] or 0) - horizon, 0)
+
+        return self.summarise(state, completions, wip_area, horizon, available, warmup_days, next_unit)
+
+    def summarise(self, state, completions, wip_area, horizon, available, warmup_days, units_started):
+        warmup = min(warmup_days * 24.0, horizon)
+        measured = [c for c in completions if c[0] >= warmup]
+        measured_months = (horizon - warmup) / HOURS_PER_MONTH
+
+        monthly = [0] * int(math.ceil(horizon / HOURS_PER_MONTH))
+        for finished, _ in completions:
+            monthly[min(int(finished // HOURS_PER_MONTH), len(monthly) - 1)] += 1
+
+        stations = pd.DataFrame([{
+            'station_id': station['id'],
+            'station': station['name'],
+            'capacity': station['capacity'],
+            'utilisation': s['busy_work'] / (available * station['capacity']) if available else 0.0,
+            'avg_queue_hours': s['waits'] / s['started'] if s['started'] else 0.0,
+            'max_queue': s['max_queue'],
+            'downtime_hours': s['downtime'],
+            'rework_jobs': s['rework_jobs']
+        } for station, s in zip(self.stations, state)])
+
+        throughput = len(measured) / measured_months if measured_months > 0 else 0.0
+        return {
+            'horizon_days': horizon / 24,
+            'units_started': units_started,
+            'units_completed': len(completions),
+            'monthly_throughput': monthly,
+            'avg_monthly_throughput': throughput,
+            'target_monthly_production': Config.TARGET_MONTHLY_PRODUCTION,
+            'meets_target': throughput >= Config.TARGET_MONTHLY_PRODUCTION,
+            'avg_flow_time_hours': float(np.mean([c[1] for c in measured])) if measured else None,
+            'avg_wip': wip_area / horizon if horizon else 0.0,
+            'bottleneck': stations.loc[stations['utilisation'].idxmax(), 'station'],
+            'stations': stations
+        }
+
+def simulate_line(days=365, shifts=None, station_overrides=None, params=None, seed=None, **run_kwargs):
+    """Run one replication with optional per-station overrides, e.g. {5: {'capacity': 2}}"""
+    stations = [dict(s, **(station_overrides or {}).get(s['id'], {})) for s in Config.STATIONS]
+    simulator = LineSimulator(stations=stations, shifts=shifts, params=params, seed=seed)
+    return simulator.run(days=days, **run_kwargs)
@@ -0,0 +1,104 @@
+import math
+from datetime import datetime, timedelta
+import pandas as pd
+from config import Config
+
+# Recommended action for the factor contributing most to a station's risk
+RISK_ACTIONS = {
+    'maintenance_age': "Planned maintenance due - schedule station service",
+    'defect_rate': "Rising defect rate - inspect tooling and fixtures",
+    'rework_ratio': "High rework - review process steps and calibration",
+    'sensor_alerts': "Repeated sensor alerts - check station equipment",
+    'vibration': "Elevated vibration - inspect rotating equipment and mounts",
+    'critical': "Critical station - schedule preventive inspection"
+}
+
+def station_risk(database, now=None):
+    """Failure probability per station from maintenance age, defects, rework and sensor readings"""
+    now = now or datetime.now()
+    planned_days = Config.SIMULATION['planned_maintenance_days']
+    weights = Config.MAINTENANCE_RISK_WEIGHTS
+
+    with database.get_connection() as conn:
+        stations = pd.read_sql_query('''
+            SELECT s.id as station_id, s.name, s.critical, s.last_maintenance,
+                   julianday(?) - julianday(s.last_maintenance) as days_since_maintenance,
+                   (SELECT AVG(COALESCE(at.defects, 0)) FROM assembly_tracking at
+                     WHERE at.station_id = s.id AND at.start_time >= ?) as defect_rate,
+                   (SELECT AVG(COALESCE(at.rework_hours, 0)) FROM assembly_tracking at
+                     WHERE at.station_id = s.id AND at.start_time >= ?) / s.target_cycle_time as rework_ratio,
+                   (SELECT COUNT(*) FROM sensor_data sd
+                     WHERE sd.station_id = s.id AND sd.timestamp >= ? AND sd.alert_level > 0) as sensor_alerts,
+                   (SELECT AVG(sd.value) FROM sensor_data sd
+                     WHERE sd.station_id = s.id AND sd.timestamp >= ? AND sd.sensor_type = 'vibration') as vibration
+            FROM stations s
+            ORDER BY s.id
+        ''', conn, params=[
+            now,
+            now - timedelta(days=Config.MAINTENANCE_LOOKBACK_DAYS),
+            now - timedelta(days=Config.MAINTENANCE_LOOKBACK_DAYS),
+            now - timedelta(hours=Config.MAINTENANCE_SENSOR_HOURS),
+            now - timedelta(hours=Config.MAINTENANCE_SENSOR_HOURS)
+        ])
+
+    factors = pd.DataFrame({
+        'maintenance_age': stations['days_since_maintenance'].fillna(planned_days) / planned_days,
+        'defect_rate': stations['defect_rate'].fillna(0),
+        'rework_ratio': stations['rework_ratio'].fillna(0),
+        'sensor_alerts': stations['sensor_alerts'],
+        'vibration': (stations['vibration'] - Config.FEATURE_DEFAULTS['vibration_level']).clip(lower=0).fillna(0),
+        'critical': stations['critical'].fillna(0).astype(float)
+    })
+    contributions = factors * pd.Series({name: weights[name] for name in factors.columns})
+
+    stations['failure_probability'] = [1 / (1 + math.exp(-(weights['intercept'] + z))) for z in contributions.sum(axis=1)]
+    stations['main_factor'] = contributions.idxmax(axis=1)
+    return stations
+
+def refresh_predictions(database, now=None):
+    """
+    Replace the open (unacknowledged) predictions with fresh scores and move each
+    station's next_maintenance to its planned date, or earlier when failure is predicted
+    sooner. A station whose alert was acknowledged since its last service is not
+    alerted again until it is serviced. Returns the number of predictions written.
+    """
+    now = now or datetime.now()
+    planned_days = Config.SIMULATION['planned_maintenance_days']
+    risk = station_risk(database, now)
+
+    with database.get_connection() as conn:
+        acknowledged = {row[0] for row in conn.execute('''
+            SELECT DISTINCT mp.station_id FROM maintenance_predictions mp
+            JOIN stations s ON s.id = mp.station_id
+            WHERE mp.acknowledged = 1 AND mp.created_at >= COALESCE(s.last_maintenance, '')
+        ''')}
+
+        conn.execute("DELETE FROM maintenance_predictions WHERE acknowledged = 0")
+        written = 0
+        for station in risk.itertuples():
+            last_maintenance = (datetime.fromisoformat(station.last_maintenance) if station.last_maintenance
+                                else now)
+            next_maintenance = (last_maintenance + timedelta(days=planned_days)).date()
+
+            probability = station.failure_probability
+            if probability >= Config.MAINTENANCE_ALERT_PROBABILITY:
+                # Higher risk, sooner failure: within the planned interval, scaled by (1 - p)^2
+                failure_date = (now + timedelta(days=planned_days * (1 - probability) ** 2)).date()
+                next_maintenance = min(next_maintenance, failure_date)
+                if station.station_id not in acknowledged:
+                    conn.execute('''
+                        INSERT INTO maintenance_predictions
+                        (station_id, predicted_failure_date, failure_probability, recommended_action,
+                         estimated_downtime_hours, created_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', (station.station_id, failure_date, round(probability, 4),
+                          RISK_ACTIONS[station.main_factor],
+                          round(Config.SIMULATION['planned_maintenance_hours']
+                                + probability * Config.SIMULATION['repair_hours'], 1),
+                          now))
+                    written += 1
+
+            conn.execute("UPDATE stations SET next_maintenance = ? WHERE id = ?",
+                         (next_maintenance, station.station_id))
+        conn.commit()
+    return written
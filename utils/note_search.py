@@ -0,0 +1,79 @@
+import re
+import pandas as pd
+
+# (source label, FTS table, content table, time column, kind column, bm25 column weights)
+SEARCH_SOURCES = [
+    ('log', 'production_logs_fts', 'production_logs', 'timestamp', 'event_type', (2.0, 1.0)),
+    ('job', 'assembly_notes_fts', 'assembly_tracking', 'start_time', 'quality_status', (1.0,))
+]
+
+def fts_query(text):
+    """
+    FTS5 expression from free text: "quoted phrases" stay phrases, every other word
+    is required, and the term being typed (a trailing word, or a phrase whose closing
+    quote is still missing, which runs to the end of the text) also matches as a prefix.
+    Operators and punctuation are never passed through, so any input is a valid query.
+    """
+    terms = []
+    # Splitting on quotes leaves phrases at odd positions; an unclosed one is the last part
+    parts = text.split('"')
+    for position, part in enumerate(parts):
+        if position % 2:
+            phrase = ' '.join(re.findall(r'\w+', part))
+            if phrase:
+                terms.append(f'"{phrase}"')
+        else:
+            terms += [f'"{w}"' for w in re.findall(r'\w+', part)]
+    last = parts[-1]
+    typing = len(parts) % 2 == 0 or bool(re.search(r'\w$', last.rstrip()))
+    if terms and typing:
+        terms[-1] += '*'
+    return ' '.join(terms) or None
+
+def search_notes(database, text, unit_id=None, station_id=None, start=None, end=None, limit=50):
+    """
+    Best bm25 matches across log text and job notes, optionally restricted to a unit,
+    station and [start, end) time range. Returns a DataFrame, best match first.
+
+    bm25 values of different FTS tables (and column weights) are not comparable, so
+    score is relative to the best match of the same source: 1.0 for each source's top hit.
+    """
+    query = fts_query(text)
+    if query is None:
+        return pd.DataFrame(columns=['source', 'id', 'time', 'unit_id', 'tail_number', 'station_id',
+                                     'kind', 'snippet', 'score'])
+
+    selects, params = [], []
+    for source, fts, table, time_column, kind_column, weights in SEARCH_SOURCES:
+        clauses = [f"{fts} MATCH ?", f"{fts}.rank MATCH 'bm25({', '.join(map(str, weights))})'"]
+        source_params = [query]
+        for column, op, value in [('unit_id', '=', unit_id), ('station_id', '=', station_id),
+                                  (time_column, '>=', start), (time_column, '<', end)]:
+            if value is not None:
+                clauses.append(f"t.{column} {op} ?")
+                source_params.append(value)
+        # Each source is ranked and cut to limit on its own, so FTS5 can stop early
+        # bm25 ranks are negative, best first: dividing by the best gives (0, 1]
+        selects.append(f'''
+            SELECT source, id, time, unit_id, station_id, kind, snippet,
+                   COALESCE(rank / NULLIF(MIN(rank) OVER (), 0), 1.0) AS score
+            FROM (
+                SELECT '{source}' AS source, t.id, t.{time_column} AS time, t.unit_id, t.station_id,
+                       t.{kind_column} AS kind, snippet({fts}, -1, '**', '**', '…', 16) AS snippet,
+                       {fts}.rank AS rank
+                FROM {fts} JOIN {table} t ON t.id = {fts}.rowid
+                WHERE {' AND '.join(clauses)}
+                ORDER BY {fts}.rank
+                LIMIT ?
+            )
+        ''')
+        params += source_params + [limit]
+
+    with database.get_connection() as conn:
+        return pd.read_sql_query(f'''
+            SELECT m.source, m.id, m.time, m.unit_id, u.tail_number, m.station_id, m.kind, m.snippet, m.score
+            FROM ({' UNION ALL '.join(selects)}) m
+            LEFT JOIN helicopter_units u ON u.id = m.unit_id
+            ORDER BY m.score DESC
+            LIMIT ?
+        ''', conn, params=params + [limit])
@@ -0,0 +1,115 @@
+from collections import namedtuple
+import pandas as pd
+
+Page = namedtuple('Page', ['rows', 'next_cursor', 'has_next'])
+
+class KeysetPaginator:
+    """
+    Newest-first keyset pagination over one table.
+
+    Pages are fetched with a (sort_column, id) < (?, ?) seek instead of OFFSET, so every
+    page costs the same index range scan regardless of how deep the operator has browsed.
+    filters maps a filter name to (column, operator), e.g. {'unit_id': ('unit_id', '=')}.
+    """
+
+    def __init__(self, database, table, columns, sort_column='id', id_column='id', filters=None, page_size=50):
+        self.db = database
+        self.table = table
+        self.columns = columns
+        self.sort_column = sort_column
+        self.id_column = id_column
+        self.filters = filters or {}
+        self.page_size = page_size
+
+    def build_where(self, filters, cursor):
+        clauses = []
+        params = []
+
+        for name, value in (filters or {}).items():
+            if value is None or value == '':
+                continue
+            if name not in self.filters:
+                raise ValueError(f"Unsupported filter for {self.table}: {name}")
+            column, op = self.filters[name]
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+
+        if cursor is not None:
+            if self.sort_column == self.id_column:
+                clauses.append(f"{self.id_column} < ?")
+                params.append(cursor[-1])
+            else:
+                clauses.append(f"({self.sort_column}, {self.id_column}) < (?, ?)")
+                params.extend(cursor)
+
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def fetch_page(self, filters=None, cursor=None, page_size=None):
+        """Fetch one page starting after cursor (None for the first page)"""
+        page_size = page_size or self.page_size
+        where, params = self.build_where(filters, cursor)
+        order = f"{self.id_column} DESC" if self.sort_column == self.id_column \
+            else f"{self.sort_column} DESC, {self.id_column} DESC"
+
+        columns = list(dict.fromkeys(self.columns + [self.sort_column, self.id_column]))
+        with self.db.get_connection() as conn:
+            rows = pd.read_sql_query(f'''
+                SELECT {', '.join(columns)}
+                FROM {self.table}
+                {where}
+                ORDER BY {order}
+                LIMIT ?
+            ''', conn, params=params + [page_size + 1])
+
+        has_next = len(rows) > page_size
+        rows = rows.iloc[:page_size]
+        next_cursor = None
+        if has_next:
+            last = rows.iloc[-1]
+            next_cursor = (last[self.sort_column], int(last[self.id_column]))
+
+        return Page(rows[self.columns], next_cursor, has_next)
+
+def production_log_paginator(database, page_size=50):
+    return KeysetPaginator(
+        database, 'production_logs',
+        ['id', 'timestamp', 'event_type', 'unit_id', 'station_id', 'description', 'user_id'],
+        sort_column='timestamp',
+        filters={
+            'event_type': ('event_type', '='),
+            'unit_id': ('unit_id', '='),
+            'station_id': ('station_id', '='),
+            'start': ('timestamp', '>='),
+            'end': ('timestamp', '<')
+        },
+        page_size=page_size
+    )
+
+def quality_check_paginator(database, page_size=20):
+    return KeysetPaginator(
+        database, 'quality_measurements',
+        ['id', 'measurement_time', 'station_id', 'checkpoint', 'parameter', 'value',
+         'tolerance_min', 'tolerance_max', 'status', 'operator_id'],
+        sort_column='measurement_time',
+        filters={
+            'unit_id': ('unit_id', '='),
+            'station_id': ('station_id', '='),
+            'status': ('status', '='),
+            'start': ('measurement_time', '>='),
+            'end': ('measurement_time', '<')
+        },
+        page_size=page_size
+    )
+
+def user_paginator(database, page_size=50):
+    return KeysetPaginator(
+        database, 'users',
+        ['id', 'username', 'full_name', 'role', 'station_id', 'shift_id', 'is_active', 'last_login'],
+        filters={
+            'role': ('role', '='),
+            'station_id': ('station_id', '='),
+            'shift_id': ('shift_id', '='),
+            'is_active': ('is_active', '=')
+        },
+        page_size=page_size
+    )
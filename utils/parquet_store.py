@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+from config import Config
+
+# Exported tables and the timestamp column used for month partitioning
+EXPORT_TABLES = {
+    'assembly_tracking': 'start_time',
+    'quality_measurements': 'measurement_time',
+    'sensor_data': 'timestamp'
+}
+
+PARTITIONING = ds.partitioning(
+    pa.schema([('month', pa.string()), ('station_id', pa.int64())]),
+    flavor='hive'
+)
+
+# Arrow type per SQLite declared type; the partition time column is stored as a timestamp
+SQLITE_TYPES = {'INTEGER': pa.int64(), 'FLOAT': pa.float64(), 'REAL': pa.float64()}
+
+def table_schema(conn, table):
+    """
+    Arrow schema of an exported table from its declared column types, so a chunk whose
+    column happens to be all NULL is not written with a null type
+    """
+    fields = []
+    for column in conn.execute(f"PRAGMA table_info({table})"):
+        if column['name'] == EXPORT_TABLES[table]:
+            arrow_type = pa.timestamp('us')
+        else:
+            arrow_type = SQLITE_TYPES.get(column['type'].upper(), pa.large_string())
+        fields.append((column['name'], arrow_type))
+    return pa.schema(fields + [('month', pa.string())])
+
+class ParquetExporter:
+    """Incrementally copies history tables into month/station partitioned Parquet files"""
+
+    def __init__(self, database, root=Config.PARQUET_PATH, chunk_size=Config.PARQUET_EXPORT_CHUNK):
+        self.db = database
+        self.root = root
+        self.chunk_size = chunk_size
+        self.watermark_path = os.path.join(root, '_watermarks.json')
+        os.makedirs(root, exist_ok=True)
+
+    def load_watermarks(self):
+        if not os.path.exists(self.watermark_path):
+            return {}
+        with open(self.watermark_path) as f:
+            return json.load(f)
+
+    def save_watermarks(self, watermarks):
+        # Write-then-rename so a crash never leaves a truncated watermark file
+        tmp_path = self.watermark_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(watermarks, f)
+        os.replace(tmp_path, self.watermark_path)
+
+    def write_rows(self, table, chunk, schema, existing_data_behavior='overwrite_or_ignore'):
+        """Write rows into their month/station partitions"""
+        time_column = EXPORT_TABLES[table]
+        chunk[time_column] = pd.to_datetime(chunk[time_column], errors='coerce', format='mixed')
+        chunk['month'] = chunk[time_column].dt.strftime('%Y-%m').fillna('unknown')
+        chunk['station_id'] = chunk['station_id'].astype('Int64')
+
+        first_id, last_id = int(chunk['id'].iloc[0]), int(chunk['id'].iloc[-1])
+        ds.write_dataset(
+            pa.Table.from_pandas(chunk, schema=schema, preserve_index=False),
+            os.path.join(self.root, table),
+            format='parquet',
+            partitioning=PARTITIONING,
+            basename_template=f'part-{first_id}-{last_id}-{{i}}.parquet',
+            existing_data_behavior=existing_data_behavior
+        )
+
+    def rewrite_changed(self, table, last_id, schema):
+        """
+        Rewrite the partitions holding exported rows (id <= last_id) that were updated or
+        deleted since, as marked in parquet_dirty; returns the number of partitions rewritten
+        """
+        time_column = EXPORT_TABLES[table]
+        with self.db.get_connection() as conn:
+            last_mark = conn.execute("SELECT MAX(rowid) FROM parquet_dirty WHERE table_name = ?",
+                                     (table,)).fetchone()[0]
+            if last_mark is None:
+                return 0
+            partitions = conn.execute('''
+                SELECT DISTINCT month, station_id FROM parquet_dirty WHERE table_name = ? AND rowid <= ?
+            ''', (table, last_mark)).fetchall() if last_id else []
+
+        for month, station_id in partitions:
+            with self.db.get_connection() as conn:
+                rows = pd.read_sql_query(f'''
+                    SELECT * FROM {table}
+                    WHERE id <= ? AND station_id IS ?
+                    AND COALESCE(strftime('%Y-%m', {time_column}), 'unknown') = ?
+                    ORDER BY id
+                ''', conn, params=[last_id, station_id, month])
+            if rows.empty:
+                station = '__HIVE_DEFAULT_PARTITION__' if station_id is None else station_id
+                directory = os.path.join(self.root, table, f"month={month}", f"station_id={station}")
+                if os.path.isdir(directory):
+                    shutil.rmtree(directory)
+            else:
+                # delete_matching replaces the files of the partitions being written
+                self.write_rows(table, rows, schema, existing_data_behavior='delete_matching')
+
+        with self.db.get_connection() as conn:
+            conn.execute("DELETE FROM parquet_dirty WHERE table_name = ? AND rowid <= ?", (table, last_mark))
+            conn.commit()
+        return len(partitions)
+
+    def export_table(self, table):
+        """
+        Rewrite partitions whose exported rows changed, then append rows added since the
+        last export; returns number of rows appended
+        """
+        watermarks = self.load_watermarks()
+        last_id = watermarks.get(table, 0)
+        with self.db.get_connection() as conn:
+            schema = table_schema(conn, table)
+        self.rewrite_changed(table, last_id, schema)
+        written = 0
+
+        while True:
+            with self.db.get_connection() as conn:
+                chunk = pd.read_sql_query(f'''
+                    SELECT * FROM {table}
+                    WHERE id > ?
+                    ORDER BY id
+                    LIMIT ?
+                ''', conn, params=[last_id, self.chunk_size])
+
+            if chunk.empty:
+                break
+
+            self.write_rows(table, chunk, schema)
+            last_id = int(chunk['id'].iloc[-1])
+
+            written += len(chunk)
+            watermarks[table] = last_id
+            self.save_watermarks(watermarks)
+
+            if len(chunk) < self.chunk_size:
+                break
+
+        return written
+
+    def export_all(self):
+        """Export every history table; returns rows written per table"""
+        return {table: self.export_table(table) for table in EXPORT_TABLES}
@@ -0,0 +1,34 @@
+import base64
+import hashlib
+import hmac
+import os
+from config import Config
+
+ALGORITHM = 'pbkdf2_sha256'
+
+def _encode(raw):
+    return base64.b64encode(raw).decode('ascii')
+
+def hash_password(password, iterations=Config.PASSWORD_HASH_ITERATIONS):
+    """Salted PBKDF2-SHA256 hash, stored as 'pbkdf2_sha256$iterations$salt$digest'"""
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return f"{ALGORITHM}${iterations}${_encode(salt)}${_encode(digest)}"
+
+def verify_password(password, stored):
+    """Constant-time check of password against a stored hash; malformed hashes never match"""
+    try:
+        algorithm, iterations, salt, digest = stored.split('$')
+        if algorithm != ALGORITHM:
+            return False
+        candidate = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), base64.b64decode(salt), int(iterations))
+        return hmac.compare_digest(candidate, base64.b64decode(digest))
+    except (AttributeError, ValueError):
+        return False
+
+def is_hashed(stored):
+    return isinstance(stored, str) and stored.startswith(ALGORITHM + '$')
+
+def needs_rehash(stored, iterations=Config.PASSWORD_HASH_ITERATIONS):
+    """True when the hash was made with a different cost than the configured one"""
+    return not is_hashed(stored) or stored.split('$')[1] != str(iterations)
@@ -0,0 +1,121 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+
+class PredictionCache:
+    """
+    LRU cache of quality predictions keyed on quantized feature vectors.
+
+    Continuous features are rounded to Config.PREDICTION_CACHE_BUCKETS widths, so
+    readings that barely moved between reruns share a key. Entries expire after the
+    TTL, and the whole cache is dropped when the predictor's model version changes.
+    Hits make no model call, but are still passed to predictor.observe() so the drift
+    monitor sees every live input; the version is read from each miss, and looked up
+    directly at most once per TTL when there are none.
+    """
+
+    def __init__(self, max_size=Config.PREDICTION_CACHE_SIZE, ttl=Config.PREDICTION_CACHE_TTL,
+                 buckets=Config.PREDICTION_CACHE_BUCKETS):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.buckets = dict(buckets)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (result, expires_at)
+        self.model_version = None
+        self._version_due = 0.0  # monotonic time the predictor's version is next looked up
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def key(self, features):
+        """Hashable, order-independent key with continuous features bucketed"""
+        items = []
+        for name in sorted(features):
+            value = features[name]
+            width = self.buckets.get(name)
+            if width and value is not None and not (isinstance(value, float) and math.isnan(value)):
+                value = int(math.floor(float(value) / width + 0.5))
+            elif hasattr(value, 'item'):
+                value = value.item()  # numpy scalar
+            items.append((name, value))
+        return tuple(items)
+
+    def check_version(self, model_version):
+        """Drop every entry when the model has been retrained or reloaded from different files"""
+        with self._lock:
+            if model_version != self.model_version:
+                if self._entries:
+                    self.invalidations += 1
+                self._entries.clear()
+                self.model_version = model_version
+            self._version_due = time.monotonic() + self.ttl
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            result, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def predict(self, predictor, features):
+        """predictor.predict_quality(features), served from the cache when a close input was seen"""
+        if time.monotonic() >= self._version_due:
+            predictor.ensure_loaded()  # one round trip for a remote predictor
+            self.check_version(predictor.last_model_version)
+        key = self.key(features)
+        result = self.get(key)
+        if result is None:
+            result = predictor.predict_quality(features)
+            # The version that produced this result, at no extra cost
+            self.check_version(predictor.last_model_version)
+            self.put(key, result)
+        else:
+            predictor.observe([features])
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'model_version': self.model_version
+            }
+
+# Process-wide cache shared by all sessions
+prediction_cache = PredictionCache()
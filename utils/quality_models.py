@@ -1,16 +1,68 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime
+from config import Config
+from utils.instrumentation import timed
+from utils.resources import resources
+
+# sklearn and joblib are imported inside train()/load_models() so importing this
+# module (and constructing the predictor) stays cheap until a prediction is needed
+
+# Production model settings (utils.model_evaluation searches around these)
+REGRESSOR_PARAMS = {'n_estimators': 100, 'max_depth': 15, 'min_samples_split': 10, 'random_state': 42}
+CLASSIFIER_PARAMS = {'n_estimators': 100, 'max_depth': 5, 'random_state': 42}
+
+# Each training run saves its models to MODEL_DIR/<version>/; the 'current' file names the live
+# version and is switched with one rename, so loaders never see a mix of two runs
+MODEL_DIR = 'models'
+CURRENT_MODELS = os.path.join(MODEL_DIR, 'current')
+MODEL_VERSIONS_KEEP = 2  # the previous set stays for loaders that read the old pointer
+
+def current_models():
+    """(version, directory) of the live model set; sets saved before versioning are in MODEL_DIR itself"""
+    if os.path.exists(CURRENT_MODELS):
+        with open(CURRENT_MODELS) as f:
+            version = f.read().strip()
+        return version, os.path.join(MODEL_DIR, version)
+    return str(os.stat(os.path.join(MODEL_DIR, 'quality_regressor.pkl')).st_mtime_ns), MODEL_DIR
+
+def save_models(files):
+    """Write {file name: object} as a new version and make it live; returns the version"""
+    import joblib
+    import shutil
+    
+    version = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+    directory = os.path.join(MODEL_DIR, version)
+    os.makedirs(directory)
+    for name, obj in files.items():
+        joblib.dump(obj, os.path.join(directory, name))
+    
+    tmp_path = f"{CURRENT_MODELS}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(version)
+    os.replace(tmp_path, CURRENT_MODELS)
+    
+    versions = sorted(name for name in os.listdir(MODEL_DIR)
+                      if name[:1].isdigit() and os.path.isdir(os.path.join(MODEL_DIR, name)))
+    for old in versions[:-MODEL_VERSIONS_KEEP]:
+        shutil.rmtree(os.path.join(MODEL_DIR, old), ignore_errors=True)
+    return version
 
 class QualityPredictor:
     def __init__(self):
         self.model = None
-        self.scaler = StandardScaler()
+        self.scaler = None
         self.is_trained = False
+        self.model_version = None  # changes whenever a different set of models is swapped in
+        self._explainers = None  # (model_version, quality explainer, defect explainer)
+        self.drift = None  # DriftMonitor of live inputs against the training distribution
+        self.evaluation = None  # holdout metrics from the last train()
+        self._checked_at = 0.0  # monotonic time the live version on disk was last compared
+        # Guards lazy load/train and the swap of model objects; predictions read a consistent set
+        self._lock = threading.RLock()
     
     def generate_training_data(self, n_samples=10000):
         """Generate realistic training data based on aerospace manufacturing"""
@@ -75,103 +127,234 @@ class QualityPredictor:
         
         return data
     
-    def train(self):
-        """Train the quality prediction model"""
+    @timed('predictor.train')
+    def train(self, n_samples=10000, holdout_fraction=Config.MODEL_HOLDOUT_FRACTION,
+              reg_params=None, clf_params=None):
+        """Train the quality prediction model on earlier rows and evaluate on the most recent ones"""
+        from sklearn.ensemble import RandomForestRegressor, GradientBoostingClassifier
+        from sklearn.preprocessing import StandardScaler
+        from utils.model_evaluation import DriftMonitor, holdout_metrics, time_holdout_split
+        
         print("Training quality prediction model...")
         
         # Generate training data
-        data = self.generate_training_data()
+        data = self.generate_training_data(n_samples)
+        train_data, holdout = time_holdout_split(data, holdout_fraction)
         
         # Prepare features
         feature_columns = [col for col in data.columns if col not in ['quality_score', 'has_defect']]
-        X = data[feature_columns]
-        y_reg = data['quality_score']
-        y_clf = data['has_defect']
+        X = train_data[feature_columns]
+        y_reg = train_data['quality_score']
+        y_clf = train_data['has_defect']
         
         # Scale features
-        X_scaled = self.scaler.fit_transform(X)
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
         
         # Train regression model for quality score
-        self.reg_model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=15,
-            min_samples_split=10,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.reg_model.fit(X_scaled, y_reg)
+        reg_model = RandomForestRegressor(**dict(REGRESSOR_PARAMS, n_jobs=-1, **(reg_params or {})))
+        reg_model.fit(X_scaled, y_reg)
         
         # Train classification model for defect prediction
-        self.clf_model = GradientBoostingClassifier(
-            n_estimators=100,
-            max_depth=5,
-            random_state=42
-        )
-        self.clf_model.fit(X_scaled, y_clf)
-        
-        self.is_trained = True
-        self.feature_columns = feature_columns
-        
-        # Save models
-        os.makedirs('models', exist_ok=True)
-        joblib.dump(self.reg_model, 'models/quality_regressor.pkl')
-        joblib.dump(self.clf_model, 'models/quality_classifier.pkl')
-        joblib.dump(self.scaler, 'models/scaler.pkl')
-        joblib.dump(self.feature_columns, 'models/feature_columns.pkl')
+        clf_model = GradientBoostingClassifier(**dict(CLASSIFIER_PARAMS, **(clf_params or {})))
+        clf_model.fit(X_scaled, y_clf)
+        
+        evaluation = holdout_metrics(reg_model, clf_model, scaler, holdout, feature_columns) if len(holdout) else None
+        drift = DriftMonitor().fit(X)
+        
+        # Save models, then swap them in together
+        with self._lock:
+            os.makedirs(MODEL_DIR, exist_ok=True)
+            version = save_models({
+                'quality_regressor.pkl': reg_model,
+                'quality_classifier.pkl': clf_model,
+                'scaler.pkl': scaler,
+                'feature_columns.pkl': feature_columns,
+                'training_reference.pkl': {'drift': drift.state(), 'evaluation': evaluation}
+            })
+            self._set_models(version, reg_model, clf_model, scaler, feature_columns)
+            self.drift = drift
+            self.evaluation = evaluation
         
         print("Model training complete!")
         
-        # Calculate training accuracy
-        train_pred = self.reg_model.predict(X_scaled)
-        train_accuracy = np.mean(np.abs(train_pred - y_reg) < 5)  # within 5 points
-        print(f"Training accuracy (within ±5): {train_accuracy:.2%}")
+        if evaluation:
+            print(f"Holdout accuracy (within ±5): {evaluation['quality']['within_5']:.2%} "
+                  f"on the most recent {evaluation['rows']} rows")
         
         return {
-            'regression_score': self.reg_model.score(X_scaled, y_reg),
-            'feature_importance': dict(zip(feature_columns, self.reg_model.feature_importances_))
+            'regression_score': evaluation['quality']['r2'] if evaluation else None,
+            'evaluation': evaluation,
+            'feature_importance': dict(zip(feature_columns, reg_model.feature_importances_))
         }
     
+    @timed('predictor.load_models')
     def load_models(self):
         """Load pre-trained models"""
+        import joblib
+        
+        with self._lock:
+            try:
+                version, directory = current_models()
+                self._set_models(
+                    version,
+                    joblib.load(os.path.join(directory, 'quality_regressor.pkl')),
+                    joblib.load(os.path.join(directory, 'quality_classifier.pkl')),
+                    joblib.load(os.path.join(directory, 'scaler.pkl')),
+                    joblib.load(os.path.join(directory, 'feature_columns.pkl'))
+                )
+            except:
+                return False
+            self._load_reference(directory)
+            return True
+    
+    def _load_reference(self, directory):
+        """Drift bins and holdout metrics saved with the models"""
+        import joblib
+        from utils.model_evaluation import DriftMonitor
+        
         try:
-            self.reg_model = joblib.load('models/quality_regressor.pkl')
-            self.clf_model = joblib.load('models/quality_classifier.pkl')
-            self.scaler = joblib.load('models/scaler.pkl')
-            self.feature_columns = joblib.load('models/feature_columns.pkl')
+            reference = joblib.load(os.path.join(directory, 'training_reference.pkl'))
+            self.drift = DriftMonitor.from_state(reference['drift'])
+            self.evaluation = reference['evaluation']
+        except Exception:
+            # Models saved before drift monitoring: rebuild the reference from the training data
+            data = self.generate_training_data()
+            self.drift = DriftMonitor().fit(data[self.feature_columns])
+            self.evaluation = None
+    
+    def _set_models(self, version, reg_model, clf_model, scaler, feature_columns):
+        with self._lock:
+            self.reg_model = reg_model
+            self.clf_model = clf_model
+            self.scaler = scaler
+            self.feature_columns = feature_columns
+            self.model_version = version
             self.is_trained = True
-            return True
-        except:
-            return False
+            self._checked_at = time.monotonic()
+    
+    @property
+    def last_model_version(self):
+        """Version of the loaded models (RemotePredictor reports the one from its latest reply)"""
+        return self.model_version
+    
+    def ensure_loaded(self):
+        """
+        Load (or train) the models once, however many sessions ask at the same time. Loaded
+        models are swapped for a newer saved version (a retrain in another process) within
+        Config.MODEL_RELOAD_CHECK_SECONDS.
+        """
+        if self.is_trained and time.monotonic() - self._checked_at < Config.MODEL_RELOAD_CHECK_SECONDS:
+            return
+        with self._lock:
+            if not self.is_trained:
+                if not self.load_models():
+                    self.train()
+            elif time.monotonic() - self._checked_at >= Config.MODEL_RELOAD_CHECK_SECONDS:
+                self._checked_at = time.monotonic()
+                try:
+                    version, _ = current_models()
+                except OSError:
+                    return  # keep serving what is loaded
+                if version != self.model_version:
+                    self.load_models()
     
+    def unload(self):
+        """Release the in-memory models (reloaded from disk on next use)"""
+        with self._lock:
+            self.reg_model = self.clf_model = self.scaler = None
+            self._explainers = None
+            self.drift = None
+            self.is_trained = False
+    
+    def reload(self):
+        """Swap in the models saved on disk, if models are loaded (unloaded ones load on next use)"""
+        with self._lock:
+            if self.is_trained:
+                self.load_models()
+    
+    def _loaded_models(self):
+        """
+        Regressor, classifier, scaler, feature columns and drift monitor from one load, loading
+        first if needed. Taken in one lock hold so a concurrent unload() cannot clear them in between.
+        """
+        with self._lock:
+            self.ensure_loaded()
+            return self.reg_model, self.clf_model, self.scaler, self.feature_columns, self.drift
+    
+    def drift_report(self):
+        """PSI per feature of live inputs so far, and the holdout metrics of the current models"""
+        with self._lock:
+            self.ensure_loaded()
+            return self.drift.psi().to_dict('records'), self.evaluation
+    
+    @timed('predictor.predict_quality')
     def predict_quality(self, features):
         """Predict quality score for current conditions"""
-        if not self.is_trained:
-            if not self.load_models():
-                self.train()
-        
-        # Ensure all required features are present
-        input_df = pd.DataFrame([features])
-        
-        # Add missing features with default values
-        for col in self.feature_columns:
-            if col not in input_df.columns:
-                input_df[col] = 0
-        
-        # Ensure correct column order
-        input_df = input_df[self.feature_columns]
+        return self._predict([features])[0]
+    
+    @timed('predictor.predict_batch')
+    def predict_batch(self, features_list):
+        """Predict quality for many feature dicts with one model call per estimator"""
+        return self._predict(features_list)
+    
+    def _predict(self, features_list):
+        # Untimed body of predict_quality/predict_batch, so each call is counted once
+        reg_model, clf_model, scaler, feature_columns, drift = self._loaded_models()
         
-        # Scale features
-        X_scaled = self.scaler.transform(input_df)
+        input_df, X_scaled = self._prepare(features_list, scaler, feature_columns)
+        if drift is not None:
+            drift.observe(input_df)
         
         # Predict
-        quality_score = self.reg_model.predict(X_scaled)[0]
-        defect_probability = self.clf_model.predict_proba(X_scaled)[0, 1]
+        quality_scores = reg_model.predict(X_scaled)
+        defect_probabilities = clf_model.predict_proba(X_scaled)[:, 1]
         
-        return {
-            'quality_score': round(quality_score, 2),
-            'defect_probability': round(defect_probability, 3),
+        return [{
+            'quality_score': round(float(quality_score), 2),
+            'defect_probability': round(float(defect_probability), 3),
             'risk_level': 'HIGH' if defect_probability > 0.3 else 'MEDIUM' if defect_probability > 0.1 else 'LOW'
-        }
+        } for quality_score, defect_probability in zip(quality_scores, defect_probabilities)]
+
+    def observe(self, features_list):
+        """Count inputs answered without a model call (prediction cache hits) in the drift monitor"""
+        _, _, _, feature_columns, drift = self._loaded_models()
+        if drift is not None:
+            drift.observe(pd.DataFrame(list(features_list)).reindex(columns=feature_columns, fill_value=0))
+
+    def _prepare(self, features_list, scaler, feature_columns):
+        """Model input and its scaled form; missing features default to 0, columns in training order"""
+        input_df = pd.DataFrame(list(features_list)).reindex(columns=feature_columns, fill_value=0)
+        return input_df, scaler.transform(input_df)
+    
+    @timed('predictor.explain_batch')
+    def explain_batch(self, features_list):
+        """Per-feature contributions to the quality score and defect log-odds of each prediction"""
+        from utils.explainability import TreePathExplainer, explain_rows
+        
+        with self._lock:
+            self.ensure_loaded()
+            # Path tables are built once per model version
+            if self._explainers is None or self._explainers[0] != self.model_version:
+                self._explainers = (self.model_version,
+                                    TreePathExplainer.for_forest(self.reg_model),
+                                    TreePathExplainer.for_boosting(self.clf_model))
+            _, quality_explainer, defect_explainer = self._explainers
+            scaler, feature_columns = self.scaler, self.feature_columns
+        
+        _, X_scaled = self._prepare(features_list, scaler, feature_columns)
+        return explain_rows(feature_columns, quality_explainer, defect_explainer, X_scaled)
+    
+    def explain(self, features):
+        return self.explain_batch([features])[0]
+
+def build_predictor():
+    """Models in this process, or a client of the shared inference process in multi-worker mode"""
+    if Config.PREDICTOR_BACKEND == 'remote':
+        from utils.inference_client import RemotePredictor
+        return RemotePredictor(Config.INFERENCE_ADDRESS)
+    return QualityPredictor()
 
-# Initialize predictor
-predictor = QualityPredictor()
+# Shared predictor: one per process, models unloaded when the last session releases it
+predictor_resource = resources.register('predictor', build_predictor, close=lambda p: p.unload())
+predictor = predictor_resource.get()
@@ -0,0 +1,137 @@
+import time
+import pandas as pd
+from config import Config
+from database import db
+from utils.shift_calendar import shift_calendar
+
+class ReportCubeBuilder:
+    """
+    Maintains the day x station x shift x unit report cube, rebuilding only dirty days.
+    Days are production days (see utils.shift_calendar), so each shift falls on one day.
+    """
+
+    def __init__(self, database):
+        self.db = database
+
+    def mark_all_dirty(self, conn):
+        """Queue every day that has source rows (used for the first build)"""
+        conn.execute(f'''
+            INSERT OR IGNORE INTO report_cube_dirty (day)
+            SELECT DISTINCT {shift_calendar.sql_day('COALESCE(end_time, start_time)')} FROM assembly_tracking
+            WHERE COALESCE(end_time, start_time) IS NOT NULL
+            UNION
+            SELECT DISTINCT {shift_calendar.sql_day('measurement_time')} FROM quality_measurements
+            WHERE measurement_time IS NOT NULL
+        ''')
+
+    def refresh(self):
+        """Rebuild cube slices for days changed since the last refresh; returns days rebuilt"""
+        with self.db.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT EXISTS (SELECT 1 FROM report_cube)")
+            if not cursor.fetchone()[0]:
+                self.mark_all_dirty(conn)
+
+            days = [row[0] for row in cursor.execute("SELECT day FROM report_cube_dirty ORDER BY day")]
+            if not days:
+                conn.commit()
+                return []
+
+            event_time = 'COALESCE(end_time, start_time)'
+            day_start, day_end = shift_calendar.sql_day_bounds()
+            for day in days:
+                cursor.execute("DELETE FROM report_cube WHERE day = ?", (day,))
+                # Range predicates keep the day scans index-friendly
+                cursor.execute(f'''
+                    INSERT INTO report_cube (day, station_id, shift_id, unit_id, operations, completed,
+                                             cycle_time_sum, cycle_time_count, defects, rework_hours,
+                                             checks, passes)
+                    SELECT ?, station_id, shift_id, unit_id,
+                           SUM(operations), SUM(completed), SUM(cycle_time_sum), SUM(cycle_time_count),
+                           SUM(defects), SUM(rework_hours), SUM(checks), SUM(passes)
+                    FROM (
+                        SELECT station_id, {shift_calendar.sql(event_time)} as shift_id, unit_id,
+                               1 as operations,
+                               CASE WHEN end_time IS NOT NULL THEN 1 ELSE 0 END as completed,
+                               COALESCE(cycle_time_hours, 0) as cycle_time_sum,
+                               CASE WHEN cycle_time_hours IS NOT NULL THEN 1 ELSE 0 END as cycle_time_count,
+                               COALESCE(defects, 0) as defects,
+                               COALESCE(rework_hours, 0) as rework_hours,
+                               0 as checks, 0 as passes
+                        FROM assembly_tracking
+                        WHERE {event_time} >= {day_start} AND {event_time} < {day_end}
+                        UNION ALL
+                        SELECT station_id, {shift_calendar.sql('measurement_time')}, unit_id,
+                               0, 0, 0, 0, 0, 0,
+                               1, CASE WHEN status = 'PASS' THEN 1 ELSE 0 END
+                        FROM quality_measurements
+                        WHERE measurement_time >= {day_start} AND measurement_time < {day_end}
+                    )
+                    WHERE station_id IS NOT NULL AND unit_id IS NOT NULL AND shift_id IS NOT NULL
+                    GROUP BY station_id, shift_id, unit_id
+                ''', (day, day, day, day, day))
+
+            cursor.executemany("DELETE FROM report_cube_dirty WHERE day = ?", [(day,) for day in days])
+            conn.commit()
+            return days
+
+    def load(self, start_day=None, end_day=None):
+        """Read cube cells for a day range (inclusive) as a DataFrame"""
+        with self.db.get_connection() as conn:
+            return pd.read_sql_query('''
+                SELECT * FROM report_cube
+                WHERE day >= COALESCE(?, '0000-00-00') AND day <= COALESCE(?, '9999-99-99')
+            ''', conn, params=[start_day, end_day])
+
+    def monthly_production(self, cube):
+        """Units completing the final station per month vs Config.TARGET_MONTHLY_PRODUCTION"""
+        final_station = Config.STATIONS[-1]['id']
+        completed = cube[(cube['station_id'] == final_station) & (cube['completed'] > 0)].copy()
+        completed['month'] = completed['day'].str[:7]
+        monthly = completed.groupby('month')['unit_id'].nunique().rename('units_completed').reset_index()
+        monthly['target'] = Config.TARGET_MONTHLY_PRODUCTION
+        monthly['attainment_pct'] = monthly['units_completed'] / Config.TARGET_MONTHLY_PRODUCTION * 100
+        return monthly
+
+    def station_cycle_times(self, cube):
+        """Average cycle time per station against its target"""
+        stations = cube.groupby('station_id')[['cycle_time_sum', 'cycle_time_count', 'defects', 'rework_hours']].sum()
+        stations['avg_cycle_time'] = stations['cycle_time_sum'] / stations['cycle_time_count'].where(stations['cycle_time_count'] > 0)
+        targets = {s['id']: (s['name'], s['cycle_time']) for s in Config.STATIONS}
+        stations['station'] = [targets.get(i, (str(i), None))[0] for i in stations.index]
+        stations['target_cycle_time'] = [targets.get(i, (None, None))[1] for i in stations.index]
+        return stations.reset_index()
+
+    def unit_cycle_times(self, cube):
+        """Total assembly hours per unit vs Config.TARGET_CYCLE_TIME"""
+        units = cube.groupby('unit_id')[['cycle_time_sum', 'defects', 'rework_hours']].sum().reset_index()
+        units['target_cycle_time'] = Config.TARGET_CYCLE_TIME
+        units['over_target'] = units['cycle_time_sum'] > Config.TARGET_CYCLE_TIME
+        return units
+
+    def shift_summary(self, cube):
+        """Operations, defects and pass rate per shift"""
+        shifts = cube.groupby('shift_id')[['operations', 'defects', 'rework_hours', 'checks', 'passes']].sum()
+        shifts['pass_rate'] = shifts['passes'] / shifts['checks'].where(shifts['checks'] > 0) * 100
+        shifts['shift'] = [shift_calendar.name(i) for i in shifts.index]
+        return shifts.reset_index()
+
+    def shift_instances(self, cube):
+        """Operations, defects and pass rate per worked shift (production day x shift), most recent first"""
+        worked = cube.groupby(['day', 'shift_id'])[['operations', 'defects', 'checks', 'passes']].sum().reset_index()
+        worked['pass_rate'] = worked['passes'] / worked['checks'].where(worked['checks'] > 0) * 100
+        shifts = shift_calendar.intervals(cube['day'].min(), pd.Timestamp(cube['day'].max()) + pd.Timedelta(days=2))
+        shifts['day'] = shifts['production_day'].dt.strftime('%Y-%m-%d')
+        worked = shifts.merge(worked, on=['day', 'shift_id'])
+        worked = worked[['day', 'shift', 'start', 'end', 'operations', 'defects', 'checks', 'pass_rate']]
+        return worked.iloc[::-1].reset_index(drop=True)
+
+def timed_report(builder, start_day=None, end_day=None):
+    """Refresh dirty days and load the cube, returning (cube, refreshed_days, elapsed_ms)"""
+    start = time.perf_counter()
+    refreshed = builder.refresh()
+    cube = builder.load(start_day, end_day)
+    return cube, refreshed, (time.perf_counter() - start) * 1000
+
+# Initialize report cube builder
+report_cubes = ReportCubeBuilder(db)
@@ -0,0 +1,124 @@
+import atexit
+import threading
+import weakref
+
+class SharedResource:
+    """A process-wide object built lazily on first use and cleaned up when its last holder releases it"""
+
+    def __init__(self, name, factory, close=None):
+        self.name = name
+        self.factory = factory
+        self.close_func = close
+        self._lock = threading.Lock()
+        self._instance = None
+        self.refcount = 0
+        self.builds = 0
+        self.closes = 0
+
+    @property
+    def built(self):
+        return self._instance is not None
+
+    def get(self):
+        """The shared instance, built once even when several threads ask at the same time"""
+        instance = self._instance
+        if instance is not None:
+            return instance
+        with self._lock:
+            if self._instance is None:
+                self._instance = self.factory()
+                self.builds += 1
+            return self._instance
+
+    def acquire(self):
+        instance = self.get()
+        with self._lock:
+            self.refcount += 1
+        return instance
+
+    def release(self):
+        """
+        Drop one reference. The last release runs close on the instance, which keeps its
+        identity (module-level aliases stay valid) and is expected to reload lazily.
+        """
+        with self._lock:
+            self.refcount = max(self.refcount - 1, 0)
+            if self.refcount or self._instance is None or self.close_func is None:
+                return
+            instance = self._instance
+            self.closes += 1
+        self.close_func(instance)
+
+    def close(self):
+        """Close and forget the instance (process shutdown)"""
+        with self._lock:
+            instance, self._instance = self._instance, None
+            self.refcount = 0
+        if instance is not None and self.close_func is not None:
+            self.close_func(instance)
+
+class ResourceLease:
+    """Holds references to shared resources until released or garbage collected"""
+
+    def __init__(self, registry, names):
+        for name in names:
+            registry[name].acquire()
+        self._finalizer = weakref.finalize(self, registry.release_all, tuple(names))
+
+    def release(self):
+        self._finalizer()
+
+class ResourceRegistry:
+    """Named SharedResources for this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._resources = {}
+
+    def register(self, name, factory, close=None):
+        with self._lock:
+            if name not in self._resources:
+                self._resources[name] = SharedResource(name, factory, close)
+            return self._resources[name]
+
+    def __getitem__(self, name):
+        return self._resources[name]
+
+    def get(self, name):
+        return self._resources[name].get()
+
+    def release_all(self, names):
+        for name in names:
+            self._resources[name].release()
+
+    def lease(self, *names):
+        """Acquire names now and release them when the returned lease is released or collected"""
+        return ResourceLease(self, names)
+
+    def track_session(self, session_state, *names):
+        """
+        Hold names for as long as a Streamlit session exists.
+
+        The lease lives in session_state, so it is released when the session is
+        dropped and the last session to go closes the resources.
+        """
+        for name in names:
+            key = f"_resource_lease_{name}"
+            if key not in session_state:
+                session_state[key] = self.lease(name)
+
+    def stats(self):
+        with self._lock:
+            resources = list(self._resources.values())
+        return [{'name': r.name, 'built': r.built, 'refcount': r.refcount,
+                 'builds': r.builds, 'closes': r.closes} for r in resources]
+
+    def close_all(self):
+        with self._lock:
+            resources = list(self._resources.values())
+        for resource in resources:
+            resource.close()
+
+# Process-wide registry
+resources = ResourceRegistry()
+atexit.register(resources.close_all)
@@ -0,0 +1,140 @@
+import itertools
+import json
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import Config
+from utils.line_simulator import simulate_line
+
+def build_scenarios(grid):
+    """
+    Expand a parameter grid into scenarios (cartesian product).
+
+    Keys are 'shifts', a Config.SIMULATION key such as 'max_wip', or
+    'station.<id>.<field>' for per-station overrides, e.g.
+    {'shifts': [[1, 2], [1, 2, 3]], 'station.5.capacity': [1, 2]}.
+    """
+    keys = list(grid)
+    scenarios = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        scenario = {'name': ', '.join(f"{k}={v}" for k, v in zip(keys, values)) or 'baseline',
+                    'shifts': None, 'station_overrides': {}, 'params': {}}
+        for key, value in zip(keys, values):
+            if key == 'shifts':
+                scenario['shifts'] = list(value)
+            elif key.startswith('station.'):
+                _, station_id, field = key.split('.', 2)
+                scenario['station_overrides'].setdefault(int(station_id), {})[field] = value
+            elif key in Config.SIMULATION:
+                scenario['params'][key] = value
+            else:
+                raise ValueError(f"Unknown scenario parameter: {key}")
+        scenarios.append(scenario)
+    return scenarios
+
+def run_replication(scenario, replication, days, seed):
+    """Run one simulation replication (executed in a worker process)"""
+    result = simulate_line(
+        days,
+        shifts=scenario['shifts'],
+        station_overrides=scenario['station_overrides'],
+        params=scenario['params'],
+        seed=seed
+    )
+    stations = result['stations']
+    return {
+        'scenario': scenario['name'],
+        'replication': replication,
+        'seed': seed,
+        'days': days,
+        'throughput': result['avg_monthly_throughput'],
+        'avg_wip': result['avg_wip'],
+        'avg_flow_time_hours': result['avg_flow_time_hours'],
+        'units_completed': result['units_completed'],
+        'bottleneck': result['bottleneck'],
+        'utilisation': dict(zip(stations['station'], stations['utilisation'].round(4)))
+    }
+
+def run_sweep(scenarios, replications=5, days=365, workers=None, output_path=None, base_seed=0):
+    """
+    Run every scenario replication across a process pool.
+
+    Each finished replication is appended to output_path (JSON lines) as it completes.
+    Passing the output_path of an interrupted sweep resumes it: replications already
+    recorded there with the same seed and days are reused, not rerun. Returns the
+    summary table.
+    """
+    if output_path is None:
+        os.makedirs(Config.SCENARIO_OUTPUT_DIR, exist_ok=True)
+        output_path = os.path.join(Config.SCENARIO_OUTPUT_DIR,
+                                   f"sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl")
+
+    # Common random numbers: replication i uses the same seed in every scenario
+    pending = {(scenario['name'], replication, base_seed + replication): scenario
+               for scenario in scenarios for replication in range(replications)}
+    records = []
+    torn = False
+    if os.path.exists(output_path):
+        with open(output_path) as f:
+            for line in f:
+                torn = not line.endswith('\n')
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn line from an interrupted write
+                key = (record['scenario'], record['replication'], record['seed'])
+                if key in pending and record.get('days') == days:
+                    del pending[key]
+                    records.append(record)
+
+    # spawn: forking the app process, with its database, scheduler and writer threads, can deadlock
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             mp_context=multiprocessing.get_context('spawn')) as executor, \
+            open(output_path, 'a') as output:
+        if torn:
+            output.write('\n')  # start appending on a fresh line
+        futures = [
+            executor.submit(run_replication, scenario, replication, days, seed)
+            for (_, replication, seed), scenario in pending.items()
+        ]
+        for future in as_completed(futures):
+            record = future.result()
+            output.write(json.dumps(record) + '\n')
+            output.flush()
+            records.append(record)
+
+    summary = summarise_sweep(records)
+    summary.attrs['output_path'] = output_path
+    return summary
+
+def load_sweep(path):
+    """Summarise a sweep previously streamed to disk"""
+    with open(path) as f:
+        return summarise_sweep([json.loads(line) for line in f if line.strip()])
+
+def summarise_sweep(records):
+    """Mean/spread of throughput, WIP and flow time plus the dominant bottleneck per scenario"""
+    rows = []
+    for name, group in itertools.groupby(sorted(records, key=lambda r: r['scenario']), key=lambda r: r['scenario']):
+        group = list(group)
+        throughput = np.array([r['throughput'] for r in group])
+        flow_times = [r['avg_flow_time_hours'] for r in group if r['avg_flow_time_hours'] is not None]
+        bottleneck, count = Counter(r['bottleneck'] for r in group).most_common(1)[0]
+        rows.append({
+            'scenario': name,
+            'replications': len(group),
+            'throughput_mean': throughput.mean(),
+            'throughput_std': throughput.std(ddof=1) if len(group) > 1 else 0.0,
+            'p_meets_target': float(np.mean(throughput >= Config.TARGET_MONTHLY_PRODUCTION)),
+            'avg_wip': np.mean([r['avg_wip'] for r in group]),
+            'avg_flow_time_hours': np.mean(flow_times) if flow_times else None,
+            'bottleneck': bottleneck,
+            'bottleneck_share': count / len(group)
+        })
+    columns = ['scenario', 'replications', 'throughput_mean', 'throughput_std', 'p_meets_target',
+               'avg_wip', 'avg_flow_time_hours', 'bottleneck', 'bottleneck_share']
+    return pd.DataFrame(rows, columns=columns).sort_values('throughput_mean', ascending=False).reset_index(drop=True)
@@ -0,0 +1,345 @@
+"""
+In-process scheduler for periodic jobs.
+
+Jobs have cron-like specs ("minute hour day month weekday", or @hourly/@daily/
+@weekly/@monthly) and run on a thread pool or, for CPU-heavy work, a process pool.
+Every app worker may run a scheduler: the scheduler_jobs table holds each job's
+next due time and a lease, and a worker only runs a job after it has moved
+next_run forward and taken the lease in one UPDATE, so each slot runs once across
+all workers. The owner renews the lease while the job runs; a worker that dies
+mid-job lets it expire after Config.SCHEDULER_LEASE_SECONDS. Slots missed while
+no worker was up are run once, not once per missed slot.
+"""
+import atexit
+import importlib
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from config import Config
+
+CRON_ALIASES = {
+    '@hourly': '0 * * * *',
+    '@daily': '0 0 * * *',
+    '@weekly': '0 0 * * 0',
+    '@monthly': '0 0 1 * *'
+}
+
+# (name, low, high) of the five cron fields
+CRON_FIELDS = [('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 6)]
+
+def _timestamp(moment):
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+def _resolve(path):
+    module, _, name = path.rpartition('.')
+    return getattr(importlib.import_module(module), name)
+
+def _call(path):
+    """Run a job by dotted path (a top-level function, so process pools can pickle it)"""
+    return _resolve(path)()
+
+class CronSpec:
+    """A parsed cron expression; weekdays are 0-6 from Sunday (7 is also Sunday)"""
+
+    def __init__(self, text):
+        self.text = text
+        fields = CRON_ALIASES.get(text.strip(), text).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec needs 5 fields: {text!r}")
+        values = [self._parse(field, name, low, high) for field, (name, low, high) in zip(fields, CRON_FIELDS)]
+        self.minutes, self.hours, self.days, self.months, weekdays = values
+        self.weekdays = {day % 7 for day in weekdays}
+        # As in cron: when both day fields are restricted, either one matching is enough
+        self._any_day = fields[2] == '*'
+        self._any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(field, name, low, high):
+        if name == 'weekday':
+            high = 7
+        values = set()
+        for part in field.split(','):
+            value_range, _, step = part.partition('/')
+            if value_range == '*':
+                start, end = low, high
+            elif '-' in value_range:
+                start, end = map(int, value_range.split('-'))
+            else:
+                start = end = int(value_range)
+                if step:
+                    end = high
+            step = int(step) if step else 1
+            if start < low or end > high or start > end or step < 1:
+                raise ValueError(f"Invalid cron {name} field: {field!r}")
+            values.update(range(start, end + 1, step))
+        return values
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def matches(self, moment):
+        return (moment.minute in self.minutes and moment.hour in self.hours
+                and moment.month in self.months and self._day_matches(moment))
+
+    def next_after(self, moment):
+        """First matching minute strictly after moment"""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 5)
+        while candidate < limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = candidate.replace(year=candidate.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"Cron spec never matches: {self.text!r}")
+
+    def __repr__(self):
+        return f"CronSpec({self.text!r})"
+
+class Job:
+    """A named periodic task: target and after are dotted paths to top-level functions"""
+
+    def __init__(self, name, spec, target, executor='thread', after=None, description=''):
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Unknown executor {executor!r}")
+        self.name = name
+        self.spec = CronSpec(spec) if spec else None  # None: only run on request
+        self.target = target
+        self.executor = executor
+        self.after = after  # called with the result in the worker that ran the job
+        self.description = description
+
+class Scheduler:
+    def __init__(self, database, tick_seconds=Config.SCHEDULER_TICK_SECONDS,
+                 lease_seconds=Config.SCHEDULER_LEASE_SECONDS, threads=Config.SCHEDULER_THREADS,
+                 processes=Config.SCHEDULER_PROCESSES):
+        self.database = database
+        self.tick_seconds = tick_seconds
+        self.lease_seconds = lease_seconds
+        self.threads = threads
+        self.processes = processes
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{time.time_ns()}"
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = {}  # job name -> future, for jobs this process owns
+        self._executors = {}
+        self._thread = None
+        self._stopping = False
+        atexit.register(self.stop)
+
+    def add(self, job):
+        self.jobs[job.name] = job
+        return job
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def start(self):
+        """Register the jobs and start ticking (once per process)"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self.sync_jobs()
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop ticking and wait for running jobs; queued ones are cancelled"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopping = True
+            executors, self._executors = self._executors, {}
+        if thread is not None:
+            self._wake.set()
+            thread.join()
+        for executor in executors.values():
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def sync_jobs(self):
+        """Create rows for new jobs; a changed spec is rescheduled from now"""
+        now = datetime.now()
+        with self.database.get_connection() as conn:
+            for job in self.jobs.values():
+                spec = job.spec.text if job.spec else None
+                next_run = _timestamp(job.spec.next_after(now)) if job.spec else None
+                conn.execute('''
+                    INSERT OR IGNORE INTO scheduler_jobs (name, spec, next_run) VALUES (?, ?, ?)
+                ''', (job.name, spec, next_run))
+                conn.execute('''
+                    UPDATE scheduler_jobs SET spec = ?, next_run = ? WHERE name = ? AND spec IS NOT ?
+                ''', (spec, next_run, job.name, spec))
+            conn.commit()
+
+    def _run(self):
+        while not self._stopping:
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"⚠️ Scheduler tick failed, will retry: {e}")
+            self._wake.wait(self.tick_seconds)
+
+    # ------------------------------------------------------------------ running
+
+    def tick(self, now=None):
+        """Renew leases of running jobs and start the due ones this process can claim"""
+        now = now or datetime.now()
+        with self._lock:
+            running = list(self._running)
+        if running:
+            with self.database.get_connection() as conn:
+                conn.executemany('''
+                    UPDATE scheduler_jobs SET leased_until = ? WHERE name = ? AND owner = ?
+                ''', [(_timestamp(now + timedelta(seconds=self.lease_seconds)), name, self.owner)
+                      for name in running])
+                conn.commit()
+
+        started = []
+        for job in self.jobs.values():
+            if job.spec and job.name not in running and self._claim(job, now, job.spec.next_after(now)):
+                self._submit(job)
+                started.append(job.name)
+        return started
+
+    def run_now(self, name):
+        """Start a job outside its schedule; False when it is already running in some worker"""
+        job = self.jobs[name]
+        if self._thread is None:
+            self.sync_jobs()  # scheduler not started in this process: the job row may not exist yet
+        now = datetime.now()
+        with self._lock:
+            if name in self._running:
+                return False
+        if not self._claim(job, now, None):
+            return False
+        self._submit(job)
+        return True
+
+    def _claim(self, job, now, next_run):
+        """
+        Take the job's lease, and when next_run is given also require that the job is
+        due and move next_run forward. One UPDATE, so only one worker can succeed.
+        """
+        assignments = ["owner = ?", "leased_until = ?", "last_started_at = ?"]
+        values = [self.owner, _timestamp(now + timedelta(seconds=self.lease_seconds)), _timestamp(now)]
+        conditions, condition_values = ["name = ?"], [job.name]
+        if next_run:
+            assignments.append("next_run = ?")
+            values.append(_timestamp(next_run))
+            conditions.append("next_run <= ?")
+            condition_values.append(_timestamp(now))
+        conditions.append("(leased_until IS NULL OR leased_until <= ?)")
+        condition_values.append(_timestamp(now))
+        with self.database.get_connection() as conn:
+            cursor = conn.execute(f'''
+                UPDATE scheduler_jobs SET {', '.join(assignments)} WHERE {' AND '.join(conditions)}
+            ''', values + condition_values)
+            conn.commit()
+            return cursor.rowcount == 1
+
+    def _executor(self, kind):
+        with self._lock:
+            executor = self._executors.get(kind)
+            if executor is None:
+                if kind == 'process':
+                    # spawn: forking a process that holds SQLite connections and threads is unsafe
+                    executor = ProcessPoolExecutor(self.processes, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    executor = ThreadPoolExecutor(self.threads, thread_name_prefix='job')
+                self._executors[kind] = executor
+            return executor
+
+    def _submit(self, job):
+        started = time.perf_counter()
+        executor = self._executor(job.executor)
+        try:
+            future = executor.submit(_call, job.target)
+        except Exception as e:
+            self._finish(job, started, error=e)
+            return
+        with self._lock:
+            self._running[job.name] = future
+        future.add_done_callback(lambda f: self._done(job, started, executor, f))
+
+    def _done(self, job, started, executor, future):
+        with self._lock:
+            self._running.pop(job.name, None)
+        if future.cancelled():
+            self._finish(job, started, error="cancelled at shutdown", log=False)
+            return
+        error = future.exception()
+        if isinstance(error, BrokenExecutor):
+            # A worker process died; start a fresh pool for the next run
+            with self._lock:
+                if self._executors.get(job.executor) is executor:
+                    del self._executors[job.executor]
+        if error is None and job.after:
+            try:
+                _resolve(job.after)(future.result())
+            except Exception as e:
+                error = e
+        self._finish(job, started, error=error)
+
+    def _finish(self, job, started, error=None, log=True):
+        """Record the outcome and release the lease"""
+        duration_ms = (time.perf_counter() - started) * 1000
+        try:
+            with self.database.get_connection() as conn:
+                conn.execute('''
+                    UPDATE scheduler_jobs
+                    SET owner = NULL, leased_until = NULL, last_run_at = ?, last_status = ?,
+                        last_error = ?, last_duration_ms = ?
+                    WHERE name = ? AND owner = ?
+                ''', (_timestamp(datetime.now()), 'failed' if error else 'ok',
+                      str(error) if error else None, duration_ms, job.name, self.owner))
+                conn.commit()
+            if error and log:
+                self.database.log_event('JOB_FAILED', f"Scheduled job {job.name} failed: {error}",
+                                        data={'job': job.name, 'duration_ms': round(duration_ms)})
+        except Exception as e:
+            print(f"⚠️ Could not record result of job {job.name}: {e}")
+
+    # ------------------------------------------------------------------ status
+
+    def is_running(self, name):
+        with self._lock:
+            return name in self._running
+
+    def status(self):
+        """One dict per registered job, with its schedule and last outcome from any worker"""
+        with self.database.get_connection() as conn:
+            rows = {row['name']: dict(row) for row in conn.execute("SELECT * FROM scheduler_jobs")}
+        now = _timestamp(datetime.now())
+        status = []
+        for job in self.jobs.values():
+            row = rows.get(job.name, {})
+            leased = row.get('leased_until') is not None and row['leased_until'] > now
+            status.append({
+                'job': job.name,
+                'description': job.description,
+                'schedule': job.spec.text if job.spec else 'on request',
+                'executor': job.executor,
+                'running': 'here' if self.is_running(job.name) else ('elsewhere' if leased else ''),
+                'next_run': row.get('next_run'),
+                'last_run_at': row.get('last_run_at'),
+                'last_status': row.get('last_status'),
+                'last_duration_ms': row.get('last_duration_ms'),
+                'last_error': row.get('last_error')
+            })
+        return status
@@ -0,0 +1,134 @@
+"""
+Shift calendar built from Config.SHIFTS.
+
+Every minute of the day maps to the shift working it, so the Night shift
+(22:00-06:00) is one shift that wraps midnight rather than two fragments. A
+production day starts where the wrapping shift ends (06:00), which puts a whole
+Night shift on the day it started: 02:00 on the 5th is the Night shift of the 4th.
+
+The same lookup is used for single timestamps, vectorized over timestamp arrays
+and as SQL expressions, so Python and SQL aggregation assign shifts identically.
+"""
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from config import Config
+
+MINUTES_PER_DAY = 24 * 60
+
+def _minute_of_day(clock):
+    hours, minutes = clock.split(':')
+    return int(hours) * 60 + int(minutes)
+
+class ShiftCalendar:
+    def __init__(self, shifts=Config.SHIFTS):
+        self.shifts = shifts
+        # shift id working each minute of the day (0: no shift); ids are single digits so
+        # the SQL form can index a string literal
+        self._by_minute = np.zeros(MINUTES_PER_DAY, dtype=np.int8)
+        self._start_minute = {}
+        self._duration = {}
+        self.day_start = 0  # minutes after midnight at which a production day begins
+        for shift_id, shift in shifts.items():
+            if not 0 < shift_id < 10:
+                raise ValueError(f"Shift ids must be 1-9, got {shift_id}")
+            start, end = _minute_of_day(shift['start']), _minute_of_day(shift['end'])
+            duration = (end - start) % MINUTES_PER_DAY or MINUTES_PER_DAY
+            minutes = np.arange(start, start + duration) % MINUTES_PER_DAY
+            if self._by_minute[minutes].any():
+                raise ValueError(f"Shift {shift_id} overlaps another shift")
+            self._by_minute[minutes] = shift_id
+            self._start_minute[shift_id] = start
+            self._duration[shift_id] = duration
+            if start + duration > MINUTES_PER_DAY:
+                self.day_start = end
+        self._hour_aligned = all(minute % 60 == 0 for minute in self._start_minute.values()) and \
+            all(duration % 60 == 0 for duration in self._duration.values())
+
+    # ------------------------------------------------------------------ Python
+
+    def name(self, shift_id):
+        return self.shifts.get(shift_id, {}).get('name', 'Off shift' if not shift_id else str(shift_id))
+
+    def shift_at(self, moment):
+        """Shift id working at a datetime (None between shifts)"""
+        return int(self._by_minute[moment.hour * 60 + moment.minute]) or None
+
+    def current(self, now=None):
+        """(shift id, name) of the shift working now"""
+        shift_id = self.shift_at(now or datetime.now())
+        return shift_id, self.name(shift_id)
+
+    def assign(self, timestamps):
+        """Shift id per timestamp as an int8 array (0 for missing timestamps or off-shift minutes)"""
+        times = pd.DatetimeIndex(pd.to_datetime(timestamps))
+        shift_ids = np.zeros(len(times), dtype=np.int8)
+        valid = ~times.isna()
+        minutes = times.hour[valid] * 60 + times.minute[valid]
+        shift_ids[valid] = self._by_minute[np.asarray(minutes, dtype=np.int64)]
+        return shift_ids
+
+    def production_days(self, timestamps):
+        """Production day per timestamp (midnight of the day its shift started)"""
+        times = pd.DatetimeIndex(pd.to_datetime(timestamps))
+        return (times - pd.Timedelta(minutes=self.day_start)).normalize()
+
+    def intervals(self, start, end, shift_ids=None):
+        """
+        Shift instances overlapping [start, end) as a DataFrame of production_day,
+        shift_id, shift, start and end, in time order
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        shift_ids = [s for s in self.shifts if shift_ids is None or s in shift_ids]
+        first_day = (start - pd.Timedelta(minutes=self.day_start)).normalize() - pd.Timedelta(days=1)
+        days = pd.date_range(first_day, end.normalize(), freq='D').values
+        # Minutes from the production day's midnight to each shift's start
+        offsets = np.array([(self._start_minute[s] - self.day_start) % MINUTES_PER_DAY + self.day_start
+                            for s in shift_ids], dtype='timedelta64[m]')
+        durations = np.array([self._duration[s] for s in shift_ids], dtype='timedelta64[m]')
+
+        starts = days[:, None] + offsets[None, :]
+        intervals = pd.DataFrame({
+            'production_day': np.repeat(days, len(shift_ids)),
+            'shift_id': np.tile(shift_ids, len(days)),
+            'start': starts.ravel(),
+            'end': (starts + durations[None, :]).ravel()
+        })
+        intervals = intervals[(intervals['end'] > start) & (intervals['start'] < end)]
+        intervals.insert(2, 'shift', intervals['shift_id'].map(self.name))
+        return intervals.sort_values('start').reset_index(drop=True)
+
+    def hour_mask(self, shift_ids):
+        """1 for each hour of the day any of the shifts is working, else 0"""
+        by_hour = self._by_minute.reshape(24, 60)
+        return np.isin(by_hour, list(shift_ids)).any(axis=1).astype(int).tolist()
+
+    # ------------------------------------------------------------------ SQL
+
+    def sql(self, column):
+        """SQL expression for the shift id of a timestamp column (NULL off shift or for NULL)"""
+        if self._hour_aligned:
+            lookup = ''.join(str(s) for s in self._by_minute[::60])
+            position = f"CAST(strftime('%H', {column}) AS INTEGER) + 1"
+        else:
+            lookup = ''.join(str(s) for s in self._by_minute)
+            position = (f"CAST(strftime('%H', {column}) AS INTEGER) * 60 "
+                        f"+ CAST(strftime('%M', {column}) AS INTEGER) + 1")
+        expression = f"CAST(substr('{lookup}', {position}, 1) AS INTEGER)"
+        return f"NULLIF({expression}, 0)" if '0' in lookup else expression
+
+    def sql_day(self, column):
+        """SQL expression for the production day of a timestamp column"""
+        if self.day_start:
+            return f"DATE({column}, '-{self.day_start} minutes')"
+        return f"DATE({column})"
+
+    def sql_day_bounds(self, day='?'):
+        """SQL (first, after-last) timestamp expressions of a production day parameter"""
+        if self.day_start:
+            return (f"DATETIME({day}, '+{self.day_start} minutes')",
+                    f"DATETIME({day}, '+1 day', '+{self.day_start} minutes')")
+        return f"DATE({day})", f"DATE({day}, '+1 day')"
+
+# Shift calendar of Config.SHIFTS
+shift_calendar = ShiftCalendar()